@@ -2,6 +2,9 @@
 """
 Auto-rebuild Dashboard
 Watches for changes to configuration files and automatically rebuilds the dashboard
+
+Builds run in this process by default, so the generateData worker pool stays
+warm between rebuilds; use --isolated to run each build in a fresh process.
 """
 
 import os
@@ -15,10 +18,12 @@ from watchdog.events import FileSystemEventHandler
 # Add project root to path
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.append(str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "src" / "scripts"))
 
 class DashboardRebuildHandler(FileSystemEventHandler):
-    def __init__(self, theme='dark'):
+    def __init__(self, theme='dark', isolated=False):
         self.theme = theme
+        self.isolated = isolated
         self.last_rebuild = 0
         self.debounce_seconds = 1  # Prevent rapid rebuilds
         
@@ -70,6 +75,10 @@ class DashboardRebuildHandler(FileSystemEventHandler):
             print(f"\n🔄 Initial build requested")
         print(f"⚡ Rebuilding dashboard with {self.theme} theme...")
         
+        if not self.isolated:
+            self.rebuild_in_process()
+            return
+        
         try:
             # Run the dashboard renderer
             result = subprocess.run([
@@ -88,6 +97,16 @@ class DashboardRebuildHandler(FileSystemEventHandler):
                 
         except Exception as e:
             print(f"❌ Error rebuilding dashboard: {e}")
+    
+    def rebuild_in_process(self):
+        """Rebuild in this process, reusing the warm generateData workers"""
+        try:
+            import dashboard_renderer
+            dashboard_renderer.render_dashboard(theme_name=self.theme, skip_validation=True)
+            print("✅ Dashboard rebuilt successfully!")
+            print(f"   View at: http://localhost:5173")
+        except Exception as e:
+            print(f"❌ Dashboard rebuild failed: {e}")
 
 def main():
     import argparse
@@ -95,6 +114,8 @@ def main():
     parser.add_argument('--theme', default='dark', help='Theme to use for dashboard')
     parser.add_argument('--paths', nargs='+', default=['config', 'src/widgets', 'src/themes', 'src/template'], 
                        help='Paths to watch for changes')
+    parser.add_argument('--isolated', action='store_true',
+                       help='Run each build in a fresh process (workers are not reused)')
     args = parser.parse_args()
     
     print(f"🔍 Watching for changes to rebuild dashboard with {args.theme} theme...")
@@ -102,7 +123,7 @@ def main():
     print("🔄 Press Ctrl+C to stop")
     
     # Initial build
-    handler = DashboardRebuildHandler(theme=args.theme)
+    handler = DashboardRebuildHandler(theme=args.theme, isolated=args.isolated)
     handler.rebuild_dashboard("initial build")
     
     # Set up file watcher
@@ -5,21 +5,17 @@ Build all theme CSS files without overwriting main HTML
 
 import os
 import sys
-import yaml
 from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src" / "scripts"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from utils.yaml_loader import load_yaml
 
 PROJECT_ROOT = Path(__file__).parent.parent
 THEMES_DIR = PROJECT_ROOT / "src" / "themes"
 DIST_DIR = PROJECT_ROOT / "dist"
 
-def load_yaml(file_path):
-    """Load a YAML file"""
-    with open(file_path, 'r') as f:
-        return yaml.safe_load(f)
-
 def build_theme_css(theme_name):
     """Build theme CSS from theme configuration"""
     print(f"🎨 Building {theme_name} theme CSS...")
@@ -0,0 +1,17 @@
+# Slate Fake Upstreams
+# ====================
+
+"""
+Local stand-ins for every upstream the bundled widgets integrate with
+(OpenWeatherMap, Todoist, Trilium, Linkwarden, Pi-hole, Obsidian Local
+REST API and RSS), with configurable latency, error rates and payload
+sizes. Point a widget's ``baseUrl`` at a running service to develop or
+load-test without touching real accounts.
+
+Run ``python3 src/fake_upstream --help`` for the command line.
+"""
+
+from .server import Behaviour, FakeService, base_url, start_service
+from .services import SERVICES
+
+__all__ = ['Behaviour', 'FakeService', 'SERVICES', 'base_url', 'start_service']
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Slate Fake Upstreams
+====================
+
+Serve fake upstreams on consecutive localhost ports and print the
+``baseUrl`` to use for each one.
+
+    python3 src/fake_upstream
+    python3 src/fake_upstream --latency 50-400 --error-rate 0.1 --items 200
+    python3 src/fake_upstream --services todoist,rss --base-port 9000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Runnable both as ``python3 src/fake_upstream`` and ``python3 -m fake_upstream``
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from fake_upstream.server import Behaviour, base_url, start_service
+from fake_upstream.services import SERVICES
+
+# Widget settings that take the OpenWeatherMap base URL
+OWM_SETTINGS = ('baseUrl', 'tileBaseUrl')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Slate fake upstream servers')
+    parser.add_argument('--services', default=','.join(SERVICES),
+                        help=f"Comma-separated services to run (default: all of {', '.join(SERVICES)})")
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+    parser.add_argument('--base-port', type=int, default=8900,
+                        help='Port of the first service; the rest follow in order (default: 8900)')
+    parser.add_argument('--latency', default='0',
+                        help="Injected latency in ms, fixed or 'min-max' (default: 0)")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of requests answered with an error (default: 0)')
+    parser.add_argument('--error-status', default='500,502,503',
+                        help='Comma-separated error statuses to inject (default: 500,502,503)')
+    parser.add_argument('--items', type=int, default=20,
+                        help='Records per list response: tasks, notes, links, files, feed items (default: 20)')
+    parser.add_argument('--text-size', type=int, default=80,
+                        help='Characters of text per record (default: 80)')
+    parser.add_argument('--churn', type=float, default=0.2,
+                        help='Probability a list request sees changed data (default: 0.2)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for data, latency and errors (default: 0)')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.services.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SERVICES]
+    if unknown:
+        parser.error(f"unknown service(s): {', '.join(unknown)}")
+
+    print("🧪 Slate fake upstreams")
+    for name in names:
+        behaviour = Behaviour(
+            latency=args.latency,
+            error_rate=args.error_rate,
+            error_statuses=tuple(int(s) for s in args.error_status.split(',')),
+            items=args.items,
+            text_size=args.text_size,
+            churn=args.churn,
+            seed=args.seed
+        )
+        port = args.base_port + list(SERVICES).index(name)
+        server = start_service(SERVICES[name](behaviour), args.host, port, args.verbose)
+        url = base_url(server)
+        if name == 'openweathermap':
+            print(f"   {name:<15} {url}   ({' and '.join(OWM_SETTINGS)} of weather, forecast, radar)")
+        elif name == 'rss':
+            print(f"   {name:<15} {url}/rss/<name>.xml")
+        else:
+            print(f"   {name:<15} {url}")
+    print("   Request counts: <baseUrl>/__fake__/stats  (Ctrl+C to stop)")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("\n🛑 Fake upstreams stopped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Slate Fake Upstream Server
+==========================
+
+HTTP plumbing shared by every fake service: one ``ThreadingHTTPServer``
+per service, a small route table, and a :class:`Behaviour` that injects
+latency and errors in front of every handler.
+
+Each service also answers ``GET /__fake__/stats`` with its per-route
+request counts, so load tests can check how many calls actually reached
+the "upstream".
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+STATS_PATH = '/__fake__/stats'
+
+
+class Behaviour:
+    """
+    Latency, failure and payload settings of a fake service
+
+    Args:
+        latency: ``"ms"`` or ``"min-max"`` in milliseconds
+        error_rate: Fraction of requests (0-1) answered with an error status
+        error_statuses: Statuses to pick from when a request fails
+        items: Number of records in list responses (tasks, notes, links, ...)
+        text_size: Characters of filler text per record
+        churn: Probability that a list request changes the data first, so
+            incremental fetchers see deltas
+        seed: Seed for data, latency and failures
+    """
+
+    def __init__(self, latency: str = '0', error_rate: float = 0.0,
+                 error_statuses: Tuple[int, ...] = (500, 502, 503),
+                 items: int = 20, text_size: int = 80, churn: float = 0.2,
+                 seed: int = 0):
+        low, _, high = str(latency).partition('-')
+        self.latency_low = float(low) / 1000
+        self.latency_high = float(high) / 1000 if high else self.latency_low
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.items = items
+        self.text_size = text_size
+        self.churn = churn
+        self.seed = seed
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        with self._lock:
+            return self._random.uniform(self.latency_low, self.latency_high)
+
+    def failure(self) -> Optional[int]:
+        """Return an error status for this request, or None to serve it"""
+        if self.error_rate <= 0:
+            return None
+        with self._lock:
+            if self._random.random() < self.error_rate:
+                return self._random.choice(self.error_statuses)
+        return None
+
+
+class Request:
+    """Parsed request handed to route handlers"""
+
+    def __init__(self, handler: BaseHTTPRequestHandler, match: 're.Match'):
+        parts = urlsplit(handler.path)
+        self.method = handler.command
+        self.path = parts.path
+        self.params = match.groupdict()
+        self.query = dict(parse_qsl(parts.query, keep_blank_values=True))
+        self.headers = handler.headers
+        length = int(handler.headers.get('Content-Length') or 0)
+        self.body = handler.rfile.read(length) if length else b''
+
+    def json(self) -> Any:
+        return json.loads(self.body or b'null')
+
+    def form(self) -> Dict[str, str]:
+        return dict(parse_qsl(self.body.decode('utf-8'), keep_blank_values=True))
+
+
+# A handler returns (status, body) or (status, body, headers); dict and
+# list bodies are sent as JSON, str as text and bytes as-is
+Response = Tuple[Any, ...]
+Route = Tuple[str, Pattern, str, Callable[[Request], Response]]
+
+
+class FakeService:
+    """Base class of a fake upstream: a name, a route table and its state"""
+
+    name = 'service'
+
+    def __init__(self, behaviour: Behaviour):
+        self.behaviour = behaviour
+        self.random = random.Random(f"{self.name}:{behaviour.seed}")
+        self.lock = threading.Lock()
+        self.stats: Counter = Counter()
+        self.routes: List[Route] = []
+
+    def route(self, method: str, pattern: str, handler: Callable[[Request], Response]) -> None:
+        # Readable stats key: "GET /map/<layer>/<z>/<x>/<y>.png"
+        label = f"{method} " + re.sub(r'\(\?P<(\w+)>[^)]*\)', r'<\1>', pattern).replace('\\', '')
+        self.routes.append((method, re.compile(f"^{pattern}$"), label, handler))
+
+    def text(self, words: Optional[int] = None) -> str:
+        """Filler text of roughly ``text_size`` characters"""
+        size = self.behaviour.text_size if words is None else words * 6
+        vocabulary = ('dashboard', 'slate', 'widget', 'upstream', 'cache', 'latency',
+                      'theme', 'refresh', 'signal', 'focus', 'render', 'notes')
+        text = ''
+        while len(text) < size:
+            text += self.random.choice(vocabulary) + ' '
+        return text[:size].strip().capitalize()
+
+    def maybe_churn(self) -> bool:
+        """Decide whether this request should see changed data"""
+        return self.random.random() < self.behaviour.churn
+
+
+def _make_handler(service: FakeService, verbose: bool):
+    class FakeHandler(BaseHTTPRequestHandler):
+        server_version = f"SlateFake/{service.name}"
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+            headers = dict(headers or {})
+            if isinstance(body, (dict, list)):
+                payload = json.dumps(body).encode('utf-8')
+                headers.setdefault('Content-Type', 'application/json')
+            elif isinstance(body, str):
+                payload = body.encode('utf-8')
+                headers.setdefault('Content-Type', 'text/plain; charset=utf-8')
+            else:
+                payload = body or b''
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            if self.command != 'HEAD' and status != 304:
+                self.wfile.write(payload)
+
+        def _dispatch(self) -> None:
+            path = urlsplit(self.path).path
+            if path == STATS_PATH:
+                with service.lock:
+                    self._send(200, dict(service.stats))
+                return
+
+            command = 'GET' if self.command == 'HEAD' else self.command
+            for method, pattern, label, handler in service.routes:
+                match = pattern.match(path)
+                if match and method == command:
+                    break
+            else:
+                self._send(404, {'error': f"no route for {self.command} {path}"})
+                return
+
+            request = Request(self, match)
+            with service.lock:
+                service.stats[label] += 1
+
+            delay = service.behaviour.delay()
+            if delay > 0:
+                time.sleep(delay)
+            status = service.behaviour.failure()
+            if status:
+                self._send(status, {'error': 'injected failure', 'status': status})
+                return
+
+            try:
+                with service.lock:
+                    response = handler(request)
+            except Exception as e:
+                self._send(500, {'error': f"{type(e).__name__}: {e}"})
+                return
+            self._send(*response)
+
+        do_GET = do_POST = do_HEAD = _dispatch
+
+        def log_message(self, format: str, *args) -> None:
+            if verbose:
+                super().log_message(format, *args)
+
+    return FakeHandler
+
+
+def start_service(service: FakeService, host: str = '127.0.0.1', port: int = 0,
+                  verbose: bool = False) -> ThreadingHTTPServer:
+    """
+    Serve a fake service on a daemon thread
+
+    Args:
+        service: Service to serve
+        host: Interface to bind
+        port: Port to bind (0 picks a free one)
+        verbose: Log every request to stderr
+
+    Returns:
+        ThreadingHTTPServer: The running server; ``server_address`` has the port
+    """
+    server = ThreadingHTTPServer((host, port), _make_handler(service, verbose))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name=f"fake-{service.name}", daemon=True)
+    thread.start()
+    return server
+
+
+def base_url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Slate Fake Upstream Services
+============================
+
+Stand-ins for every upstream a bundled widget talks to. Each one answers
+the endpoints and response shapes the widget (or ``dataFetcher``) actually
+uses, checks credentials loosely (any non-empty key is accepted), and
+generates deterministic data from the :class:`Behaviour` seed.
+
+List endpoints keep their data in memory and, with probability
+``Behaviour.churn``, change it before answering, so the incremental
+``sync`` and ``watermark`` fetch strategies see realistic deltas.
+"""
+
+import hashlib
+import struct
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate
+from typing import Any, Dict, List
+from urllib.parse import unquote
+
+from .server import Behaviour, FakeService, Request, Response
+
+_UNAUTHORIZED = (401, {'error': 'unauthorized'})
+
+
+def _png(size: int = 256, rgba: bytes = b'\x40\x80\xc0\x60') -> bytes:
+    """A solid-colour RGBA PNG, standing in for a map tile"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    rows = b''.join(b'\x00' + rgba * size for _ in range(size))
+    header = struct.pack('>IIBBBBB', size, size, 8, 6, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(rows)) + chunk(b'IEND', b''))
+
+
+class OpenWeatherMapService(FakeService):
+    """Current weather, 5-day forecast, geocoding and map tiles"""
+
+    name = 'openweathermap'
+    CONDITIONS = [
+        ('clear sky', '01'), ('few clouds', '02'), ('scattered clouds', '03'),
+        ('broken clouds', '04'), ('shower rain', '09'), ('light rain', '10'),
+        ('thunderstorm', '11'), ('snow', '13'), ('mist', '50')
+    ]
+
+    def __init__(self, behaviour: Behaviour):
+        super().__init__(behaviour)
+        self.tile = _png()
+        self.route('GET', r'/data/2\.5/weather', self.weather)
+        self.route('GET', r'/data/2\.5/forecast', self.forecast)
+        self.route('GET', r'/geo/1\.0/zip', self.geocode_zip)
+        self.route('GET', r'/geo/1\.0/direct', self.geocode_direct)
+        self.route('GET', r'/map/(?P<layer>[\w-]+)/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)\.png', self.map_tile)
+
+    def _conditions(self, units: str, at: float) -> Dict[str, Any]:
+        description, code = self.random.choice(self.CONDITIONS)
+        temp = self.random.uniform(40, 95) if units == 'imperial' else self.random.uniform(4, 35)
+        hour = datetime.fromtimestamp(at).hour
+        return {
+            'dt': int(at),
+            'main': {'temp': round(temp, 2), 'feels_like': round(temp - 1.5, 2),
+                     'humidity': self.random.randint(20, 95), 'pressure': self.random.randint(995, 1030)},
+            'weather': [{'id': 800, 'main': description.split()[-1].title(), 'description': description,
+                         'icon': f"{code}{'d' if 6 <= hour < 18 else 'n'}"}],
+            'wind': {'speed': round(self.random.uniform(0, 20), 2), 'deg': self.random.randint(0, 359)},
+            'clouds': {'all': self.random.randint(0, 100)}
+        }
+
+    def weather(self, request: Request) -> Response:
+        if not request.query.get('appid'):
+            return _UNAUTHORIZED
+        body = self._conditions(request.query.get('units', 'standard'), time.time())
+        body.update({'name': 'Fakeville', 'cod': 200})
+        return 200, body
+
+    def forecast(self, request: Request) -> Response:
+        if not request.query.get('appid'):
+            return _UNAUTHORIZED
+        count = min(int(request.query.get('cnt', 40)), 40)
+        start = (int(time.time()) // 10800 + 1) * 10800
+        units = request.query.get('units', 'standard')
+        entries = [self._conditions(units, start + i * 10800) for i in range(count)]
+        return 200, {'cod': '200', 'cnt': count, 'list': entries, 'city': {'name': 'Fakeville'}}
+
+    def _place(self, seed: str) -> Dict[str, Any]:
+        digest = int(hashlib.sha256(seed.encode('utf-8')).hexdigest()[:8], 16)
+        return {'lat': round(25 + digest % 2300 / 100, 4),
+                'lon': round(-120 + digest // 2300 % 5000 / 100, 4)}
+
+    def geocode_zip(self, request: Request) -> Response:
+        if not request.query.get('appid'):
+            return _UNAUTHORIZED
+        zip_code = request.query.get('zip', '').split(',')[0]
+        return 200, {'zip': zip_code, 'name': f"Fake {zip_code}", 'country': 'US', **self._place(zip_code)}
+
+    def geocode_direct(self, request: Request) -> Response:
+        if not request.query.get('appid'):
+            return _UNAUTHORIZED
+        name = request.query.get('q', '').split(',')[0].strip()
+        if not name:
+            return 200, []
+        return 200, [{'name': name.title(), 'country': 'US', **self._place(name.lower())}]
+
+    def map_tile(self, request: Request) -> Response:
+        if not request.query.get('appid'):
+            return _UNAUTHORIZED
+        return 200, self.tile, {'Content-Type': 'image/png'}
+
+
+class TodoistService(FakeService):
+    """Todoist ``/api/v1/sync`` with real sync tokens"""
+
+    name = 'todoist'
+
+    def __init__(self, behaviour: Behaviour):
+        super().__init__(behaviour)
+        self.version = 1
+        self.tasks: Dict[str, Dict[str, Any]] = {}
+        for _ in range(behaviour.items):
+            self._add_task()
+        self.route('POST', r'/api/v1/sync', self.sync)
+
+    def _add_task(self) -> None:
+        task_id = f"{len(self.tasks) + 1000:08d}"
+        self.tasks[task_id] = {
+            'id': task_id,
+            'content': self.text(words=6),
+            'description': self.text(),
+            'checked': False,
+            'is_deleted': False,
+            'priority': self.random.randint(1, 4),
+            'due': None,
+            'added_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+            'project_id': '2200000000',
+            'version': self.version
+        }
+
+    def _churn(self) -> None:
+        self.version += 1
+        open_tasks = [t for t in self.tasks.values() if not t['checked']]
+        if open_tasks and self.random.random() < 0.5:
+            self.random.choice(open_tasks).update(checked=True, version=self.version)
+        else:
+            self._add_task()
+
+    def sync(self, request: Request) -> Response:
+        if not request.headers.get('Authorization', '').startswith('Bearer '):
+            return _UNAUTHORIZED
+        if self.maybe_churn():
+            self._churn()
+
+        token = request.form().get('sync_token', '*')
+        full_sync = token == '*' or not token.isdigit() or int(token) > self.version
+        since = 0 if full_sync else int(token)
+        items = [
+            {k: v for k, v in task.items() if k != 'version'}
+            for task in self.tasks.values()
+            if task['version'] > since and (not full_sync or not task['checked'])
+        ]
+        return 200, {'sync_token': str(self.version), 'full_sync': full_sync, 'items': items}
+
+
+class TriliumService(FakeService):
+    """Trilium ETAPI note search, including ``note.dateModified > '...'`` filters"""
+
+    name = 'trilium'
+    TIME_FORMAT = '%Y-%m-%d %H:%M:%S.000+0000'
+
+    def __init__(self, behaviour: Behaviour):
+        super().__init__(behaviour)
+        self.notes: List[Dict[str, Any]] = []
+        start = datetime.now(timezone.utc) - timedelta(days=30)
+        for index in range(behaviour.items):
+            self._add_note(start + timedelta(hours=index * 6))
+        self.route('GET', r'/etapi/notes', self.search)
+
+    def _add_note(self, modified: datetime) -> None:
+        self.notes.append({
+            'noteId': f"fake{len(self.notes):06d}",
+            'title': self.text(words=5),
+            'type': self.random.choice(['text', 'text', 'code', 'book']),
+            'mime': 'text/html',
+            'content': self.text(),
+            'dateModified': modified.strftime(self.TIME_FORMAT)
+        })
+
+    def search(self, request: Request) -> Response:
+        if not request.headers.get('Authorization'):
+            return _UNAUTHORIZED
+        if self.maybe_churn():
+            note = self.random.choice(self.notes)
+            note['dateModified'] = datetime.now(timezone.utc).strftime(self.TIME_FORMAT)
+
+        notes = self.notes
+        search = unquote(request.query.get('search', '*'))
+        if search.startswith('note.dateModified >'):
+            watermark = search.split('>', 1)[1].strip().strip("'\"")
+            notes = [n for n in notes if n['dateModified'] > watermark]
+
+        descending = request.query.get('orderDirection', 'asc') == 'desc'
+        order_by = request.query.get('orderBy', 'dateModified')
+        notes = sorted(notes, key=lambda n: n.get(order_by, ''), reverse=descending)
+        limit = int(request.query.get('limit', 100))
+        return 200, {'results': notes[:limit]}
+
+
+class LinkwardenService(FakeService):
+    """Linkwarden ``/api/v1/links`` with cursor pagination"""
+
+    name = 'linkwarden'
+
+    def __init__(self, behaviour: Behaviour):
+        super().__init__(behaviour)
+        self.links: List[Dict[str, Any]] = []
+        for _ in range(behaviour.items):
+            self._add_link()
+        self.route('GET', r'/api/v1/links', self.links_page)
+
+    def _add_link(self) -> None:
+        link_id = len(self.links) + 1
+        self.links.append({
+            'id': link_id,
+            'name': self.text(words=5),
+            'url': f"https://example.com/articles/{link_id}",
+            'description': self.text(),
+            'collection': {'id': 1, 'name': self.random.choice(['Reading', 'Research', 'Tools'])},
+            'createdAt': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+        })
+
+    def links_page(self, request: Request) -> Response:
+        if not request.headers.get('Authorization', '').startswith('Bearer '):
+            return _UNAUTHORIZED
+        if self.maybe_churn():
+            self._add_link()
+
+        links = sorted(self.links, key=lambda link: link['id'], reverse=request.query.get('sort', '0') == '0')
+        cursor = request.query.get('cursor')
+        if cursor:
+            position = next((i for i, link in enumerate(links) if str(link['id']) == cursor), len(links))
+            links = links[position + 1:]
+        take = int(request.query.get('take', 50))
+        return 200, {'response': links[:take]}
+
+
+class PiholeService(FakeService):
+    """Pi-hole v6 REST API (sessions) and the v5 ``admin/api.php`` endpoint"""
+
+    name = 'pihole'
+    SESSION_VALIDITY = 300
+
+    def __init__(self, behaviour: Behaviour):
+        super().__init__(behaviour)
+        self.sessions: Dict[str, float] = {}
+        self.queries = 10000 * max(behaviour.items, 1)
+        self.route('POST', r'/api/auth', self.auth)
+        self.route('GET', r'/api/stats/summary', self.summary)
+        self.route('GET', r'/api/dns/blocking', self.blocking)
+        self.route('GET', r'/admin/api\.php', self.legacy_api)
+
+    def _counts(self) -> Dict[str, Any]:
+        self.queries += self.random.randint(0, 50)
+        blocked = self.queries * 23 // 100
+        return {'total': self.queries, 'blocked': blocked,
+                'percent_blocked': round(blocked * 100 / self.queries, 2)}
+
+    def _session_valid(self, request: Request) -> bool:
+        sid = request.query.get('sid') or request.headers.get('X-FTL-SID', '')
+        return self.sessions.get(sid, 0) > time.time()
+
+    def auth(self, request: Request) -> Response:
+        sid = hashlib.sha256(f"{time.time()}:{len(self.sessions)}".encode('utf-8')).hexdigest()[:24]
+        self.sessions[sid] = time.time() + self.SESSION_VALIDITY
+        return 200, {'session': {'valid': True, 'totp': False, 'sid': sid,
+                                 'validity': self.SESSION_VALIDITY}}
+
+    def summary(self, request: Request) -> Response:
+        if not self._session_valid(request):
+            return _UNAUTHORIZED
+        return 200, {'queries': self._counts(), 'clients': {'active': 12, 'total': 20}}
+
+    def blocking(self, request: Request) -> Response:
+        if not self._session_valid(request):
+            return _UNAUTHORIZED
+        return 200, {'blocking': 'enabled', 'timer': None}
+
+    def legacy_api(self, request: Request) -> Response:
+        counts = self._counts()
+        return 200, {'dns_queries_today': counts['total'], 'ads_blocked_today': counts['blocked'],
+                     'ads_percentage_today': counts['percent_blocked'], 'status': 'enabled'}
+
+
+class ObsidianService(FakeService):
+    """Obsidian Local REST API vault listing and note contents"""
+
+    name = 'obsidian'
+
+    def __init__(self, behaviour: Behaviour):
+        super().__init__(behaviour)
+        folders = ['', 'Projects/', 'Daily/', 'Reference/']
+        self.files = {
+            f"{self.random.choice(folders)}{self.text(words=3)}.md": self.text()
+            for _ in range(behaviour.items)
+        }
+        self.route('GET', r'/vault/', self.listing)
+        self.route('GET', r'/vault/(?P<path>.+)', self.note)
+
+    def listing(self, request: Request) -> Response:
+        if not request.headers.get('Authorization', '').startswith('Bearer '):
+            return _UNAUTHORIZED
+        return 200, {'files': sorted(self.files)}
+
+    def note(self, request: Request) -> Response:
+        if not request.headers.get('Authorization', '').startswith('Bearer '):
+            return _UNAUTHORIZED
+        path = unquote(request.params['path'])
+        if path not in self.files:
+            return 404, {'errorCode': 40400, 'message': 'File not found'}
+        return 200, f"# {path[:-3].split('/')[-1]}\n\n{self.files[path]}\n", {'Content-Type': 'text/markdown'}
+
+
+class RSSService(FakeService):
+    """RSS 2.0 feeds at ``/rss/<name>.xml`` with ETag/Last-Modified validators"""
+
+    name = 'rss'
+
+    def __init__(self, behaviour: Behaviour):
+        super().__init__(behaviour)
+        self.feeds: Dict[str, Dict[str, Any]] = {}
+        self.route('GET', r'/rss/(?P<feed>[\w-]+)\.xml', self.feed)
+
+    def _feed(self, name: str) -> Dict[str, Any]:
+        if name not in self.feeds:
+            self.feeds[name] = {'items': [], 'modified': time.time()}
+            for _ in range(self.behaviour.items):
+                self._add_item(name)
+        return self.feeds[name]
+
+    def _add_item(self, name: str) -> None:
+        feed = self.feeds[name]
+        index = len(feed['items']) + 1
+        feed['items'].append({
+            'title': self.text(words=7),
+            'link': f"https://example.com/{name}/{index}",
+            'guid': f"{name}-{index}",
+            'description': self.text(),
+            'published': time.time() - (self.behaviour.items - index) * 3600
+        })
+        feed['modified'] = time.time()
+
+    def feed(self, request: Request) -> Response:
+        name = request.params['feed']
+        feed = self._feed(name)
+        if self.maybe_churn():
+            self._add_item(name)
+
+        etag = f'"{name}-{len(feed["items"])}"'
+        headers = {'ETag': etag, 'Last-Modified': formatdate(feed['modified'], usegmt=True),
+                   'Content-Type': 'application/rss+xml; charset=utf-8'}
+        if request.headers.get('If-None-Match') == etag:
+            return 304, b'', headers
+
+        items = ''.join(
+            f"<item><title>{item['title']}</title><link>{item['link']}</link>"
+            f"<guid>{item['guid']}</guid><description>{item['description']}</description>"
+            f"<pubDate>{formatdate(item['published'], usegmt=True)}</pubDate></item>"
+            for item in reversed(feed['items'])
+        )
+        body = (f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+                f"<title>Fake {name.title()} Feed</title><link>https://example.com/{name}</link>"
+                f"<description>Slate fake upstream</description>{items}</channel></rss>")
+        return 200, body, headers
+
+
+# Registry in port order: ``--base-port`` N serves the first service on N,
+# the second on N + 1, and so on
+SERVICES = {
+    'openweathermap': OpenWeatherMapService,
+    'todoist': TodoistService,
+    'trilium': TriliumService,
+    'linkwarden': LinkwardenService,
+    'pihole': PiholeService,
+    'obsidian': ObsidianService,
+    'rss': RSSService,
+}
@@ -6,7 +6,6 @@ Renders the Slate dashboard with widgets and themes
 
 import os
 import sys
-import yaml
 import json
 import shutil
 from pathlib import Path
@@ -15,24 +14,27 @@ import subprocess
 
 # Required dependencies - install with: pip install -r requirements.txt
 from jinja2 import Template
-import requests
 
 # Slate logging system
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from utils.logging_config import get_logger, setup_logging
+from utils import http_client, minify, releases, rss_engine, service_worker, staging
+from utils.critical_css import extract_critical_css
+from utils.yaml_loader import load_yaml
 
 from theme_renderer import (
-    get_available_themes, load_theme as load_theme_from_renderer, build_all_themes, 
-    get_theme_info, build_theme_css
+    get_available_themes, build_all_themes, 
+    build_scoped_themes, get_theme_info, build_theme_css
 )
 from widget_renderer import (
     load_config, load_widgets_config, load_dashboard_config, load_widget_definition,
     generate_grid_css, generate_group_flow_css, process_template,
     convert_widgets_to_components, render_group_item, render_link_item,
-    render_motd_item, render_obsidian_item, render_todoist_item, render_trilium_item,
-    execute_data_processing, apply_schema_defaults, copy_assets,
+    render_motd_item, render_obsidian_item, render_todoist_item, render_trilium_item, collect_widget_types,
+    collect_widget_configs, execute_data_processing, apply_schema_defaults, copy_assets,
     generate_css_bundle, load_theme, generate_theme_css
 )
+from data_fetcher import fetch_widget_data
 
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 TEMPLATE_DIR = PROJECT_ROOT / "src" / "template"
@@ -40,15 +42,11 @@ THEMES_DIR = PROJECT_ROOT / "src" / "themes"
 WIDGETS_DIR = PROJECT_ROOT / "src" / "widgets"
 CONFIG_DIR = PROJECT_ROOT / "config"
 DIST_DIR = PROJECT_ROOT / "dist"
+RELEASES_DIR = PROJECT_ROOT / "releases"
 
 # Initialize logger
 logger = get_logger(__name__)
 
-def load_yaml(file_path):
-    """Load a YAML file"""
-    with open(file_path, 'r') as f:
-        return yaml.safe_load(f)
-
 def load_widget_template(template_name):
     """Load and cache widget templates"""
     template_file = WIDGETS_DIR / f"{template_name}.yaml"
@@ -279,8 +277,12 @@ def render_group_items(items):
                 # Execute data processing function if present (same logic as standalone widgets)
                 if 'dataProcessing' in merged_widget and 'generateData' in merged_widget['dataProcessing']:
                     try:
-                        data_function = merged_widget['dataProcessing']['generateData']
-                        processed_data = execute_data_processing(data_function, item_config)
+                        data_processing = merged_widget['dataProcessing']
+                        processed_data = execute_data_processing(
+                            data_processing['generateData'], item_config,
+                            timeout=data_processing.get('timeout'),
+                            memory_mb=data_processing.get('memoryMB')
+                        )
                         if processed_data:
                             if widget_data:
                                 # Merge dataFetcher and dataProcessing results
@@ -326,86 +328,6 @@ def render_group_items(items):
     
     return content
 
-def fetch_widget_data(widget_definition, config):
-    """Generic data fetcher for widgets with dataFetcher configuration"""
-    if 'dataFetcher' not in widget_definition:
-        return None
-    
-    fetcher_config = widget_definition['dataFetcher']
-    
-    if fetcher_config.get('type') != 'api':
-        print(f"   ⚠️  Unsupported data fetcher type: {fetcher_config.get('type')}")
-        return None
-    
-    try:
-        # Build URL from template
-        url_template = fetcher_config.get('urlTemplate', '')
-        url = url_template.format(**config)
-        
-        # Build headers
-        headers = {}
-        if 'headers' in fetcher_config:
-            for key, value in fetcher_config['headers'].items():
-                headers[key] = value.format(**config)
-        
-        # Build request body if specified
-        json_data = None
-        if 'body' in fetcher_config:
-            json_data = {}
-            for key, value in fetcher_config['body'].items():
-                if isinstance(value, str):
-                    json_data[key] = value.format(**config)
-                else:
-                    json_data[key] = value
-
-        # Make API request
-        method = fetcher_config.get('method', 'GET').upper()
-        response = requests.request(method, url, headers=headers, json=json_data, timeout=30)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        # Apply response mapping
-        if 'responseMapping' in fetcher_config:
-            mapping = fetcher_config['responseMapping']
-            items_path = mapping.get('items', '')
-            
-            # Extract items from response
-            items = data
-            if items_path:
-                for path_part in items_path.split('.'):
-                    if path_part and path_part in items:
-                        items = items[path_part]
-            
-            # Map fields if specified
-            if 'fields' in mapping and isinstance(items, list):
-                field_mapping = mapping['fields']
-                mapped_items = []
-                
-                for item in items:
-                    mapped_item = {}
-                    for new_key, old_path in field_mapping.items():
-                        # Handle nested paths like "collection.name"
-                        value = item
-                        for path_part in old_path.split('.'):
-                            if isinstance(value, dict) and path_part in value:
-                                value = value[path_part]
-                            else:
-                                value = None
-                                break
-                        mapped_item[new_key] = value
-                    mapped_items.append(mapped_item)
-                
-                return mapped_items
-            
-            return items
-        
-        return data
-        
-    except Exception as e:
-        print(f"   ⚠️  Data fetch failed: {e}")
-        return None
-
 def copy_template_to_dist():
     """Copy the template directory to dist"""
     print("📁 Copying template to dist...")
@@ -413,24 +335,9 @@ def copy_template_to_dist():
     # Create dist directory if it doesn't exist
     DIST_DIR.mkdir(exist_ok=True)
     
-    # Copy template files to dist (update in place)
-    for item in TEMPLATE_DIR.iterdir():
-        if item.is_file():
-            shutil.copy2(item, DIST_DIR / item.name)
-        elif item.is_dir():
-            dest_dir = DIST_DIR / item.name
-            if dest_dir.exists():
-                shutil.rmtree(dest_dir)
-            shutil.copytree(item, dest_dir)
-    
+    # Copy template files to dist (update in place; identical files are skipped)
+    staging.stage_tree(TEMPLATE_DIR, DIST_DIR)
     print(f"   ✓ Template copied to {DIST_DIR}")
-    
-    # Also copy preview.html for theme previewing
-    preview_src = TEMPLATE_DIR / "preview.html"
-    if preview_src.exists():
-        preview_dst = DIST_DIR / "preview.html"
-        shutil.copy2(preview_src, preview_dst)
-        print(f"   ✓ Theme preview copied to {preview_dst}")
 
 
 def copy_theme_js_files():
@@ -443,14 +350,13 @@ def copy_theme_js_files():
     
     # Check each theme for effects-js property
     for theme_name in get_available_themes(THEMES_DIR):
-        theme_config = load_theme_from_renderer(theme_name, THEMES_DIR)
-        if theme_config and 'effects-js' in theme_config:
-            js_filename = theme_config['effects-js']
+        js_filename = get_theme_info(theme_name, THEMES_DIR).get('effects_js')
+        if js_filename:
             src_js_file = THEMES_DIR / js_filename
             
             if src_js_file.exists():
                 dest_js_file = js_dir / js_filename
-                shutil.copy2(src_js_file, dest_js_file)
+                staging.stage_file(src_js_file, dest_js_file)
                 print(f"   ✓ Theme JS copied: {js_filename}")
             else:
                 print(f"   ⚠️  Theme JS not found: {src_js_file}")
@@ -485,8 +391,7 @@ def update_theme_switcher_js():
     )
     
     # Write the updated content to dist
-    with open(theme_switcher_dest, 'w') as f:
-        f.write(js_content)
+    staging.replace_file(theme_switcher_dest, js_content)
     
     print(f"   ✓ Theme switcher generated with {len(available_themes)} themes: {', '.join(available_themes)}")
 
@@ -599,8 +504,12 @@ def render_widgets(dashboard_config):
                     # Execute data processing function if present
                     if 'dataProcessing' in widget_definition and 'generateData' in widget_definition['dataProcessing']:
                         try:
-                            data_function = widget_definition['dataProcessing']['generateData']
-                            processed_data = execute_data_processing(data_function, template_context)
+                            data_processing = widget_definition['dataProcessing']
+                            processed_data = execute_data_processing(
+                                data_processing['generateData'], template_context,
+                                timeout=data_processing.get('timeout'),
+                                memory_mb=data_processing.get('memoryMB')
+                            )
                             template_context.update(processed_data)
                             print(f"   ✓ Executed data processing for {widget_type}")
                         except Exception as e:
@@ -960,7 +869,7 @@ def run_validation_suite():
     
     logger.info("All validations passed! Proceeding with build", emoji="✅")
 
-def render_dashboard(theme_name=None, skip_validation=False, atomic=True):
+def render_dashboard(theme_name=None, skip_validation=False, atomic=True, minify_output=None):
     """Render the complete dashboard with atomic builds to prevent template variable exposure"""
     
     # Step 0: Run validation suite first (unless skipped)
@@ -969,6 +878,9 @@ def render_dashboard(theme_name=None, skip_validation=False, atomic=True):
     else:
         logger.warning("Skipping validation suite (--skip-validation flag used)", emoji="⚠️")
     
+    # Identical upstream requests are coalesced per build
+    http_client.reset()
+    
     # Step 4: Load dashboard configuration first to get theme
     dashboard_config = load_dashboard_config_local()
     
@@ -980,53 +892,54 @@ def render_dashboard(theme_name=None, skip_validation=False, atomic=True):
     logger.info(f"Rendering dashboard with {theme_name} theme", 
                theme=theme_name, emoji="🚀")
     
+    if minify_output is None:
+        minify_output = os.environ.get('SLATE_MINIFY', '').lower() in ('1', 'true', 'yes')
+    
     if atomic:
         # Atomic build: build everything in temp directory, then swap atomically
-        render_dashboard_atomic(theme_name, dashboard_config)
+        render_dashboard_atomic(theme_name, dashboard_config, minify_output)
     else:
         # Legacy build: direct to dist (may show template variables during build)
         render_dashboard_legacy(theme_name, dashboard_config)
+    
+    staging.flush_digests()
+    http_client.http.log_stats()
+    
+    # Forget feeds no rss widget uses anymore
+    rss_engine.prune_feeds(
+        feed.get('url') for config in collect_widget_configs(dashboard_config, 'rss')
+        for feed in config.get('feeds') or []
+    )
 
-def render_dashboard_atomic(theme_name, dashboard_config):
+def render_dashboard_atomic(theme_name, dashboard_config, minify_output=False):
     """Atomic build implementation - prevents template variable exposure"""
-    import tempfile
-    
-    # Create temporary build directory
-    with tempfile.TemporaryDirectory(prefix='slate-build-') as temp_build_dir:
-        temp_dist = Path(temp_build_dir) / "dist"
-        temp_dist.mkdir(exist_ok=True)
-        
-        logger.info("Building in temporary directory (atomic mode)", 
-                   build_dir=str(temp_dist), emoji="🔨")
+    # Build into a staging directory under releases/ (not exposed to web server)
+    build_dir = releases.begin_release(RELEASES_DIR)
+    try:
+        logger.info("Building release (atomic mode)", 
+                   build_dir=str(build_dir), emoji="🔨")
         
-        # Step 1: Copy template to TEMP directory (not exposed to web server)
-        copy_template_to_dir(temp_dist)
+        # Step 1: Copy template to the staging directory
+        copy_template_to_dir(build_dir)
         
         # Generate build timestamp for cache busting
         import time
         build_timestamp = int(time.time() * 1000)  # Milliseconds for more precision
         
-        # Step 2: Build all themes in temp directory
-        built_themes = build_all_themes(THEMES_DIR, temp_dist)
-        
-        # Step 2a: Copy theme JS files to temp directory
-        copy_theme_js_files_to_dir(temp_dist)
+        # Step 2: Shared CSS plus every theme's variables scoped by data-theme,
+        # so switching themes needs no download (the standalone theme-<name>.css
+        # files are only built for legacy builds)
+        widget_types = widget_types_to_ship(dashboard_config)
+        theme_bundle = build_scoped_themes(THEMES_DIR, build_dir, widget_types)
         
-        # Set the current theme CSS link
-        theme_css = f'<link rel="stylesheet" href="css/theme-{theme_name}.css?v={build_timestamp}">'
+        # Step 2b: Copy theme JS files to the staging directory
+        copy_theme_js_files_to_dir(build_dir)
         
-        # Include ALL theme JavaScript files (for theme switching)
-        theme_js = ""
-        all_themes = get_available_themes(THEMES_DIR)
-        theme_js_files = []
+        # Set the current theme CSS links
+        theme_css = generate_theme_css_links(theme_name, build_timestamp, theme_bundle)
         
-        for theme in all_themes:
-            theme_config = load_theme_from_renderer(theme, THEMES_DIR)
-            if theme_config and 'effects-js' in theme_config:
-                js_filename = theme_config['effects-js']
-                theme_js_files.append(f'<script src="js/{js_filename}?v={build_timestamp}"></script>')
-        
-        theme_js = '\n    '.join(theme_js_files)
+        # Theme manifest plus the active theme's effects JS (the rest is prefetched when idle)
+        theme_js = generate_theme_js(theme_name, build_timestamp, theme_bundle)
         
         # Step 3: Build effects CSS
         effects_css = build_effects_css().replace('css/base-effects.css">', f'css/base-effects.css?v={build_timestamp}">')
@@ -1037,19 +950,98 @@ def render_dashboard_atomic(theme_name, dashboard_config):
         # Step 6: Render widgets
         widgets_content, widgets_css, widgets_js, widget_includes = render_widgets_and_groups(dashboard_config, build_timestamp)
         
-        # Step 7: Render final HTML in temp directory
-        render_final_html_in_dir(temp_dist, theme_name, dashboard_config, theme_css, theme_js, 
+        # Step 7: Render final HTML in the staging directory
+        use_service_worker = os.environ.get('SLATE_SERVICE_WORKER', '1').lower() not in ('0', 'false', 'no')
+        render_final_html_in_dir(build_dir, theme_name, dashboard_config, theme_css, theme_js, 
                                  effects_css, grid_css, widgets_content, widgets_css, widgets_js, 
-                                 widget_includes, build_timestamp, built_themes)
+                                 widget_includes, build_timestamp, None, theme_bundle,
+                                 use_service_worker)
         
-        # Step 8: Atomic swap - replace entire dist directory
-        logger.info("Atomically swapping build directories", 
-                   source=str(temp_dist), target=str(DIST_DIR), emoji="🔄")
-        atomic_swap_dist_directory(DIST_DIR, temp_dist)
+        # Step 7a: Minify HTML, CSS and JS (optional)
+        if minify_output:
+            minify_build_dir(build_dir)
         
-        logger.info("Dashboard rendered successfully!", 
-                   output=str(DIST_DIR / 'index.html'), emoji="✅")
-        logger.info("Serve with: python3 serve.py", emoji="🌐")
+        # Step 7b: Service worker precaching the finished build (last: it pins content hashes)
+        write_service_worker_to_dir(build_dir, use_service_worker)
+    except BaseException:
+        releases.abort_release(build_dir)
+        raise
+    
+    # Step 8: Publish - flip the dist symlink to the new release
+    release_dir = releases.finish_release(build_dir)
+    logger.info("Publishing release", 
+               release=release_dir.name, target=str(DIST_DIR), emoji="🔄")
+    if not releases.publish_release(release_dir, DIST_DIR):
+        # No symlink support: move the release into place instead
+        atomic_swap_dist_directory(DIST_DIR, release_dir)
+    
+    logger.info("Dashboard rendered successfully!", 
+               output=str(DIST_DIR / 'index.html'), emoji="✅")
+    logger.info("Serve with: python3 serve.py", emoji="🌐")
+
+def widget_types_to_ship(dashboard_config):
+    """Widget types whose CSS goes into the build, or None to ship every widget's CSS
+    
+    Pruning is on unless ``dashboard.pruneUnusedWidgets`` is false or
+    SLATE_PRUNE_WIDGETS=0 (for clients that add widgets at runtime).
+    """
+    prune = os.environ.get('SLATE_PRUNE_WIDGETS')
+    if prune is None:
+        prune = dashboard_config.get('dashboard', {}).get('pruneUnusedWidgets', True)
+    if str(prune).lower() in ('0', 'false', 'no'):
+        print("🧩 Including CSS of all widget types (pruning disabled)")
+        return None
+    
+    widget_types = collect_widget_types(dashboard_config)
+    print(f"🧩 Including CSS of {len(widget_types)} used widget types: {', '.join(sorted(widget_types))}")
+    return widget_types
+
+def build_theme_manifest(build_timestamp, theme_bundle=None):
+    """Display name, custom CSS and effects JS of every theme, so the client never probes"""
+    custom_themes = theme_bundle['custom'] if theme_bundle else {}
+    manifest = {}
+    for theme in get_available_themes(THEMES_DIR):
+        theme_info = get_theme_info(theme, THEMES_DIR)
+        js_filename = theme_info.get('effects_js')
+        manifest[theme] = {
+            'name': theme_info.get('name') or theme.replace('-', ' ').title(),
+            'customCss': f"css/custom-{theme}.css?v={build_timestamp}" if theme in custom_themes else None,
+            'effectsJs': f"js/{js_filename}?v={build_timestamp}" if js_filename else None,
+        }
+    return manifest
+
+def theme_stylesheet_links(theme_name, build_timestamp, theme_bundle=None):
+    """(href, extra attributes) of the stylesheets a page in the given theme links"""
+    if theme_bundle is None:
+        return [(f"css/theme-{theme_name}.css?v={build_timestamp}", "")]
+    
+    links = [(f"css/dashboard.css?v={build_timestamp}", ""), (f"css/themes.css?v={build_timestamp}", "")]
+    if theme_name in theme_bundle['custom']:
+        links.append((f"css/custom-{theme_name}.css?v={build_timestamp}", f' data-theme-css="{theme_name}"'))
+    return links
+
+def generate_theme_css_links(theme_name, build_timestamp, theme_bundle=None):
+    """Stylesheet links for the <head>"""
+    return '\n    '.join(
+        f'<link rel="stylesheet" href="{href}"{attributes}>'
+        for href, attributes in theme_stylesheet_links(theme_name, build_timestamp, theme_bundle)
+    )
+
+def generate_effect_manager_js(build_timestamp):
+    """Script tag for the effect manager, whose animation loop theme effects register with"""
+    # base-effects.css is part of the theme stylesheets, so the manager must not link it again
+    return f'<script src="js/effect-manager.js?v={build_timestamp}" data-effects-css="bundled"></script>'
+
+def generate_theme_js(theme_name, build_timestamp, theme_bundle=None):
+    """Inline theme manifest and a script tag for the active theme's effects only"""
+    manifest = build_theme_manifest(build_timestamp, theme_bundle)
+    manifest_json = json.dumps(manifest).replace('</', '<\\/')
+    theme_js_tags = [f'<script>window.SlateThemeManifest = {manifest_json};</script>']
+    
+    effects_js = manifest.get(theme_name, {}).get('effectsJs')
+    if effects_js:
+        theme_js_tags.append(f'<script src="{effects_js}" data-theme-js="{theme_name}"></script>')
+    return '\n    '.join(theme_js_tags)
 
 def render_dashboard_legacy(theme_name, dashboard_config):
     """Legacy build implementation - may show template variables during build"""
@@ -1063,7 +1055,7 @@ def render_dashboard_legacy(theme_name, dashboard_config):
     build_timestamp = int(time.time() * 1000)  # Milliseconds for more precision
     
     # Step 2: Build theme CSS for all themes
-    built_themes = build_all_themes(THEMES_DIR, DIST_DIR)
+    built_themes = build_all_themes(THEMES_DIR, DIST_DIR, widget_types_to_ship(dashboard_config))
     
     # Step 2a: Copy theme JS files to dist/js if they have effects-js property
     copy_theme_js_files()
@@ -1071,18 +1063,8 @@ def render_dashboard_legacy(theme_name, dashboard_config):
     # Set the current theme CSS link
     theme_css = f'<link rel="stylesheet" href="css/theme-{theme_name}.css?v={build_timestamp}">'
     
-    # Include ALL theme JavaScript files (for theme switching)
-    theme_js = ""
-    all_themes = get_available_themes(THEMES_DIR)
-    theme_js_files = []
-    
-    for theme in all_themes:
-        theme_config = load_theme_from_renderer(theme, THEMES_DIR)
-        if theme_config and 'effects-js' in theme_config:
-            js_filename = theme_config['effects-js']
-            theme_js_files.append(f'<script src="js/{js_filename}?v={build_timestamp}"></script>')
-    
-    theme_js = '\n    '.join(theme_js_files)
+    # Theme manifest plus the active theme's effects JS (the rest is prefetched when idle)
+    theme_js = generate_theme_js(theme_name, build_timestamp)
     
     # Step 3: Build effects CSS
     effects_css = build_effects_css().replace('css/base-effects.css">', f'css/base-effects.css?v={build_timestamp}">')
@@ -1144,10 +1126,11 @@ def render_dashboard_legacy(theme_name, dashboard_config):
         widgets_content=widgets_content,
         footer_message=footer_message,
         theme_options=theme_options_html,
-        effect_manager_js="",
+        effect_manager_js=generate_effect_manager_js(build_timestamp),
         theme_js=theme_js,
         widget_css="",  # No global widget CSS - all inline now
         widget_js="",   # No global widget JS - all inline now
+        service_worker_js="",
         build_timestamp=build_timestamp
     )
     
@@ -1163,6 +1146,9 @@ def render_dashboard_legacy(theme_name, dashboard_config):
     # Atomic move to final location
     temp_path.replace(final_index_file)
     
+    # Legacy builds don't precache: retire any worker an atomic build installed
+    write_service_worker_to_dir(DIST_DIR, enabled=False)
+    
     logger.info("Dashboard rendered successfully!", 
                output=str(final_index_file), emoji="✅")
     logger.info("Serve with: python3 serve.py", emoji="🌐")
@@ -1173,6 +1159,13 @@ def copy_template_to_dist():
     """Copy template to dist directory (legacy build helper)"""
     copy_template_to_dir(DIST_DIR)
 
+def previous_release_dir():
+    """The build currently served from dist, to hardlink unchanged assets from"""
+    current = releases.current_release(DIST_DIR)
+    if current is not None:
+        return current
+    return DIST_DIR if DIST_DIR.is_dir() else None
+
 def copy_template_to_dir(target_dir):
     """Copy template to specified directory (atomic build helper)"""
     print(f"📁 Copying template to {target_dir}...")
@@ -1181,15 +1174,10 @@ def copy_template_to_dir(target_dir):
     for subdir in ['css', 'js', 'images']:
         (target_dir / subdir).mkdir(exist_ok=True)
     
-    # Copy template files
-    shutil.copytree(TEMPLATE_DIR, target_dir, dirs_exist_ok=True)
-    print(f"   ✓ Template copied to {target_dir}")
-    
-    # Copy theme preview
-    preview_template = TEMPLATE_DIR / "preview.html"
-    if preview_template.exists():
-        shutil.copy2(preview_template, target_dir / "preview.html")
-        print(f"   ✓ Theme preview copied to {target_dir}/preview.html")
+    # Stage template files: unchanged ones are hardlinked from the previous release
+    outcomes = staging.stage_tree(TEMPLATE_DIR, target_dir, previous_release_dir())
+    print(f"   ✓ Template staged to {target_dir} "
+          f"({outcomes['linked']} linked, {outcomes['copied']} copied)")
 
 def generate_theme_switcher_js_content(themes):
     """Generate theme switcher JavaScript content"""
@@ -1200,6 +1188,11 @@ def generate_theme_switcher_js_content(themes):
 
 const availableThemes = [{themes_array}];
 
+// Custom CSS and effects JS per theme, inlined in the page by the build (window.SlateThemeManifest)
+function getThemeManifest() {{
+    return window.SlateThemeManifest || {{}};
+}}
+
 // Theme switching functionality
 document.addEventListener('DOMContentLoaded', function() {{
     const themeSelector = document.getElementById('footer-theme-selector');
@@ -1213,15 +1206,13 @@ document.addEventListener('DOMContentLoaded', function() {{
 
 function switchTheme(themeName) {{
     // Update body class
-    document.body.className = document.body.className.replace(/theme-\\w+/g, '');
+    document.body.className = document.body.className.replace(/theme-[\\w-]+/g, '');
     document.body.classList.add('theme-' + themeName);
     
-    // Update theme CSS link
-    const themeLink = document.querySelector('link[href*="theme-"]');
-    if (themeLink) {{
-        const timestamp = new Date().getTime();
-        themeLink.href = `css/theme-${{themeName}}.css?v=${{timestamp}}`;
-    }}
+    // The variables of every theme are already loaded, scoped by data-theme:
+    // switching is an attribute flip plus the theme's custom CSS, if any
+    document.documentElement.setAttribute('data-theme', themeName);
+    loadThemeCustomCss(themeName);
     
     // Handle theme-specific JavaScript effects
     handleThemeEffects(themeName);
@@ -1236,6 +1227,60 @@ function switchTheme(themeName) {{
     }}
 }}
 
+// Key of the global object a theme's effects JS defines, e.g. TokyoNightTheme
+function themeEffectsKey(themeName) {{
+    return themeName.split('-').map(word => 
+        word.charAt(0).toUpperCase() + word.slice(1)
+    ).join('') + 'Theme';
+}}
+
+// Load a theme's scoped custom CSS the first time the theme is shown
+function loadThemeCustomCss(themeName) {{
+    const customCss = (getThemeManifest()[themeName] || {{}}).customCss;
+    if (!customCss || document.querySelector(`link[data-theme-css="${{themeName}}"]`)) return;
+    const link = document.createElement('link');
+    link.rel = 'stylesheet';
+    link.href = customCss;
+    link.setAttribute('data-theme-css', themeName);
+    document.head.appendChild(link);
+}}
+
+// Load a theme's effects JS once, as listed in the manifest (no probing).
+// Effects scripts apply themselves on load while <html data-theme> names their theme.
+function loadThemeEffects(themeName) {{
+    const effectsJs = (getThemeManifest()[themeName] || {{}}).effectsJs;
+    if (!effectsJs || document.querySelector(`script[data-theme-js="${{themeName}}"]`)) return;
+    const script = document.createElement('script');
+    script.src = effectsJs;
+    script.setAttribute('data-theme-js', themeName);
+    script.onerror = () => console.warn(`Failed to load theme effects: ${{effectsJs}}`);
+    document.body.appendChild(script);
+}}
+
+// Warm the HTTP cache with the other themes' custom CSS and effects JS once the page is idle
+function prefetchThemeAssets() {{
+    const manifest = getThemeManifest();
+    Object.keys(manifest).forEach(themeName => {{
+        const assets = [
+            [manifest[themeName].customCss, 'style', `link[data-theme-css="${{themeName}}"]`],
+            [manifest[themeName].effectsJs, 'script', `script[data-theme-js="${{themeName}}"]`]
+        ];
+        assets.forEach(([href, type, loaded]) => {{
+            if (!href || document.querySelector(loaded)) return;
+            const link = document.createElement('link');
+            link.rel = 'prefetch';
+            link.as = type;
+            link.href = href;
+            document.head.appendChild(link);
+        }});
+    }});
+}}
+
+window.addEventListener('load', function() {{
+    const whenIdle = window.requestIdleCallback || (callback => setTimeout(callback, 2000));
+    whenIdle(prefetchThemeAssets);
+}});
+
 // Handle theme-specific effects when switching themes
 function handleThemeEffects(themeName) {{
     // Remove ALL existing theme effects - search for all theme objects
@@ -1250,17 +1295,16 @@ function handleThemeEffects(themeName) {{
         }}
     }});
     
-    // Apply new theme effects based on theme name
-    const themeKey = themeName.split('-').map(word => 
-        word.charAt(0).toUpperCase() + word.slice(1)
-    ).join('') + 'Theme';
-    
-    if (window[themeKey] && typeof window[themeKey].apply === 'function') {{
+    // Apply new theme effects; a script loaded now applies them itself
+    const effects = window[themeEffectsKey(themeName)];
+    if (effects && typeof effects.apply === 'function') {{
         try {{
-            window[themeKey].apply();
+            effects.apply();
         }} catch (e) {{
-            console.warn(`Failed to apply effects for ${{themeKey}}:`, e);
+            console.warn(`Failed to apply effects for ${{themeEffectsKey(themeName)}}:`, e);
         }}
+    }} else {{
+        loadThemeEffects(themeName);
     }}
 }}
 
@@ -1286,22 +1330,22 @@ def copy_theme_js_files_to_dir(target_dir):
     
     theme_js_files = []
     themes = get_available_themes(THEMES_DIR)
+    previous_dir = previous_release_dir()
     
     for theme_name in themes:
-        theme_config = load_theme_from_renderer(theme_name, THEMES_DIR)
-        if theme_config and 'effects-js' in theme_config:
-            js_filename = theme_config['effects-js']
+        js_filename = get_theme_info(theme_name, THEMES_DIR).get('effects_js')
+        if js_filename:
             source_path = THEMES_DIR / js_filename
             if source_path.exists():
                 target_path = js_dir / js_filename
-                shutil.copy2(source_path, target_path)
+                previous_path = previous_dir / "js" / js_filename if previous_dir else None
+                outcome = staging.stage_file(source_path, target_path, previous_path)
                 theme_js_files.append(js_filename)
-                print(f"   ✓ Theme JS copied: {js_filename}")
+                print(f"   ✓ Theme JS {outcome}: {js_filename}")
     
     # Generate theme switcher
     switcher_js = generate_theme_switcher_js_content(themes)
-    with open(js_dir / "theme-switcher.js", 'w') as f:
-        f.write(switcher_js)
+    staging.replace_file(js_dir / "theme-switcher.js", switcher_js)
     print(f"   ✓ Theme switcher generated with {len(themes)} themes: {', '.join(themes)}")
     print("   ✓ Theme JS files processed")
 
@@ -1310,9 +1354,23 @@ def render_widgets_and_groups(dashboard_config, build_timestamp):
     widgets_result = render_widgets(dashboard_config)
     return widgets_result["html"], "", "", ""
 
+def generate_critical_theme_css(theme_name, theme_stylesheet, rendered_html, stylesheet_links):
+    """Critical theme CSS inlined in <head> plus non-blocking links to the full stylesheets"""
+    critical_css = extract_critical_css(theme_stylesheet, rendered_html)
+    print(f"   ✓ Critical CSS for {theme_name}: {len(critical_css):,} of {len(theme_stylesheet):,} bytes inlined")
+    
+    tags = [f'<style id="critical-css" data-theme="{theme_name}">{critical_css}</style>']
+    for href, attributes in stylesheet_links:
+        tags.append(f'<link rel="preload" href="{href}" as="style"{attributes} '
+                    f'onload="this.onload=null;this.rel=\'stylesheet\'">')
+    tags.append('<noscript>' + ''.join(
+        f'<link rel="stylesheet" href="{href}">' for href, _ in stylesheet_links) + '</noscript>')
+    return '\n    '.join(tags)
+
 def render_final_html_in_dir(target_dir, theme_name, dashboard_config, theme_css, theme_js, 
                             effects_css, grid_css, widgets_content, widgets_css, widgets_js, 
-                            widget_includes, build_timestamp, built_themes):
+                            widget_includes, build_timestamp, built_themes, theme_bundle=None,
+                            use_service_worker=False):
     """Render final HTML template in specified directory (atomic build helper)"""
     # Step 7: Load index.html template from target directory
     index_template_file = target_dir / "index.html"
@@ -1354,7 +1412,7 @@ def render_final_html_in_dir(target_dir, theme_name, dashboard_config, theme_css
     theme_options_html = '\n                            '.join(theme_options)
     
     # Render final HTML
-    rendered_html = template.render(
+    render_context = dict(
         title=title,
         subtitle=subtitle,
         theme_name=theme_name,
@@ -1364,17 +1422,62 @@ def render_final_html_in_dir(target_dir, theme_name, dashboard_config, theme_css
         widgets_content=widgets_content,
         footer_message=footer_message,
         theme_options=theme_options_html,
-        effect_manager_js="",
+        effect_manager_js=generate_effect_manager_js(build_timestamp),
         theme_js=theme_js,
         widget_css="",  # No global widget CSS - all inline now
         widget_js="",   # No global widget JS - all inline now
+        service_worker_js=generate_service_worker_js() if use_service_worker else "",
         build_timestamp=build_timestamp
     )
+    rendered_html = template.render(**render_context)
+    
+    # Step 8a: Inline the CSS needed for first paint, load the full theme CSS without blocking
+    if theme_bundle:
+        theme_stylesheet = (theme_bundle['shared'] + theme_bundle['variables']
+                            + theme_bundle['custom'].get(theme_name, ''))
+    else:
+        theme_stylesheet = (built_themes or {}).get(theme_name)
+    if theme_stylesheet and os.environ.get('SLATE_CRITICAL_CSS', '1').lower() not in ('0', 'false', 'no'):
+        render_context['theme_css'] = generate_critical_theme_css(
+            theme_name, theme_stylesheet, rendered_html,
+            theme_stylesheet_links(theme_name, build_timestamp, theme_bundle))
+        rendered_html = template.render(**render_context)
     
     # Step 9: Write final index.html to target directory
     final_index_file = target_dir / "index.html"
-    with open(final_index_file, 'w') as f:
-        f.write(rendered_html)
+    staging.replace_file(final_index_file, rendered_html)
+
+def minify_build_dir(target_dir):
+    """Minify the HTML, CSS and JS of a build in place (atomic build helper)"""
+    print("🗜️  Minifying build output...")
+    
+    reports = minify.minify_tree(target_dir, previous_release_dir())
+    for relative_path, before, after in reports:
+        saved = (1 - after / before) * 100 if before else 0
+        print(f"   ✓ {relative_path}: {before:,} → {after:,} bytes (-{saved:.1f}%)")
+    
+    total_before = sum(report[1] for report in reports)
+    total_after = sum(report[2] for report in reports)
+    logger.info(f"Minified {len(reports)} files: {total_before:,} → {total_after:,} bytes",
+               files=len(reports), saved=total_before - total_after, emoji="🗜️")
+
+def generate_service_worker_js():
+    """Script registering the build's service worker once the page has loaded"""
+    return ("<script>if ('serviceWorker' in navigator) {\n"
+            "      window.addEventListener('load', () => {\n"
+            "        navigator.serviceWorker.register('sw.js').catch(error => console.warn('Service worker registration failed:', error));\n"
+            "      });\n"
+            "    }</script>")
+
+def write_service_worker_to_dir(target_dir, enabled=True):
+    """Write sw.js with the build's precache manifest (atomic build helper)"""
+    manifest = service_worker.write_service_worker(target_dir, enabled)
+    if not enabled:
+        print("   ✓ Service worker disabled (installed workers remove themselves)")
+        return
+    
+    total_size = sum((target_dir / path).stat().st_size for path, _ in manifest)
+    print(f"   ✓ Service worker precaches {len(manifest)} files ({total_size / 1024:.0f} KB)")
 
 def atomic_swap_dist_directory(live_dist_dir, temp_dist_dir):
     """Atomically replace live directory with temp directory"""
@@ -1409,8 +1512,14 @@ if __name__ == "__main__":
                        help='Skip validation tests (not recommended for production)')
     parser.add_argument('--legacy-build', action='store_true',
                        help='Use legacy build mode (may show template variables during build)')
+    parser.add_argument('--minify', action='store_true', default=None,
+                       help='Minify HTML, CSS and JS output (atomic builds; also SLATE_MINIFY=1)')
+    parser.add_argument('--rollback', nargs='?', type=int, const=1, metavar='N',
+                       help='Serve the release N builds before the current one (default: 1) and exit')
     
     args = parser.parse_args()
+    if args.rollback is not None and args.rollback < 1:
+        parser.error('--rollback N must be at least 1')
     
     # Setup logging based on environment
     if os.getenv('CI'):
@@ -1420,8 +1529,17 @@ if __name__ == "__main__":
     else:
         setup_logging()  # Use defaults
     
+    if args.rollback is not None:
+        release_dir = releases.rollback(DIST_DIR, RELEASES_DIR, args.rollback)
+        if release_dir is None:
+            logger.error("No earlier release to roll back to", emoji="❌")
+            sys.exit(1)
+        logger.info("Rolled back", release=release_dir.name, emoji="⏪")
+        sys.exit(0)
+    
     try:
-        render_dashboard(args.theme, skip_validation=args.skip_validation, atomic=not args.legacy_build)
+        render_dashboard(args.theme, skip_validation=args.skip_validation, atomic=not args.legacy_build,
+                         minify_output=args.minify)
     except Exception as e:
         logger.error(f"Dashboard rendering failed: {e}", error=str(e), emoji="❌")
         import traceback
@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+Data Fetcher
+Server-side ``dataFetcher`` support for Slate widget definitions
+
+Strategies (``dataFetcher.strategy``):
+- ``full`` (default): fetch the URL and map the response
+- ``sync``: incremental sync against a sync-token API (e.g. the Todoist
+  Sync API); the token and the merged record set are persisted between
+  builds so each refresh only transfers and processes what changed
+- ``watermark``: remember the newest modification time or id seen, ask
+  the upstream only for newer records and merge them into a cached,
+  bounded newest-first list
+
+Mapped responses are parsed incrementally and, with a ``pagination``
+block, fetched page by page; both stop as soon as ``limit`` records have
+been collected.
+
+``responseMapping`` paths are compiled once per distinct mapping into
+accessor functions; :func:`compile_fetcher` validates a definition when it
+is loaded so malformed paths fail loudly instead of mapping to None.
+"""
+
+import hashlib
+import heapq
+import json
+import re
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+from urllib.parse import quote
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+# Shared Slate utilities (src/utils)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.cache import JSONCache
+from utils.http_client import http
+from utils.json_stream import JSONPathError, iter_json_items
+
+# Default seconds between full refetches of a watermark stream, which pick
+# up records deleted upstream
+DEFAULT_FULL_REFRESH = 86400
+
+# Safety cap on pages fetched for one widget
+DEFAULT_MAX_PAGES = 10
+STREAM_CHUNK_SIZE = 16384
+
+PAGINATION_DEFAULTS = {
+    'offset': {'param': 'offset', 'start': 0},
+    'page': {'param': 'page', 'start': 1},
+    'cursor': {'param': 'cursor', 'start': None},
+}
+
+_state_stores: Dict[str, JSONCache] = {}
+
+# "name", "name[0]", "name[0][1]" or a bare list index "0"
+_SEGMENT_RE = re.compile(r'([^.\[\]]+)?((?:\[-?\d+\])*)')
+_INDEX_RE = re.compile(r'\[(-?\d+)\]')
+
+_compiled_fields: Dict[Tuple[Tuple[str, str], ...], List[Tuple[str, Callable[[Any], Any]]]] = {}
+
+
+class MappingError(ValueError):
+    """A dataFetcher definition contains a malformed mapping"""
+
+
+def _get_state_store(namespace: str) -> JSONCache:
+    if namespace not in _state_stores:
+        _state_stores[namespace] = JSONCache(namespace)
+    return _state_stores[namespace]
+
+
+def _format_values(values: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply config substitution to the string values of a mapping"""
+    return {
+        key: value.format(**config) if isinstance(value, str) else value
+        for key, value in values.items()
+    }
+
+
+def build_request(fetcher_config: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the HTTP request described by a dataFetcher definition"""
+    request = {
+        'method': fetcher_config.get('method', 'GET').upper(),
+        'url': fetcher_config.get('urlTemplate', '').format(**config),
+        'headers': _format_values(fetcher_config.get('headers', {}), config),
+        'json': None,
+        'data': None
+    }
+    if 'body' in fetcher_config:
+        request['json'] = _format_values(fetcher_config['body'], config)
+    if 'form' in fetcher_config:
+        request['data'] = _format_values(fetcher_config['form'], config)
+    return request
+
+
+def extract_items(data: Any, items_path: str) -> Any:
+    """Walk a dotted ``responseMapping.items`` path into a response"""
+    items = data
+    if items_path:
+        for path_part in items_path.split('.'):
+            if path_part and path_part in items:
+                items = items[path_part]
+    return items
+
+
+def compile_path(path: str) -> Tuple[Union[str, int], ...]:
+    """
+    Compile a dotted field path into a tuple of keys
+
+    ``"collection.name"`` becomes ``('collection', 'name')``; list indexes
+    may be written ``"tags.0.name"`` or ``"tags[0].name"``.
+
+    Raises:
+        MappingError: If the path is empty or malformed
+    """
+    if not isinstance(path, str) or not path.strip():
+        raise MappingError(f"Empty field path: {path!r}")
+
+    keys: List[Union[str, int]] = []
+    for segment in path.split('.'):
+        match = _SEGMENT_RE.fullmatch(segment)
+        if not match or not segment:
+            raise MappingError(f"Malformed field path: '{path}'")
+        name, indexes = match.groups()
+        if name:
+            keys.append(int(name) if name.lstrip('-').isdigit() else name)
+        keys.extend(int(index) for index in _INDEX_RE.findall(indexes))
+    return tuple(keys)
+
+
+def _make_accessor(keys: Tuple[Union[str, int], ...]) -> Callable[[Any], Any]:
+    """Build a function returning the value at ``keys`` (None if missing)"""
+    if len(keys) == 1 and isinstance(keys[0], str):
+        key = keys[0]
+
+        def access(item: Any) -> Any:
+            return item.get(key) if isinstance(item, dict) else None
+        return access
+
+    def access(item: Any) -> Any:
+        value = item
+        for key in keys:
+            if isinstance(key, int):
+                if not isinstance(value, list) or not -len(value) <= key < len(value):
+                    return None
+            elif not isinstance(value, dict) or key not in value:
+                return None
+            value = value[key]
+        return value
+    return access
+
+
+def compile_fields(field_mapping: Dict[str, str]) -> List[Tuple[str, Callable[[Any], Any]]]:
+    """
+    Compile ``responseMapping.fields`` into ``(name, accessor)`` pairs
+
+    Compiled mappings are cached, so each distinct mapping is parsed once
+    per process.
+
+    Raises:
+        MappingError: If any field path is malformed
+    """
+    if not isinstance(field_mapping, dict):
+        raise MappingError("responseMapping.fields must be a mapping")
+    for name, path in field_mapping.items():
+        if not isinstance(path, str):
+            raise MappingError(f"Field '{name}': path must be a string, got {type(path).__name__}")
+
+    cache_key = tuple(field_mapping.items())
+    compiled = _compiled_fields.get(cache_key)
+    if compiled is None:
+        compiled = []
+        for name, path in field_mapping.items():
+            try:
+                compiled.append((name, _make_accessor(compile_path(path))))
+            except MappingError as e:
+                raise MappingError(f"Field '{name}': {e}") from None
+        _compiled_fields[cache_key] = compiled
+    return compiled
+
+
+def compile_fetcher(fetcher_config: Dict[str, Any]) -> None:
+    """
+    Validate a dataFetcher definition and precompile its mapping
+
+    Raises:
+        MappingError: If the strategy, pagination or any mapping path is invalid
+    """
+    strategy = fetcher_config.get('strategy', 'full')
+    if strategy not in FETCH_STRATEGIES:
+        raise MappingError(f"Unsupported data fetcher strategy: {strategy}")
+
+    pagination = fetcher_config.get('pagination')
+    if pagination and pagination.get('type', 'offset') not in PAGINATION_DEFAULTS:
+        raise MappingError(f"Unsupported pagination type: {pagination.get('type')}")
+
+    mapping = fetcher_config.get('responseMapping', {})
+    items_path = mapping.get('items', '')
+    if items_path and any(isinstance(key, int) for key in compile_path(items_path)):
+        raise MappingError(f"responseMapping.items can't contain list indexes: '{items_path}'")
+    if 'fields' in mapping:
+        compile_fields(mapping['fields'])
+
+
+def map_items(items: Any, mapping: Dict[str, Any]) -> Any:
+    """Apply ``responseMapping.fields`` to a list of items"""
+    if 'fields' not in mapping or not isinstance(items, list):
+        return items
+
+    accessors = compile_fields(mapping['fields'])
+    return [{name: access(item) for name, access in accessors} for item in items]
+
+
+class _UnlistedItems(Exception):
+    """A response whose ``responseMapping.items`` path doesn't hold a list"""
+
+    def __init__(self, items: Any):
+        super().__init__('responseMapping.items is not a list')
+        self.items = items
+
+
+def _stream_items(request: Dict[str, Any], items_path: str) -> Iterator[Any]:
+    """
+    Yield the records of one response as they are parsed
+
+    When the response has no array at ``items_path``, the rest of its body
+    is read and the whole document is walked instead.
+
+    Raises:
+        _UnlistedItems: If the path doesn't resolve to a list
+    """
+    with http.stream(timeout=30, **request) as response:
+        response.raise_for_status()
+        try:
+            yield from iter_json_items(response.iter_content(chunk_size=STREAM_CHUNK_SIZE), items_path)
+            return
+        except JSONPathError:
+            # Raised before any record of the response was yielded
+            items = extract_items(response.json(), items_path)
+    if not isinstance(items, list):
+        raise _UnlistedItems(items)
+    yield from items
+
+
+def iter_records(fetcher_config: Dict[str, Any], request: Dict[str, Any],
+                 items_path: str) -> Iterator[Any]:
+    """
+    Yield raw records across all pages of a dataFetcher request
+
+    Pages are requested lazily, so a consumer that stops early never
+    triggers the next request.
+    """
+    pagination = fetcher_config.get('pagination')
+    if not pagination:
+        yield from _stream_items(request, items_path)
+        return
+
+    page_type = pagination.get('type', 'offset')
+    if page_type not in PAGINATION_DEFAULTS:
+        raise ValueError(f"Unsupported pagination type: {page_type}")
+    defaults = PAGINATION_DEFAULTS[page_type]
+    param = pagination.get('param', defaults['param'])
+    position = pagination.get('start', defaults['start'])
+    page_size = pagination.get('pageSize')
+
+    for page in range(pagination.get('maxPages', DEFAULT_MAX_PAGES)):
+        params = dict(request.get('params') or {})
+        if position is not None:
+            params[param] = position
+        if page_size:
+            params[pagination.get('sizeParam', 'limit')] = page_size
+
+        count = 0
+        last = None
+        try:
+            for record in _stream_items({**request, 'params': params}, items_path):
+                count += 1
+                last = record
+                yield record
+        except _UnlistedItems:
+            # A later page without records ends the listing
+            if page == 0:
+                raise
+            return
+
+        if count == 0 or (page_size and count < page_size):
+            return
+        if page_type == 'offset':
+            position += count
+        elif page_type == 'page':
+            position += 1
+        else:
+            position = last.get(pagination.get('cursorField', 'id')) if isinstance(last, dict) else None
+            if position is None:
+                return
+
+
+def fetch_records(fetcher_config: Dict[str, Any], request: Dict[str, Any],
+                  items_path: str, limit: Optional[int] = None) -> Any:
+    """
+    Collect up to ``limit`` raw records for a dataFetcher request
+
+    A response with no array at ``items_path`` is read buffered instead;
+    if the first one's path doesn't resolve to a list, whatever it resolves
+    to is returned.
+    """
+    try:
+        return list(islice(iter_records(fetcher_config, request, items_path), limit))
+    except _UnlistedItems as unlisted:
+        return unlisted.items
+
+
+def fetch_full(fetcher_config: Dict[str, Any], config: Dict[str, Any]) -> Any:
+    """Fetch and map the response (default strategy)"""
+    request = build_request(fetcher_config, config)
+
+    # Apply response mapping
+    if 'responseMapping' in fetcher_config:
+        mapping = fetcher_config['responseMapping']
+        items = fetch_records(fetcher_config, request, mapping.get('items', ''), config.get('limit'))
+        return map_items(items, mapping)
+
+    response = http.request(timeout=30, **request)
+    response.raise_for_status()
+    return response.json()
+
+
+def _state_key(request: Dict[str, Any]) -> str:
+    """Stable key for a sync stream; credentials only ever enter it hashed"""
+    identity = json.dumps([request['url'], request['headers'], request['json'], request['data']],
+                          sort_keys=True, default=str)
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()[:24]
+
+
+def _should_remove(record: Dict[str, Any], remove_when: Dict[str, Any]) -> bool:
+    return any(record.get(field) == value for field, value in remove_when.items())
+
+
+def _select_records(records: Dict[str, Any], sync_config: Dict[str, Any],
+                    limit: Optional[int]) -> List[Dict[str, Any]]:
+    """Pick the records to display, newest first when ``orderBy`` is set"""
+    order_by = sync_config.get('orderBy')
+    values = records.values()
+    if order_by:
+        key = lambda record: str(record.get(order_by) or '')
+        if limit:
+            return heapq.nlargest(limit, values, key=key)
+        return sorted(values, key=key, reverse=True)
+    values = list(values)
+    return values[:limit] if limit else values
+
+
+def fetch_incremental_sync(fetcher_config: Dict[str, Any], config: Dict[str, Any]) -> Any:
+    """
+    Incremental sync strategy
+
+    Sends the stored sync token, merges the returned delta into the locally
+    stored record set and persists both. Falls back to the stored records
+    when the upstream call fails.
+    """
+    sync_config = fetcher_config.get('sync', {})
+    token_field = sync_config.get('tokenField', 'sync_token')
+    id_field = sync_config.get('idField', 'id')
+    remove_when = sync_config.get('removeWhen', {})
+
+    request = build_request(fetcher_config, config)
+    key = _state_key(request)
+    store = _get_state_store('fetcher-sync')
+    state = store.get(key) or {}
+    records: Dict[str, Any] = state.get('records', {})
+    token = state.get('token') or sync_config.get('initialToken', '*')
+
+    # The token travels in the form body unless the definition uses JSON
+    if request['json'] is not None:
+        request['json'] = {**request['json'], token_field: token}
+    else:
+        request['data'] = {**(request['data'] or {}), token_field: token}
+
+    try:
+        response = http.request(timeout=30, **request)
+        response.raise_for_status()
+        data = response.json()
+    except Exception as e:
+        if not state:
+            raise
+        print(f"   ⚠️  Sync failed, using stored records: {e}")
+        data = None
+
+    if data is not None:
+        full_sync = data.get(sync_config.get('fullSyncFlag', 'full_sync'), False)
+        if full_sync:
+            records = {}
+        changes = extract_items(data, sync_config.get('records', 'items')) or []
+        for record in changes:
+            record_id = str(record.get(id_field))
+            if _should_remove(record, remove_when):
+                records.pop(record_id, None)
+            else:
+                records[record_id] = record
+
+        new_token = data.get(token_field, token)
+        if changes or full_sync or new_token != state.get('token'):
+            store.set(key, {'token': new_token, 'records': records})
+            store.flush()
+
+    selected = _select_records(records, sync_config, config.get('limit'))
+    return map_items(selected, fetcher_config.get('responseMapping', {}))
+
+
+def _watermark_key(value: Any) -> Tuple[int, Any]:
+    """Order numeric ids numerically and timestamps as strings"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, value)
+    return (1, str(value or ''))
+
+
+def fetch_watermark(fetcher_config: Dict[str, Any], config: Dict[str, Any]) -> Any:
+    """
+    Watermark delta strategy
+
+    The first build (and every ``fullRefresh`` seconds after) fetches
+    ``urlTemplate``; later builds fetch ``deltaUrlTemplate`` with the newest
+    ``field`` value seen substituted for ``{watermark}``, then merge the
+    returned records into the cached list by ``idField``.
+    """
+    wm_config = fetcher_config.get('watermark', {})
+    field = wm_config.get('field', 'dateModified')
+    id_field = wm_config.get('idField', 'id')
+    limit = config.get('limit') or wm_config.get('keep', 20)
+    mapping = fetcher_config.get('responseMapping', {})
+    items_path = wm_config.get('items', mapping.get('items', ''))
+
+    full_request = build_request(fetcher_config, config)
+    key = _state_key(full_request)
+    store = _get_state_store('fetcher-watermark')
+    state = store.get(key) or {}
+    records: List[Dict[str, Any]] = state.get('records', [])
+    watermark = state.get('watermark')
+
+    full_refresh = wm_config.get('fullRefresh', DEFAULT_FULL_REFRESH)
+    needs_full = (
+        watermark is None
+        or 'deltaUrlTemplate' not in wm_config
+        or state.get('limit', 0) < limit
+        or time.time() - state.get('full_at', 0) > full_refresh
+    )
+
+    def fetch_page(request: Dict[str, Any], paginate: bool) -> List[Dict[str, Any]]:
+        items = fetch_records(fetcher_config if paginate else {}, request, items_path, limit)
+        return items if isinstance(items, list) else []
+
+    fetched_full = False
+    try:
+        changes: List[Dict[str, Any]] = []
+        if not needs_full:
+            delta_request = dict(full_request)
+            delta_request['url'] = wm_config['deltaUrlTemplate'].format(
+                **config, watermark=quote(str(watermark), safe='')
+            )
+            changes = fetch_page(delta_request, paginate=False)
+            # Endpoints that can't filter by watermark return the newest page;
+            # if it doesn't reach back to the watermark there may be a gap
+            if changes and not wm_config.get('upstreamFilter', True):
+                oldest = min(_watermark_key(r.get(field)) for r in changes)
+                needs_full = oldest > _watermark_key(watermark)
+        if needs_full:
+            changes = fetch_page(full_request, paginate=True)
+            fetched_full = True
+    except Exception as e:
+        if not state:
+            raise
+        print(f"   ⚠️  Delta fetch failed, using cached records: {e}")
+        changes = []
+
+    if not changes and not fetched_full:
+        return map_items(records[:limit], mapping)
+
+    # A full fetch replaces the cached list, which drops deleted records
+    merged = {} if fetched_full else {str(r.get(id_field)): r for r in records}
+    for record in changes:
+        merged[str(record.get(id_field))] = record
+
+    records = heapq.nlargest(limit, merged.values(), key=lambda r: _watermark_key(r.get(field)))
+    new_state = {
+        'watermark': max((r.get(field) for r in records), key=_watermark_key, default=watermark),
+        'records': records,
+        'limit': limit,
+        'full_at': time.time() if fetched_full else state.get('full_at', 0)
+    }
+    if new_state != state:
+        store.set(key, new_state)
+        store.flush()
+
+    return map_items(records[:limit], mapping)
+
+
+FETCH_STRATEGIES = {
+    'full': fetch_full,
+    'sync': fetch_incremental_sync,
+    'watermark': fetch_watermark,
+}
+
+
+def schema_defaults(widget_definition: Dict[str, Any]) -> Dict[str, Any]:
+    """Collect the ``default`` of every field in a widget schema"""
+    return {
+        name: field['default']
+        for name, field in (widget_definition.get('schema') or {}).items()
+        if isinstance(field, dict) and 'default' in field
+    }
+
+
+def fetch_widget_data(widget_definition: Dict[str, Any], config: Dict[str, Any]) -> Any:
+    """Generic data fetcher for widgets with dataFetcher configuration"""
+    if 'dataFetcher' not in widget_definition:
+        return None
+
+    # Optional settings (e.g. ``baseUrl``, ``limit``) fall back to their schema defaults
+    config = {**schema_defaults(widget_definition), **config}
+
+    fetcher_config = widget_definition['dataFetcher']
+
+    if fetcher_config.get('type') != 'api':
+        print(f"   ⚠️  Unsupported data fetcher type: {fetcher_config.get('type')}")
+        return None
+
+    strategy = fetcher_config.get('strategy', 'full')
+    if strategy not in FETCH_STRATEGIES:
+        print(f"   ⚠️  Unsupported data fetcher strategy: {strategy}")
+        return None
+
+    try:
+        return FETCH_STRATEGIES[strategy](fetcher_config, config)
+    except Exception as e:
+        print(f"   ⚠️  Data fetch failed: {e}")
+        return None
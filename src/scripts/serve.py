@@ -5,12 +5,18 @@ Development server with auto-reload for serving the built dashboard
 """
 
 import os
+import sys
 import http.server
 import socketserver
 import webbrowser
 import threading
 import time
+from email.utils import formatdate
 from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+
+# For utils.tile_cache, imported only once tiles are requested (it needs requests)
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
 try:
     from watchdog.observers import Observer
@@ -37,9 +43,10 @@ def serve_dashboard(port=5173):
             super().__init__(*args, directory=str(dist_dir), **kwargs)
             
         def end_headers(self):
-            self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
-            self.send_header('Pragma', 'no-cache')
-            self.send_header('Expires', '0')
+            if not getattr(self, 'cacheable_response', False):
+                self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
+                self.send_header('Pragma', 'no-cache')
+                self.send_header('Expires', '0')
             self.send_header('Access-Control-Allow-Origin', '*')
             self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
             self.send_header('Access-Control-Allow-Headers', '*')
@@ -50,8 +57,53 @@ def serve_dashboard(port=5173):
             if not (args[1] == '200' and 'GET' in args[0]):
                 super().log_message(format, *args)
                 
+        def serve_tile(self, tile_file, query):
+            """Serve a radar tile from the local tile cache with caching headers"""
+            from utils.tile_cache import touch_tile
+            
+            if not tile_file.exists():
+                self.send_error(404, "Tile not cached")
+                return
+            
+            stat = tile_file.stat()
+            etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            touch_tile(tile_file)
+            
+            # Versioned URLs (?v=<mtime>) change whenever the tile is refetched
+            versioned = parse_qs(query).get('v', [''])[0] == str(int(stat.st_mtime))
+            self.cacheable_response = True
+            
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/png')
+            self.send_header('Content-Length', str(stat.st_size))
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', formatdate(stat.st_mtime, usegmt=True))
+            if versioned:
+                self.send_header('Cache-Control', 'public, max-age=31536000, immutable')
+            else:
+                self.send_header('Cache-Control', 'public, max-age=60, must-revalidate')
+            self.end_headers()
+            with open(tile_file, 'rb') as f:
+                self.wfile.write(f.read())
+        
         def do_GET(self):
+            self.cacheable_response = False
             try:
+                # Radar tiles are served from the shared tile cache, not dist/
+                url = urlsplit(self.path)
+                if url.path.startswith('/tiles/'):
+                    from utils.tile_cache import resolve_tile_request
+                    tile_file = resolve_tile_request(url.path)
+                    if tile_file is not None:
+                        self.serve_tile(tile_file, url.query)
+                        return
+                
                 # Check if dist directory still exists
                 if not dist_dir.exists():
                     self.send_error(503, "Build directory not found - rebuild in progress")
@@ -21,6 +21,9 @@ from typing import Dict, List
 
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+from utils.yaml_loader import load_yaml
+
 class DashboardTester:
     def __init__(self):
         self.config_dir = PROJECT_ROOT / "config"
@@ -47,8 +50,7 @@ class DashboardTester:
             return {}
         
         try:
-            with open(dashboard_file, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
+            config = load_yaml(dashboard_file)
             self.success("Dashboard YAML syntax is valid")
             return config
         except yaml.YAMLError as e:
@@ -192,8 +194,7 @@ class DashboardTester:
             return {}
         
         try:
-            with open(widget_file, 'r', encoding='utf-8') as f:
-                widget_def = yaml.safe_load(f)
+            widget_def = load_yaml(widget_file)
             return widget_def.get("schema", {})
         except yaml.YAMLError:
             return {}
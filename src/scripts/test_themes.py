@@ -28,6 +28,9 @@ from typing import Dict, List, Set
 
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+from utils.yaml_loader import load_yaml
+
 class ThemeTester:
     def __init__(self):
         self.themes_dir = PROJECT_ROOT / "src" / "themes"
@@ -48,8 +51,7 @@ class ThemeTester:
     def load_theme(self, theme_file: Path) -> Dict:
         """Load and validate theme YAML syntax"""
         try:
-            with open(theme_file, 'r', encoding='utf-8') as f:
-                theme = yaml.safe_load(f)
+            theme = load_yaml(theme_file)
             self.success(theme_file.stem, "Valid YAML syntax")
             return theme
         except yaml.YAMLError as e:
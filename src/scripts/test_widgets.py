@@ -10,6 +10,7 @@ Tests all widget YAML files for:
 - Template syntax validation
 - CSS syntax checking
 - Inheritance chains
+- dataFetcher mapping paths
 
 Usage: python src/scripts/test_widgets.py
 """
@@ -23,6 +24,12 @@ from typing import Dict, List, Set
 
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+from utils.yaml_loader import load_yaml
+
+sys.path.insert(0, str(Path(__file__).parent))
+from data_fetcher import MappingError, compile_fetcher
+
 class WidgetTester:
     def __init__(self):
         self.widgets_dir = PROJECT_ROOT / "src" / "widgets"
@@ -42,8 +49,7 @@ class WidgetTester:
     def load_widget(self, widget_file: Path) -> Dict:
         """Load and validate widget YAML syntax"""
         try:
-            with open(widget_file, 'r', encoding='utf-8') as f:
-                widget = yaml.safe_load(f)
+            widget = load_yaml(widget_file)
             self.success(widget_file.stem, "Valid YAML syntax")
             return widget
         except yaml.YAMLError as e:
@@ -209,6 +215,17 @@ class WidgetTester:
             else:
                 self.warning(widget_name, f"Unknown capability: {cap_name}")
     
+    def test_widget_data_fetcher(self, widget: Dict, widget_name: str):
+        """Test that the dataFetcher definition and mapping paths compile"""
+        if "dataFetcher" not in widget:
+            return
+
+        try:
+            compile_fetcher(widget["dataFetcher"])
+            self.success(widget_name, "dataFetcher mapping compiles")
+        except MappingError as e:
+            self.error(widget_name, f"Invalid dataFetcher: {e}")
+    
     def test_single_widget(self, widget_file: Path):
         """Test a single widget file"""
         widget_name = widget_file.stem
@@ -223,6 +240,7 @@ class WidgetTester:
         self.test_widget_template(widget, widget_name)
         self.test_widget_css(widget, widget_name)
         self.test_widget_capabilities(widget, widget_name)
+        self.test_widget_data_fetcher(widget, widget_name)
     
     def test_widget_name_consistency(self):
         """Test that widget file names match their metadata types"""
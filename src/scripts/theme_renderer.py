@@ -5,15 +5,23 @@ Handles theme loading, processing, and CSS generation for Slate Dashboard
 """
 
 import os
-import yaml
+import re
+import sys
+import threading
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.css_rules import map_selectors
+from utils.minify import minify_css
+from utils.staging import replace_file
+from utils.yaml_loader import load_yaml
 
-def load_yaml(file_path: Path) -> Dict[str, Any]:
-    """Load a YAML file"""
-    with open(file_path, 'r') as f:
-        return yaml.safe_load(f)
+# Theme registry: each theme file is parsed and validated once per process
+# and re-read only when its mtime changes. Entries hold the parsed data and
+# derived metadata; CSS variables are generated on first use.
+_theme_registry: Dict[Path, Dict[str, Any]] = {}
+_theme_registry_lock = threading.Lock()
 
 
 def get_available_themes(themes_dir: Path) -> List[str]:
@@ -32,27 +40,86 @@ def get_available_themes(themes_dir: Path) -> List[str]:
     return sorted(available_themes)
 
 
-def load_theme(theme_name: str, themes_dir: Path) -> Optional[Dict[str, Any]]:
-    """Load and parse a theme YAML file
+def get_theme_entry(theme_name: str, themes_dir: Path) -> Optional[Dict[str, Any]]:
+    """Return the registry entry of a theme, parsing it if new or modified
     
     Args:
-        theme_name: Name of the theme to load
+        theme_name: Name of the theme
         themes_dir: Path to themes directory
         
     Returns:
-        dict: Theme configuration or None if not found
+        dict: ``data``, ``info`` and ``css_variables`` (None until first
+        requested) of the theme, or None if it can't be loaded
     """
     theme_file = themes_dir / f"{theme_name}.yaml"
-    if not theme_file.exists():
+    try:
+        mtime = theme_file.stat().st_mtime_ns
+    except OSError:
         print(f"   ⚠️  Theme file not found: {theme_file}")
         return None
     
-    try:
-        theme_config = load_yaml(theme_file)
-        return theme_config
-    except Exception as e:
-        print(f"   ❌ Error loading theme {theme_name}: {e}")
-        return None
+    key = theme_file.resolve()
+    with _theme_registry_lock:
+        entry = _theme_registry.get(key)
+        if entry and entry['mtime'] == mtime:
+            return entry
+        
+        try:
+            theme_data = load_yaml(theme_file)
+        except Exception as e:
+            print(f"   ❌ Error loading theme {theme_name}: {e}")
+            _theme_registry.pop(key, None)
+            return None
+        if not isinstance(theme_data, dict):
+            theme_data = {}
+        
+        entry = {
+            'mtime': mtime,
+            'data': theme_data,
+            'info': {
+                'name': theme_data.get('name', theme_name),
+                'description': theme_data.get('description', ''),
+                'valid': validate_theme(theme_data),
+                'structured': _is_structured_theme(theme_data),
+                'effects_js': theme_data.get('effects-js')
+            },
+            'css_variables': None
+        }
+        _theme_registry[key] = entry
+        return entry
+
+
+def load_theme(theme_name: str, themes_dir: Path) -> Optional[Dict[str, Any]]:
+    """Load and parse a theme YAML file (served from the theme registry)
+    
+    Args:
+        theme_name: Name of the theme to load
+        themes_dir: Path to themes directory
+        
+    Returns:
+        dict: Theme configuration or None if not found; shared between
+        callers, so treat it as read-only
+    """
+    entry = get_theme_entry(theme_name, themes_dir)
+    return entry['data'] if entry else None
+
+
+def get_theme_css_variables(theme_name: str, themes_dir: Path) -> str:
+    """Return the CSS custom properties of a theme, generated once per parse
+    
+    Args:
+        theme_name: Name of the theme
+        themes_dir: Path to themes directory
+        
+    Returns:
+        str: CSS variables, or an empty string if the theme is missing or invalid
+    """
+    entry = get_theme_entry(theme_name, themes_dir)
+    if not entry or not entry['info']['valid']:
+        return ""
+    if entry['css_variables'] is None:
+        entry['css_variables'] = generate_css_variables(entry['data'])
+    return entry['css_variables']
 
 
 def validate_theme(theme_data: Dict[str, Any]) -> bool:
@@ -481,28 +548,16 @@ body {
     return css
 
 
-def build_theme_css(theme_name: str, themes_dir: Path, dist_dir: Path) -> str:
-    """Build complete CSS for a theme
+def build_shared_css(themes_dir: Path, widget_types: Optional[Iterable[str]] = None) -> str:
+    """Build the theme-independent CSS: base layout, base effects and widget CSS
     
     Args:
-        theme_name: Name of the theme to build
         themes_dir: Path to themes directory
-        dist_dir: Path to distribution directory
+        widget_types: Only include the CSS of these widgets (default: all)
         
     Returns:
-        str: Complete CSS content
+        str: Shared CSS content
     """
-    # Load theme data
-    theme_data = load_theme(theme_name, themes_dir)
-    if not theme_data:
-        return ""
-    
-    # Validate theme
-    if not validate_theme(theme_data):
-        print(f"   ❌ Theme {theme_name} validation failed")
-        return ""
-    
-    # Start with base CSS
     css_content = ""
     
     # Load base CSS from template (prefer static file, fallback to generated)
@@ -531,16 +586,41 @@ def build_theme_css(theme_name: str, themes_dir: Path, dist_dir: Path) -> str:
         with open(base_effects_path, 'r', encoding='utf-8') as f:
             css_content += f.read() + "\n\n"
     
-    # Generate and prepend CSS variables (override base :root)
-    theme_vars = generate_css_variables(theme_data)
-    css_content = theme_vars + css_content
-    
-    # Add widget definition CSS to theme
-    widget_css = generate_widget_definition_css(themes_dir.parent / "widgets")
+    # Add widget definition CSS
+    widget_css = generate_widget_definition_css(themes_dir.parent / "widgets", widget_types)
     if widget_css:
         css_content += f"/* Widget Definition CSS */\n"
         css_content += widget_css + "\n\n"
     
+    return css_content
+
+
+def build_theme_css(theme_name: str, themes_dir: Path, dist_dir: Path,
+                    widget_types: Optional[Iterable[str]] = None) -> str:
+    """Build complete CSS for a theme
+    
+    Args:
+        theme_name: Name of the theme to build
+        themes_dir: Path to themes directory
+        dist_dir: Path to distribution directory
+        widget_types: Only include the CSS of these widgets (default: all)
+        
+    Returns:
+        str: Complete CSS content
+    """
+    # Load theme data (parsed and validated once by the registry)
+    entry = get_theme_entry(theme_name, themes_dir)
+    if not entry:
+        return ""
+    theme_data = entry['data']
+    
+    if not entry['info']['valid']:
+        print(f"   ❌ Theme {theme_name} validation failed")
+        return ""
+    
+    # CSS variables first, then base, effects and widget CSS
+    css_content = get_theme_css_variables(theme_name, themes_dir) + build_shared_css(themes_dir, widget_types)
+    
     # Add custom CSS if present
     if 'custom-css' in theme_data:
         css_content += f"/* Custom CSS for {theme_name} */\n"
@@ -549,12 +629,88 @@ def build_theme_css(theme_name: str, themes_dir: Path, dist_dir: Path) -> str:
     return css_content
 
 
-def build_all_themes(themes_dir: Path, dist_dir: Path) -> Dict[str, str]:
+def theme_scope(theme_name: str) -> str:
+    """Selector matching pages showing a theme (``<html data-theme="...">``)"""
+    return f':root[data-theme="{theme_name}"]'
+
+
+def scope_theme_css(css: str, theme_name: str) -> str:
+    """Scope every rule of a theme's CSS to :func:`theme_scope`
+    
+    ``:root``/``html`` selectors gain the attribute, all others become its
+    descendants, so the CSS of every theme can be loaded at once. The scope
+    is wrapped in ``:where()``, which adds no specificity, so theme rules
+    still win or lose against widget CSS exactly as unscoped.
+    
+    Args:
+        css: Theme CSS (variables or custom CSS)
+        theme_name: Name of the theme
+        
+    Returns:
+        str: Scoped, minified CSS
+    """
+    attribute = f'[data-theme="{theme_name}"]'
+    
+    def scope_selector(selector: str) -> str:
+        root = re.match(r'(?::root|html)(?![\w-])', selector)
+        if root:
+            return f"{root.group()}:where({attribute}){selector[root.end():]}"
+        return f":where({theme_scope(theme_name)}) {selector}"
+    
+    return minify_css(map_selectors(css, scope_selector)) + "\n"
+
+
+def build_scoped_themes(themes_dir: Path, dist_dir: Path,
+                        widget_types: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Build the stylesheets for switching themes without a download
+    
+    Writes ``css/dashboard.css`` (shared CSS), ``css/themes.css`` (the
+    variables of every theme, scoped by ``data-theme``) and one
+    ``css/custom-<theme>.css`` per theme with ``custom-css``, scoped the
+    same way and loaded by the page only once the theme is used.
+    
+    Args:
+        themes_dir: Path to themes directory
+        dist_dir: Path to distribution directory
+        widget_types: Only include the CSS of these widgets (default: all)
+        
+    Returns:
+        dict: ``shared`` and ``variables`` CSS, and ``custom`` CSS per theme
+    """
+    print("🎨 Building scoped theme stylesheets...")
+    css_output_dir = dist_dir / "css"
+    css_output_dir.mkdir(parents=True, exist_ok=True)
+    
+    shared_css = build_shared_css(themes_dir, widget_types)
+    replace_file(css_output_dir / "dashboard.css", shared_css)
+    
+    variables = []
+    custom = {}
+    for theme_name in get_available_themes(themes_dir):
+        entry = get_theme_entry(theme_name, themes_dir)
+        if not entry or not entry['info']['valid']:
+            continue
+        variables.append(scope_theme_css(get_theme_css_variables(theme_name, themes_dir), theme_name))
+        if entry['data'].get('custom-css'):
+            custom[theme_name] = scope_theme_css(entry['data']['custom-css'], theme_name)
+            replace_file(css_output_dir / f"custom-{theme_name}.css", custom[theme_name])
+    
+    variables_css = "".join(variables)
+    replace_file(css_output_dir / "themes.css", variables_css)
+    print(f"   ✓ Variables of {len(variables)} themes in themes.css ({len(variables_css):,} bytes), "
+          f"custom CSS for {len(custom)} themes")
+    
+    return {'shared': shared_css, 'variables': variables_css, 'custom': custom}
+
+
+def build_all_themes(themes_dir: Path, dist_dir: Path,
+                     widget_types: Optional[Iterable[str]] = None) -> Dict[str, str]:
     """Build CSS for all available themes
     
     Args:
         themes_dir: Path to themes directory
         dist_dir: Path to distribution directory
+        widget_types: Only include the CSS of these widgets (default: all)
         
     Returns:
         dict: Theme name to CSS content mapping
@@ -566,7 +722,7 @@ def build_all_themes(themes_dir: Path, dist_dir: Path) -> Dict[str, str]:
     
     for theme_name in available_themes:
         print(f"   📝 Building theme: {theme_name}")
-        css_content = build_theme_css(theme_name, themes_dir, dist_dir)
+        css_content = build_theme_css(theme_name, themes_dir, dist_dir, widget_types)
         if css_content:
             themes[theme_name] = css_content
             # Save the theme CSS to file
@@ -581,11 +737,12 @@ def build_all_themes(themes_dir: Path, dist_dir: Path) -> Dict[str, str]:
 
 
 
-def generate_widget_definition_css(widgets_dir: Path) -> str:
+def generate_widget_definition_css(widgets_dir: Path, widget_types: Optional[Iterable[str]] = None) -> str:
     """Generate CSS from widget definitions (not instances)
     
     Args:
         widgets_dir: Path to widgets directory
+        widget_types: Only include these widgets (default: all)
         
     Returns:
         str: Combined widget definition CSS content
@@ -597,6 +754,9 @@ def generate_widget_definition_css(widgets_dir: Path) -> str:
     
     # Get all widget YAML files
     widget_files = list(widgets_dir.glob("*.yaml"))
+    if widget_types is not None:
+        widget_types = set(widget_types)
+        widget_files = [widget_file for widget_file in widget_files if widget_file.stem in widget_types]
     
     for widget_file in widget_files:
         try:
@@ -637,8 +797,7 @@ def save_theme_css(theme_name: str, css_content: str, dist_dir: Path) -> Path:
     css_output_dir.mkdir(parents=True, exist_ok=True)
     
     css_file = css_output_dir / f"theme-{theme_name}.css"
-    with open(css_file, 'w') as f:
-        f.write(css_content)
+    replace_file(css_file, css_content)
     
     return css_file
 
@@ -653,16 +812,11 @@ def get_theme_info(theme_name: str, themes_dir: Path) -> Dict[str, Any]:
     Returns:
         dict: Theme information
     """
-    theme_data = load_theme(theme_name, themes_dir)
-    if not theme_data:
+    entry = get_theme_entry(theme_name, themes_dir)
+    if not entry:
         return {}
     
-    return {
-        'name': theme_data.get('name', theme_name),
-        'description': theme_data.get('description', ''),
-        'valid': validate_theme(theme_data),
-        'structured': _is_structured_theme(theme_data)
-    }
+    return dict(entry['info'])
 
 
 def list_themes_with_info(themes_dir: Path) -> List[Dict[str, Any]]:
@@ -4,15 +4,17 @@ Theme Viewer Generator
 Generates HTML files that showcase all the values and styling for each theme
 """
 
-import yaml
 import os
+import sys
 from pathlib import Path
 from jinja2 import Template
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.yaml_loader import load_yaml
+
 def load_theme(theme_path):
     """Load theme YAML file"""
-    with open(theme_path, 'r') as f:
-        return yaml.safe_load(f)
+    return load_yaml(theme_path)
 
 def generate_theme_viewer(theme_name, theme_data, output_dir):
     """Generate an HTML viewer for a theme"""
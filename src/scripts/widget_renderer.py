@@ -2,20 +2,25 @@
 
 import os
 import sys
-import yaml
 import json
 import shutil
 import argparse
 import requests
 from pathlib import Path
 from jinja2 import Environment, BaseLoader, select_autoescape
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Set
+
+# Shared Slate utilities (src/utils)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.sandbox import execute_sandboxed
+from utils.yaml_loader import load_yaml
+
+from data_fetcher import MappingError, compile_fetcher
 
 def load_config(config_path: str) -> Dict[str, Any]:
     """Load configuration from file"""
     try:
-        with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
+        return load_yaml(config_path)
     except Exception as e:
         print(f"Error loading config from {config_path}: {e}")
         return {}
@@ -37,8 +42,75 @@ def load_widget_definition(widget_type: str) -> Dict[str, Any]:
     if not definition_path.exists():
         raise FileNotFoundError(f"Widget definition not found at {definition_path}")
     
-    with open(definition_path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
+    definition = load_yaml(definition_path)
+
+    # Compile the dataFetcher mapping now so malformed paths fail at load
+    if definition and 'dataFetcher' in definition:
+        try:
+            compile_fetcher(definition['dataFetcher'])
+        except MappingError as e:
+            raise MappingError(f"{widget_type} dataFetcher: {e}") from None
+
+    return definition
+
+def collect_widget_types(dashboard_config: Dict[str, Any]) -> Set[str]:
+    """Widget types a dashboard uses, including group items and the templates they extend
+    
+    Args:
+        dashboard_config: Parsed dashboard.yaml
+        
+    Returns:
+        set: Widget definition names (``src/widgets/<name>.yaml``)
+    """
+    referenced = set()
+    for component in dashboard_config.get('components') or []:
+        component_type = component.get('type')
+        if component_type == 'widget':
+            if component.get('widget'):
+                referenced.add(component['widget'])
+        elif component_type == 'group':
+            referenced.add('group')
+            referenced.update(item['type'] for item in component.get('items') or [] if item.get('type'))
+        elif component_type:
+            referenced.add(component_type)
+    if referenced:
+        # Every widget is rendered inside the base widget template
+        referenced.add('widget')
+    
+    used = set()
+    pending = list(referenced)
+    while pending:
+        widget_type = pending.pop()
+        if widget_type in used:
+            continue
+        used.add(widget_type)
+        try:
+            extends = (load_widget_definition(widget_type) or {}).get('extends')
+        except Exception:
+            continue  # Unknown types (e.g. motd items) have no CSS
+        if extends:
+            pending.append(extends)
+    return used
+
+def collect_widget_configs(dashboard_config: Dict[str, Any], widget_type: str) -> List[Dict[str, Any]]:
+    """Configs of every widget of one type, standalone or inside a group
+    
+    Args:
+        dashboard_config: Parsed dashboard.yaml
+        widget_type: Widget definition name
+        
+    Returns:
+        list: The ``config`` dict of each matching widget, in dashboard order
+    """
+    configs = []
+    for component in dashboard_config.get('components') or []:
+        component_type = component.get('type')
+        if component_type == 'group':
+            configs.extend(item.get('config') or {} for item in component.get('items') or []
+                           if item.get('type') == widget_type)
+        elif widget_type in (component_type, component.get('widget')):
+            configs.append(component.get('config') or {})
+    return configs
 
 def load_theme(theme_name: str, theme_cache: Dict[str, Any]) -> Dict[str, Any]:
     """Load and process a theme YAML file"""
@@ -60,8 +132,7 @@ def load_theme(theme_name: str, theme_cache: Dict[str, Any]) -> Dict[str, Any]:
             }
     
     try:
-        with open(theme_path, 'r', encoding='utf-8') as f:
-            theme_config = yaml.safe_load(f)
+        theme_config = load_yaml(theme_path)
         theme_cache[theme_name] = theme_config
         return theme_config
     except Exception as e:
@@ -209,8 +280,16 @@ def convert_handlebars_to_jinja(template_str: str) -> str:
     
     return template_str
 
-def execute_data_processing(data_function: str, config: Dict[str, Any]) -> Dict[str, Any]:
-    """Execute the data processing function to generate template data"""
+def execute_data_processing(data_function: str, config: Dict[str, Any],
+                            timeout: Optional[float] = None,
+                            memory_mb: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Execute the data processing function to generate template data
+
+    Python blocks run in the generateData sandbox with a wall-clock
+    ``timeout`` (seconds) and ``memory_mb`` cap; on failure the widget's
+    last good result is used when one exists.
+    """
     try:
         # If no data processing function, return config as-is
         if not data_function or data_function.strip() == '':
@@ -229,12 +308,8 @@ def execute_data_processing(data_function: str, config: Dict[str, Any]) -> Dict[
             return execute_js_function(data_function, config)
         else:
             # Handle Python-style functions
-            local_vars = {'config': config}
-            exec(data_function, {}, local_vars)
-            if 'result' in local_vars:
-                return local_vars['result']
-            else:
-                return {}
+            result, _ = execute_sandboxed(data_function, config, timeout, memory_mb)
+            return result
     except Exception as e:
         print(f"⚠️  Data processing execution error: {e}")
         return config  # Fallback to config values
@@ -5,7 +5,9 @@ const Dashboard = {
         enabled: false,
         interval: null,
         currentTimestamp: null,
-        checkInterval: 2000 // Check every 2 seconds
+        reloading: false,
+        checkInterval: 2000, // Check every 2 seconds
+        workerTimeout: 10000 // Longest wait for a new service worker to take over
     },
     
     init() {
@@ -164,6 +166,10 @@ const Dashboard = {
     },
     
     async checkForUpdates() {
+        if (this.liveReload.reloading) {
+            return;
+        }
+        
         try {
             // Fetch the current page to check for timestamp changes
             const response = await fetch(window.location.href, {
@@ -194,9 +200,11 @@ const Dashboard = {
                 console.log(`🔄 Dashboard updated detected! Reloading...`);
                 console.log(`   Old: ${this.liveReload.currentTimestamp}`);
                 console.log(`   New: ${newTimestamp}`);
+                this.liveReload.reloading = true;
                 
                 // Add a slight delay to ensure file writes are complete
-                setTimeout(() => {
+                setTimeout(async () => {
+                    await this.waitForServiceWorker();
                     window.location.reload();
                 }, 500);
             }
@@ -206,6 +214,45 @@ const Dashboard = {
         }
     },
     
+    async waitForServiceWorker() {
+        // The service worker serves the page it precached, so reloading
+        // before the new build's worker takes over shows the old build again
+        if (!('serviceWorker' in navigator) || !navigator.serviceWorker.controller) {
+            return;
+        }
+        
+        try {
+            const registration = await navigator.serviceWorker.getRegistration();
+            if (!registration) {
+                return;
+            }
+            
+            const settled = new Promise(resolve => {
+                registration.addEventListener('updatefound', () => {
+                    const worker = registration.installing;
+                    worker.addEventListener('statechange', () => {
+                        // 'redundant': the install failed, the old worker stays
+                        if (worker.state === 'activated' || worker.state === 'redundant') {
+                            resolve();
+                        }
+                    });
+                }, { once: true });
+            });
+            
+            await registration.update();
+            if (!registration.installing && !registration.waiting) {
+                return;
+            }
+            
+            await Promise.race([
+                settled,
+                new Promise(resolve => setTimeout(resolve, this.liveReload.workerTimeout))
+            ]);
+        } catch (error) {
+            console.warn('🔄 Live reload: service worker update failed:', error.message);
+        }
+    },
+    
     // Method to manually disable live reload
     disableLiveReload() {
         if (this.liveReload.interval) {
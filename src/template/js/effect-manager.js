@@ -3,11 +3,232 @@
  * Handles activation and configuration of stock visual effects
  */
 
+// The <script> tag is only available while this file executes
+const effectManagerScript = document.currentScript;
+
+/**
+ * Effect Scheduler
+ * One requestAnimationFrame loop shared by every animated theme effect.
+ * Effects register a draw callback and a target frame rate; the loop
+ * throttles each to its rate, keeps each within its frame budget and
+ * stops entirely while the page is hidden, the user is idle or reduced
+ * motion is requested.
+ */
+class EffectScheduler {
+  constructor() {
+    this.effects = new Map();
+    this.pauseReasons = new Set();
+    this.frameId = null;
+    this.nextIndex = 0;
+
+    this.frameBudget = 8;                // ms all effects may use per frame
+    this.defaultEffectBudget = 4;        // ms one effect may use per frame
+    this.overrunLimit = 3;               // consecutive overruns before an effect is slowed down
+    this.idleTimeout = 5 * 60 * 1000;    // ms without input before pausing
+    this.maxFps = this.loadMaxFps();
+
+    this.tick = this.tick.bind(this);
+    this.watchVisibility();
+    this.watchIdle();
+    this.watchReducedMotion();
+  }
+
+  /**
+   * Frame rate cap for this device: a saved choice, otherwise 30 fps on
+   * low-end or data-saving devices and 60 fps elsewhere
+   */
+  loadMaxFps() {
+    const saved = parseFloat(localStorage.getItem('dashboard-effects-max-fps'));
+    if (saved > 0) return saved;
+
+    const connection = navigator.connection || {};
+    const lowEnd = (navigator.hardwareConcurrency || 8) <= 4 || (navigator.deviceMemory || 8) <= 4;
+    return connection.saveData || lowEnd ? 30 : 60;
+  }
+
+  /**
+   * Set and remember the frame rate cap for this device (null resets it)
+   */
+  setMaxFps(fps) {
+    if (fps > 0) {
+      localStorage.setItem('dashboard-effects-max-fps', String(fps));
+    } else {
+      localStorage.removeItem('dashboard-effects-max-fps');
+    }
+    this.maxFps = this.loadMaxFps();
+    this.effects.forEach(effect => this.updateInterval(effect));
+  }
+
+  /**
+   * Register an animated effect
+   *
+   * callback(now, elapsed) draws one frame; elapsed is the time in ms
+   * since its previous frame. Options:
+   * - fps: target frame rate (may be below 1 for periodic work)
+   * - budget: ms the callback may take per frame before it is slowed down
+   * - still: draw a single frame when motion is paused from the start
+   *   (reduced motion), so static effects like backgrounds still appear
+   */
+  register(name, callback, options = {}) {
+    this.unregister(name);
+    const effect = {
+      name,
+      callback,
+      fps: options.fps || 30,
+      budget: options.budget || this.defaultEffectBudget,
+      slowdown: 1,
+      overruns: 0,
+      last: null,
+      interval: 0
+    };
+    this.updateInterval(effect);
+    this.effects.set(name, effect);
+
+    if (options.still && this.pauseReasons.has('reduced-motion')) {
+      this.run(effect, performance.now(), 0);
+    }
+    this.start();
+    return name;
+  }
+
+  /**
+   * Stop an effect; the loop stops once no effects are left
+   */
+  unregister(name) {
+    this.effects.delete(name);
+    if (this.effects.size === 0) this.stop();
+  }
+
+  updateInterval(effect) {
+    effect.interval = 1000 / Math.min(effect.fps, this.maxFps) * effect.slowdown;
+  }
+
+  /**
+   * Pause or resume the loop for a reason; it runs only while no reason applies
+   */
+  pause(reason = 'manual') {
+    this.pauseReasons.add(reason);
+    this.stop();
+  }
+
+  resume(reason = 'manual') {
+    this.pauseReasons.delete(reason);
+    this.start();
+  }
+
+  start() {
+    if (this.frameId !== null || this.pauseReasons.size > 0 || this.effects.size === 0) return;
+    // Don't report the paused time as elapsed frame time
+    this.effects.forEach(effect => { effect.last = null; });
+    this.frameId = requestAnimationFrame(this.tick);
+  }
+
+  stop() {
+    if (this.frameId === null) return;
+    cancelAnimationFrame(this.frameId);
+    this.frameId = null;
+  }
+
+  tick(now) {
+    this.frameId = requestAnimationFrame(this.tick);
+    const frameStart = performance.now();
+    const effects = Array.from(this.effects.values());
+
+    // Start with a different effect each frame so an exhausted frame
+    // budget doesn't starve the same effects every time
+    for (let i = 0; i < effects.length; i++) {
+      const effect = effects[(this.nextIndex + i) % effects.length];
+      const elapsed = effect.last === null ? 0 : now - effect.last;
+      if (effect.last !== null && elapsed < effect.interval - 1) continue;
+
+      if (performance.now() - frameStart > this.frameBudget) {
+        this.nextIndex = (this.nextIndex + i) % effects.length;
+        return;
+      }
+      this.run(effect, now, elapsed);
+    }
+    this.nextIndex = 0;
+  }
+
+  run(effect, now, elapsed) {
+    effect.last = now;
+    const started = performance.now();
+    try {
+      effect.callback(now, elapsed);
+    } catch (error) {
+      console.error(`Effect ${effect.name} failed and was stopped:`, error);
+      this.unregister(effect.name);
+      return;
+    }
+
+    if (performance.now() - started <= effect.budget) {
+      effect.overruns = 0;
+      return;
+    }
+    effect.overruns++;
+    if (effect.overruns >= this.overrunLimit && effect.slowdown < 4) {
+      // Too slow for this device: halve its frame rate (at most twice)
+      effect.slowdown *= 2;
+      effect.overruns = 0;
+      this.updateInterval(effect);
+      console.warn(`Effect ${effect.name} exceeds its ${effect.budget}ms frame budget, slowing it down`);
+    }
+  }
+
+  watchVisibility() {
+    const update = () => {
+      if (document.hidden) {
+        this.pause('hidden');
+      } else {
+        this.resume('hidden');
+      }
+    };
+    document.addEventListener('visibilitychange', update);
+    update();
+  }
+
+  /**
+   * Pause after idleTimeout without input, e.g. a dashboard left on an
+   * unattended display; any input resumes
+   */
+  watchIdle() {
+    let timer = null;
+    const wake = () => {
+      clearTimeout(timer);
+      timer = setTimeout(() => this.pause('idle'), this.idleTimeout);
+      if (this.pauseReasons.has('idle')) this.resume('idle');
+    };
+    ['pointermove', 'pointerdown', 'keydown', 'wheel', 'touchstart'].forEach(type => {
+      window.addEventListener(type, wake, { passive: true });
+    });
+    wake();
+  }
+
+  watchReducedMotion() {
+    if (!window.matchMedia) return;
+    const query = window.matchMedia('(prefers-reduced-motion: reduce)');
+    const update = () => {
+      if (query.matches) {
+        this.pause('reduced-motion');
+      } else {
+        this.resume('reduced-motion');
+      }
+    };
+    if (query.addEventListener) {
+      query.addEventListener('change', update);
+    } else if (query.addListener) {
+      query.addListener(update);
+    }
+    update();
+  }
+}
+
 class EffectManager {
   constructor() {
     this.activeEffects = new Set();
     this.effectConfig = new Map();
     this.initialized = false;
+    this.scheduler = new EffectScheduler();
   }
 
   /**
@@ -28,6 +249,7 @@ class EffectManager {
    */
   loadEffectsCSS() {
     if (document.querySelector('#base-effects-css')) return;
+    if (effectManagerScript && effectManagerScript.dataset.effectsCss === 'bundled') return;
     
     const link = document.createElement('link');
     link.id = 'base-effects-css';
@@ -287,4 +509,5 @@ if (document.readyState === 'loading') {
 // Export for module use
 if (typeof module !== 'undefined' && module.exports) {
   module.exports = EffectManager;
+  module.exports.EffectScheduler = EffectScheduler;
 } 
\ No newline at end of file
@@ -15,6 +15,11 @@ if (!window.synthwaveIntervals) {
     window.synthwaveIntervals = [];
 }
 
+// Shared animation loop of the effect manager, if it is loaded
+function synthwaveScheduler() {
+  return window.EffectManager && window.EffectManager.scheduler;
+}
+
 // Create animated neon grid background
 function createNeonGrid() {
   console.log('✨ Creating neon grid effect');
@@ -80,8 +85,13 @@ function createNeonGrid() {
     offset += 0.5;
   }
   
-  gridLines = setInterval(drawGrid, 50);
-  window.synthwaveIntervals.push(gridLines);
+  const scheduler = synthwaveScheduler();
+  if (scheduler) {
+    gridLines = scheduler.register('synthwave-grid', drawGrid, { fps: 20, still: true });
+  } else {
+    gridLines = setInterval(drawGrid, 50);
+    window.synthwaveIntervals.push(gridLines);
+  }
   
   // Handle window resize
   window.addEventListener('resize', () => {
@@ -166,8 +176,13 @@ function createSynthWaves() {
   document.head.appendChild(style);
   
   // Create shapes periodically
-  synthWaves = setInterval(createShape, 3000);
-  window.synthwaveIntervals.push(synthWaves);
+  const scheduler = synthwaveScheduler();
+  if (scheduler) {
+    synthWaves = scheduler.register('synthwave-shapes', createShape, { fps: 1 / 3 });
+  } else {
+    synthWaves = setInterval(createShape, 3000);
+    window.synthwaveIntervals.push(synthWaves);
+  }
 }
 
 // Add intense neon pulse to widget titles
@@ -298,6 +313,13 @@ function applySynthwaveEffects() {
 function removeSynthwaveEffects() {
   console.log('🌈 Removing Synthwave effects');
   
+  // Stop animations
+  const scheduler = synthwaveScheduler();
+  if (scheduler) {
+    scheduler.unregister('synthwave-grid');
+    scheduler.unregister('synthwave-shapes');
+  }
+  
   // Clear all intervals
   if (window.synthwaveIntervals) {
     window.synthwaveIntervals.forEach(interval => clearInterval(interval));
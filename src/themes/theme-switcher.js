@@ -136,30 +136,24 @@ export default class ThemeSwitcherWidget {
   }
 
   loadThemeJS(themeName) {
-    // Check if theme JS file exists and load it
-    const themeJSPath = `/js/${themeName}.js`
+    // The build's theme manifest lists which themes have effects JS
+    const manifest = window.SlateThemeManifest || {}
+    const effectsJs = (manifest[themeName] || {}).effectsJs
+    if (!effectsJs) {
+      console.log(`No theme effects for: ${themeName}`)
+      return
+    }
     
-    // Test if the file exists
-    fetch(themeJSPath, { method: 'HEAD' })
-      .then(response => {
-        if (response.ok) {
-          // File exists, load it
-          const script = document.createElement('script')
-          script.src = themeJSPath
-          script.setAttribute('data-theme-js', themeName)
-          script.onload = () => {
-            console.log(`✓ Theme effects loaded: ${themeName}.js`)
-          }
-          script.onerror = () => {
-            console.warn(`Failed to load theme effects: ${themeName}.js`)
-          }
-          document.head.appendChild(script)
-        }
-      })
-      .catch(() => {
-        // No theme JS file, that's fine
-        console.log(`No theme effects for: ${themeName}`)
-      })
+    const script = document.createElement('script')
+    script.src = effectsJs
+    script.setAttribute('data-theme-js', themeName)
+    script.onload = () => {
+      console.log(`✓ Theme effects loaded: ${effectsJs}`)
+    }
+    script.onerror = () => {
+      console.warn(`Failed to load theme effects: ${effectsJs}`)
+    }
+    document.head.appendChild(script)
   }
 
 
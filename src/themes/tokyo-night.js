@@ -8,6 +8,11 @@ console.log('Tokyo Night effects script loaded');
 let rainEffect = null;
 let neonFlicker = null;
 
+// Shared animation loop of the effect manager, if it is loaded
+function tokyoNightScheduler() {
+  return window.EffectManager && window.EffectManager.scheduler;
+}
+
 // Create digital rain effect
 function createDigitalRain() {
   console.log('Creating digital rain effect');
@@ -52,7 +57,10 @@ function createDigitalRain() {
     }
   }
   
-  rainEffect = setInterval(draw, 100);
+  const scheduler = tokyoNightScheduler();
+  rainEffect = scheduler
+    ? scheduler.register('tokyo-night-rain', draw, { fps: 10 })
+    : setInterval(draw, 100);
   
   // Handle window resize
   window.addEventListener('resize', () => {
@@ -82,7 +90,10 @@ function addNeonFlicker() {
     });
   }
   
-  neonFlicker = setInterval(flicker, 100);
+  const scheduler = tokyoNightScheduler();
+  neonFlicker = scheduler
+    ? scheduler.register('tokyo-night-flicker', flicker, { fps: 10 })
+    : setInterval(flicker, 100);
 }
 
 // Apply Tokyo Night effects when theme is loaded
@@ -125,6 +136,13 @@ function applyTokyoNightEffects() {
 function removeTokyoNightEffects() {
   console.log('Removing Tokyo Night effects');
   
+  // Stop animations
+  const scheduler = tokyoNightScheduler();
+  if (scheduler) {
+    scheduler.unregister('tokyo-night-rain');
+    scheduler.unregister('tokyo-night-flicker');
+  }
+  
   // Clear intervals
   if (rainEffect) {
     clearInterval(rainEffect);
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Slate Dashboard Persistent Cache
+================================
+
+Small on-disk key/value store shared by the build pipeline and widget
+data processing. Each namespace is a single JSON document under the cache
+directory, written atomically so a crashed or concurrent build never leaves
+a half-written file behind.
+
+:class:`JSONCache` merges its changes into the document on disk under a
+file lock, so processes sharing a namespace (e.g. generateData workers)
+don't overwrite each other's entries.
+
+The cache directory defaults to ``.slate-cache/`` in the project root and
+can be moved with the ``SLATE_CACHE_DIR`` environment variable.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: threads are still serialised by _lock
+    fcntl = None
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+_lock = threading.Lock()
+_DELETED = object()
+
+
+def get_cache_dir(*parts: str) -> Path:
+    """
+    Return (and create) a directory inside the Slate cache directory
+
+    Args:
+        parts: Optional sub-directory components
+
+    Returns:
+        Path to the cache directory
+    """
+    root = Path(os.getenv('SLATE_CACHE_DIR', PROJECT_ROOT / '.slate-cache'))
+    path = root.joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def load_json(namespace: str, default: Optional[Any] = None) -> Any:
+    """
+    Load a cached JSON document
+
+    Args:
+        namespace: Cache namespace (file name without extension)
+        default: Value returned when the document is missing or unreadable
+
+    Returns:
+        The cached document or ``default``
+    """
+    cache_file = get_cache_dir() / f"{namespace}.json"
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {} if default is None else default
+
+
+def save_json(namespace: str, data: Any) -> None:
+    """
+    Atomically write a JSON document to the cache
+
+    Args:
+        namespace: Cache namespace (file name without extension, may
+            contain ``/`` to place it in a sub-directory)
+        data: JSON-serialisable document
+    """
+    cache_file = get_cache_dir() / f"{namespace}.json"
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    with _lock:
+        fd, temp_path = tempfile.mkstemp(dir=cache_file.parent, prefix=f".{cache_file.stem}-", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'), default=str)
+            os.replace(temp_path, cache_file)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+
+@contextmanager
+def locked_namespace(namespace: str) -> Iterator[None]:
+    """
+    Hold an exclusive lock on a cache namespace, across processes
+
+    Args:
+        namespace: Cache namespace to lock
+    """
+    lock_file = get_cache_dir() / f"{namespace}.lock"
+    lock_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_file, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class JSONCache:
+    """Dictionary-style view over a cache namespace, flushed on demand"""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._data: Dict[str, Any] = load_json(namespace, {})
+        # Keys set or removed since the last flush (_DELETED for removals)
+        self._changes: Dict[str, Any] = {}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._data.get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        self._data[key] = value
+        self._changes[key] = value
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        if key in self._data:
+            self._changes[key] = _DELETED
+        return self._data.pop(key, default)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def keys(self):
+        return self._data.keys()
+
+    def flush(self) -> None:
+        """
+        Merge pending changes into the document on disk
+
+        Entries other processes wrote since this cache was loaded are kept,
+        and become visible here.
+        """
+        if not self._changes:
+            return
+        with locked_namespace(self.namespace):
+            data = load_json(self.namespace, {})
+            for key, value in self._changes.items():
+                if value is _DELETED:
+                    data.pop(key, None)
+                else:
+                    data[key] = value
+            save_json(self.namespace, data)
+        self._data = data
+        self._changes = {}
+
+
+class WidgetCache:
+    """
+    Per-widget key/value store with optional expiry, for ``generateData``
+
+    Loaded from disk on first use and written back by :meth:`flush`, so
+    separate worker processes see each other's entries from one build to
+    the next.
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._store: Optional[JSONCache] = None
+
+    def _entries(self) -> JSONCache:
+        if self._store is None:
+            self._store = JSONCache(self.namespace)
+        return self._store
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a stored value, or ``default`` if missing or expired"""
+        entry = self._entries().get(key)
+        if entry is None:
+            return default
+        expires = entry.get('expires')
+        if expires is not None and expires < time.time():
+            self._entries().pop(key)
+            return default
+        return entry['value']
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a JSON-serialisable value, optionally expiring after ``ttl`` seconds"""
+        expires = time.time() + ttl if ttl else None
+        self._entries().set(key, {'value': value, 'expires': expires})
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        entry = self._entries().pop(key)
+        return default if entry is None else entry['value']
+
+    def flush(self) -> None:
+        if self._store is not None:
+            self._store.flush()
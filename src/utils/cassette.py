@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Slate Dashboard HTTP Record/Replay
+==================================
+
+Transport adapter mounted under the shared HTTP client, so it covers
+``dataFetcher``, ``generateData`` blocks, RSS feeds, geocoding and radar
+tiles alike. Selected with ``SLATE_HTTP_MODE``:
+
+- ``live`` (default): talk to the network
+- ``record``: talk to the network and write every response to a cassette
+- ``replay``: never touch the network; serve cassettes, with injected
+  latency, and fail requests that were never recorded
+
+Cassettes are one JSON file per request under ``SLATE_CASSETTE_DIR``
+(default ``.slate-cache/cassettes``). Credentials in the query string are
+redacted before the request is keyed, so cassettes can be shared between
+machines with different API keys. Conditional requests (``If-None-Match``,
+``If-Modified-Since``) are keyed apart from the plain request, so a
+recorded 304 never replaces the full response; a conditional request that
+was never recorded replays the plain request's response.
+
+``SLATE_REPLAY_LATENCY`` sets the injected latency: ``recorded`` (default,
+the time the original response took), a fixed number of milliseconds, or a
+``min-max`` range in milliseconds drawn from a generator seeded with
+``SLATE_REPLAY_SEED``.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import os
+import random
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from .cache import get_cache_dir
+from .logging_config import get_logger
+from .rate_limit import CREDENTIAL_PARAMS
+
+logger = get_logger(__name__)
+
+MODES = ('live', 'record', 'replay')
+REDACTED = 'REDACTED'
+
+# Framing headers that no longer describe the stored (decoded) body
+_DROPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length'}
+# Request headers that change what a response means (e.g. a body-less 304)
+CONDITIONAL_HEADERS = ('if-none-match', 'if-modified-since')
+
+
+class CassetteMiss(requests.ConnectionError):
+    """Replay mode was asked for a request that was never recorded"""
+
+
+def get_mode() -> str:
+    mode = os.getenv('SLATE_HTTP_MODE', 'live').lower()
+    if mode not in MODES:
+        logger.warning(f"Unknown SLATE_HTTP_MODE '{mode}', using live", emoji="⚠️")
+        return 'live'
+    return mode
+
+
+def get_cassette_dir() -> Path:
+    directory = os.getenv('SLATE_CASSETTE_DIR')
+    if directory:
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+    return get_cache_dir('cassettes')
+
+
+def redact_url(url: str) -> str:
+    """Replace credential query parameters with a placeholder"""
+    parts = urlsplit(url)
+    if not parts.query:
+        return url
+    query = [
+        (name, REDACTED if name.lower() in CREDENTIAL_PARAMS else value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+    ]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def cassette_key(request: requests.PreparedRequest, conditional: bool = True) -> str:
+    """
+    Key of the cassette for a request
+
+    Args:
+        request: Prepared request
+        conditional: Include the request's conditional headers; False keys
+            the plain (unconditional) request
+    """
+    body = request.body or b''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    digest = hashlib.sha256()
+    digest.update(request.method.encode('ascii'))
+    digest.update(redact_url(request.url).encode('utf-8'))
+    digest.update(body)
+    if conditional:
+        for name in CONDITIONAL_HEADERS:
+            value = request.headers.get(name)
+            if value is not None:
+                digest.update(f"\n{name}: {value}".encode('utf-8'))
+    return digest.hexdigest()[:24]
+
+
+class LatencyModel:
+    """Injected replay latency, parsed from ``SLATE_REPLAY_LATENCY``"""
+
+    def __init__(self, spec: Optional[str] = None, seed: Optional[str] = None):
+        spec = (spec or os.getenv('SLATE_REPLAY_LATENCY', 'recorded')).strip()
+        self._random = random.Random(seed or os.getenv('SLATE_REPLAY_SEED', '0'))
+        self._lock = threading.Lock()
+        self.recorded = spec == 'recorded'
+        self.low = self.high = 0.0
+        if not self.recorded:
+            low, _, high = spec.partition('-')
+            self.low = float(low) / 1000
+            self.high = float(high) / 1000 if high else self.low
+
+    def delay(self, recorded_seconds: float) -> float:
+        if self.recorded:
+            return recorded_seconds
+        if self.high == self.low:
+            return self.low
+        with self._lock:
+            return self._random.uniform(self.low, self.high)
+
+
+class CassetteAdapter(HTTPAdapter):
+    """HTTPAdapter that records responses to, or replays them from, cassettes"""
+
+    def __init__(self, mode: str, cassette_dir: Optional[Path] = None,
+                 latency: Optional[LatencyModel] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.mode = mode
+        self.cassette_dir = cassette_dir or get_cassette_dir()
+        self.latency = latency or LatencyModel()
+
+    def _path(self, request: requests.PreparedRequest, conditional: bool = True) -> Path:
+        return self.cassette_dir / f"{cassette_key(request, conditional)}.json"
+
+    def _load(self, request: requests.PreparedRequest) -> Dict[str, Any]:
+        paths = [self._path(request)]
+        if any(name in request.headers for name in CONDITIONAL_HEADERS):
+            # A full response is a valid answer to a conditional request
+            paths.append(self._path(request, conditional=False))
+        for path in paths:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                continue
+        raise CassetteMiss(f"No cassette for {request.method} {redact_url(request.url)}",
+                           request=request)
+
+    def _build_response(self, request: requests.PreparedRequest, entry: Dict[str, Any]) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry['status_code']
+        response.reason = entry['reason']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(base64.b64decode(entry['content']))
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.elapsed = timedelta(seconds=entry.get('elapsed', 0))
+        return response
+
+    def _record(self, request: requests.PreparedRequest, response: requests.Response) -> Dict[str, Any]:
+        entry = {
+            'method': request.method,
+            'url': redact_url(request.url),
+            'status_code': response.status_code,
+            'reason': response.reason,
+            'headers': {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS},
+            'content': base64.b64encode(response.content).decode('ascii'),
+            'elapsed': response.elapsed.total_seconds(),
+            'recorded_at': time.time()
+        }
+        path = self._path(request)
+        temp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, indent=1)
+        os.replace(temp_path, path)
+        return entry
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if self.mode == 'replay':
+            entry = self._load(request)
+            delay = self.latency.delay(entry.get('elapsed', 0))
+            if delay > 0:
+                time.sleep(delay)
+            return self._build_response(request, entry)
+
+        response = super().send(request, **kwargs)
+        if self.mode == 'record':
+            entry = self._record(request, response)
+            response.close()
+            return self._build_response(request, entry)
+        return response
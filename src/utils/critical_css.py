@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Slate Dashboard Critical CSS
+============================
+
+Extracts the subset of a theme stylesheet needed for first paint of a
+rendered page, so it can be inlined in ``<head>`` while the full
+stylesheet loads without blocking rendering.
+
+A rule is critical when every class, id, attribute and element name in
+one of its selectors occurs in the page. Combinators and structural
+pseudo-classes are ignored, so the subset errs on the side of including
+too much. Left out are:
+- Rules that only apply on interaction (``:hover``, ``:focus``, ...)
+- ``@keyframes``, ``@font-face`` and ``@import``
+- Rules for markup the page doesn't contain, e.g. widget types that are
+  not configured or elements that scripts add later
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import Set, Tuple
+
+from .css_rules import map_selectors, split_top_level
+from .minify import minify_css
+
+# Pseudo-classes that can't match before the user interacts with the page
+_INTERACTIVE = re.compile(r':(?:hover|focus|focus-within|focus-visible|active|visited)\b')
+_FUNCTIONAL_PSEUDO = re.compile(r'::?[\w-]+\(')
+_PSEUDO = re.compile(r'::?[\w-]+')
+_CLASS = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+_ID = re.compile(r'#(-?[_a-zA-Z][\w-]*)')
+_ATTRIBUTE = re.compile(r'\[\s*([\w-]+)\s*(?:(=)\s*["\']?([^"\'\]]*)["\']?\s*|[^\]]*)\]')
+_TYPE = re.compile(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)')
+
+
+class _PageIndex(HTMLParser):
+    """Element names, classes, ids and attributes used in a page"""
+
+    def __init__(self, html: str):
+        super().__init__(convert_charrefs=True)
+        self.tags: Set[str] = {'html'}
+        self.classes: Set[str] = set()
+        self.ids: Set[str] = set()
+        self.attributes: Set[str] = set()
+        self.attribute_values: Set[Tuple[str, str]] = set()
+        self.feed(html)
+        self.close()
+
+    def handle_starttag(self, tag, attrs):
+        self.tags.add(tag)
+        for name, value in attrs:
+            self.attributes.add(name)
+            self.attribute_values.add((name, value or ''))
+            if name == 'class' and value:
+                self.classes.update(value.split())
+            elif name == 'id' and value:
+                self.ids.add(value)
+
+    handle_startendtag = handle_starttag
+
+
+def _strip_functional_pseudos(selector: str) -> str:
+    """
+    Remove ``:not(...)``, ``:nth-child(...)`` etc. including their arguments
+
+    ``:where(x)``/``:is(x)`` with a single selector are replaced by ``x``
+    instead, so a theme scope like ``:where([data-theme="dark"])`` still
+    has to match.
+    """
+    while True:
+        match = _FUNCTIONAL_PSEUDO.search(selector)
+        if not match:
+            return selector
+        depth = 1
+        end = match.end()
+        while end < len(selector) and depth:
+            depth += {'(': 1, ')': -1}.get(selector[end], 0)
+            end += 1
+        argument = selector[match.end():end - 1]
+        if (match.group().lower() in (':where(', ':is(')
+                and len(split_top_level(argument)) == 1):
+            selector = selector[:match.start()] + ' ' + argument + ' ' + selector[end:]
+        else:
+            selector = selector[:match.start()] + selector[end:]
+
+
+def _attribute_matches(name: str, operator: str, value: str, page: _PageIndex) -> bool:
+    if operator:
+        # [name="value"]: that exact attribute must occur in the page
+        return (name, value) in page.attribute_values
+    return name in page.attributes
+
+
+def _selector_matches(selector: str, page: _PageIndex) -> bool:
+    if _INTERACTIVE.search(selector):
+        return False
+    if '\\' in selector:
+        return True  # Escaped names: don't guess
+    selector = _strip_functional_pseudos(selector)
+    attributes = _ATTRIBUTE.findall(selector)
+    selector = _PSEUDO.sub('', _ATTRIBUTE.sub('', selector))
+    return (all(name in page.classes for name in _CLASS.findall(selector))
+            and all(name in page.ids for name in _ID.findall(selector))
+            and all(_attribute_matches(*attribute, page) for attribute in attributes)
+            and all(name.lower() in page.tags for name in _TYPE.findall(_CLASS.sub('', _ID.sub('', selector)))))
+
+
+def extract_critical_css(css: str, html: str) -> str:
+    """
+    Extract the rules of a stylesheet needed to render a page
+
+    Args:
+        css: Full stylesheet
+        html: Rendered page
+
+    Returns:
+        str: Minified critical CSS, in the stylesheet's original order
+    """
+    page = _PageIndex(html)
+    critical = map_selectors(css, lambda selector: selector if _selector_matches(selector, page) else None,
+                             keep_at_rules=False)
+    return minify_css(critical)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Slate Dashboard CSS Rules
+=========================
+
+Minimal CSS rule walker shared by the build steps that rewrite
+stylesheets (critical CSS extraction, theme scoping). It understands just
+enough CSS to split a stylesheet into top-level rules and selector lists
+without being confused by strings or nested blocks; declarations are
+passed through untouched.
+"""
+
+import re
+from typing import Callable, Iterator, List, Optional, Tuple
+
+# At-rules whose blocks contain style rules
+GROUPING_AT_RULES = ('@media', '@supports', '@layer', '@container')
+
+_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+
+
+def split_top_level(text: str, separator: str = ',') -> List[str]:
+    """
+    Split on ``separator`` outside brackets, parentheses and strings
+
+    Args:
+        text: Selector list (or any CSS fragment)
+        separator: Single separator character
+
+    Returns:
+        list: The parts, unstripped
+    """
+    parts, depth, quote, start = [], 0, None, 0
+    for index, char in enumerate(text):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '\'"':
+            quote = char
+        elif char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append(text[start:index])
+            start = index + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _block_end(css: str, start: int) -> int:
+    """Index of the ``}`` closing the block whose ``{`` is at ``start``"""
+    depth, quote, index = 0, None, start
+    while index < len(css):
+        char = css[index]
+        if quote:
+            if char == '\\':
+                index += 1
+            elif char == quote:
+                quote = None
+        elif char in '\'"':
+            quote = char
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return index
+        index += 1
+    return len(css)
+
+
+def iter_rules(css: str) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    Walk the top-level rules of a stylesheet
+
+    Comments are dropped.
+
+    Args:
+        css: Stylesheet
+
+    Yields:
+        tuple: ``(prelude, body)`` per block rule, where prelude is a
+        selector list or an at-rule prelude; ``(statement, None)`` for
+        block-less at-rules such as ``@import``
+    """
+    css = _COMMENT.sub(' ', css)
+    position = 0
+    while position < len(css):
+        brace = css.find('{', position)
+        semicolon = css.find(';', position)
+        if brace < 0:
+            break
+        if 0 <= semicolon < brace:
+            yield css[position:semicolon + 1].strip(), None
+            position = semicolon + 1
+            continue
+        end = _block_end(css, brace)
+        yield css[position:brace].strip(), css[brace + 1:end]
+        position = end + 1
+
+
+def map_selectors(css: str, rewrite: Callable[[str], Optional[str]],
+                  keep_at_rules: bool = True) -> str:
+    """
+    Rebuild a stylesheet with every selector passed through ``rewrite``
+
+    Style rules inside ``@media``/``@supports`` blocks are rewritten too;
+    rules left without selectors and grouping blocks left empty are dropped.
+
+    Args:
+        css: Stylesheet
+        rewrite: Returns the new selector, or None to drop it
+        keep_at_rules: Keep other at-rules (``@keyframes``, ``@font-face``,
+            ``@import``) unchanged; drop them if False
+
+    Returns:
+        str: The rewritten stylesheet, one rule per line
+    """
+    rules = []
+    for prelude, body in iter_rules(css):
+        if prelude.startswith('@'):
+            if body is not None and prelude.lower().startswith(GROUPING_AT_RULES):
+                nested = map_selectors(body, rewrite, keep_at_rules)
+                if nested:
+                    rules.append(f"{prelude} {{\n{nested}\n}}")
+            elif keep_at_rules:
+                rules.append(prelude if body is None else f"{prelude} {{{body}}}")
+            continue
+        if body is None:
+            continue
+
+        selectors = [rewrite(selector.strip()) for selector in split_top_level(prelude)
+                     if selector.strip()]
+        selectors = [selector for selector in selectors if selector]
+        if selectors:
+            rules.append(f"{', '.join(selectors)} {{{body}}}")
+    return '\n'.join(rules)
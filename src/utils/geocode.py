@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Slate Dashboard Geocoding Cache
+===============================
+
+Persistent location-resolution cache shared by the weather, forecast and
+radar widgets. A location string (ZIP code or city name) is resolved to
+latitude/longitude/name through the OpenWeatherMap geocoding API once and
+then served from disk forever; only successful lookups are stored.
+
+Widget ``generateData`` blocks receive :func:`resolve_location` as
+``geocode`` in their namespace.
+"""
+
+import threading
+from typing import Any, Dict, Optional
+
+from .cache import JSONCache
+from .http_client import http
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_BASE_URL = "https://api.openweathermap.org"
+
+_cache: Optional[JSONCache] = None
+_lock = threading.Lock()
+
+
+def _get_cache() -> JSONCache:
+    global _cache
+    if _cache is None:
+        _cache = JSONCache('geocode')
+    return _cache
+
+
+def _cache_key(location: str, base_url: str) -> str:
+    key = ' '.join(location.lower().split())
+    # Lookups against another server (e.g. a fake upstream) are kept apart
+    return key if base_url == DEFAULT_BASE_URL else f"{base_url} {key}"
+
+
+def resolve_location(location: str, api_key: str, timeout: int = 10,
+                     base_url: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Resolve a ZIP code or city name to coordinates
+
+    Args:
+        location: US ZIP code or free-form city name (e.g. ``"Decatur,GA"``)
+        api_key: OpenWeatherMap API key, only used on a cache miss
+        timeout: Request timeout in seconds
+        base_url: OpenWeatherMap root URL (default ``DEFAULT_BASE_URL``)
+
+    Returns:
+        dict: ``{'lat', 'lon', 'name'}`` or None if the location can't be resolved
+    """
+    location = str(location or '').strip()
+    if not location:
+        return None
+
+    base_url = (base_url or DEFAULT_BASE_URL).rstrip('/')
+    key = _cache_key(location, base_url)
+    with _lock:
+        cached = _get_cache().get(key)
+    if cached:
+        return dict(cached)
+
+    if not api_key:
+        return None
+
+    try:
+        if location.isdigit() and len(location) == 5:
+            response = http.get(
+                f"{base_url}/geo/1.0/zip",
+                params={'zip': f"{location},US", 'appid': api_key},
+                timeout=timeout
+            )
+            response.raise_for_status()
+            data = response.json()
+        else:
+            response = http.get(
+                f"{base_url}/geo/1.0/direct",
+                params={'q': location, 'limit': 1, 'appid': api_key},
+                timeout=timeout
+            )
+            response.raise_for_status()
+            matches = response.json()
+            if not matches:
+                return None
+            data = matches[0]
+
+        resolved = {
+            'lat': data['lat'],
+            'lon': data['lon'],
+            'name': data.get('name', location)
+        }
+    except Exception as e:
+        logger.warning(f"Geocoding failed for {location}: {e}", emoji="⚠️")
+        return None
+
+    with _lock:
+        cache = _get_cache()
+        cache.set(key, resolved)
+        cache.flush()
+    return dict(resolved)
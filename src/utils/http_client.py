@@ -0,0 +1,550 @@
+#!/usr/bin/env python3
+"""
+Slate Dashboard HTTP Client
+===========================
+
+Shared fetch path for ``dataFetcher`` and ``generateData`` widget code:
+- One pooled ``requests.Session`` for the whole build
+- Singleflight request coalescing: identical GET/HEAD requests (method,
+  URL, headers and body) made concurrently or repeatedly within one build
+  share a single upstream call and its parsed response. Failed calls are
+  forgotten once they complete, so a later identical request retries
+- Streaming requests (:meth:`HttpClient.stream`) for bodies that are
+  parsed incrementally. They share the coalescing key of buffered requests:
+  a streamed body becomes the shared response once read to the end. A
+  caller that stops early reads up to ``SHARE_DRAIN_LIMIT`` more bytes to
+  get there; beyond that the connection is closed, unless another caller
+  joined in the meantime and needs the rest
+- :meth:`HttpClient.gather` to run independent calls concurrently on a
+  shared thread pool
+- Per host+credential rate limits (:mod:`utils.rate_limit`); when a
+  budget is exhausted, or the upstream answers 429, the last successful
+  response to the same request is served from disk instead (streamed or not)
+- Record/replay of upstream traffic for offline builds
+  (``SLATE_HTTP_MODE``, see :mod:`utils.cassette`)
+- A pluggable transport (:meth:`HttpClient.set_transport`), so generateData
+  workers send their requests through the build process's client and share
+  its coalescing, rate limits and cassettes
+
+Call :func:`reset` at the start of a build to drop the previous build's
+responses. Responses are shared between callers and must be treated as
+read-only.
+"""
+
+import base64
+import hashlib
+import json as jsonlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .cache import load_json, save_json
+from .cassette import CassetteAdapter, get_mode
+from .logging_config import get_logger
+from .rate_limit import RateLimiter
+
+logger = get_logger(__name__)
+
+DEFAULT_TIMEOUT = 10
+POOL_SIZE = 16
+# Methods without side effects; others always reach the upstream
+COALESCED_METHODS = ('GET', 'HEAD')
+FALLBACK_DIR = 'http-fallback'
+# Read size when the rest of a streamed body is needed at once
+DRAIN_CHUNK_SIZE = 64 * 1024
+# How much of a streamed body left unread is still fetched so it can be shared
+SHARE_DRAIN_LIMIT = 1024 * 1024
+
+
+class RateLimitExceeded(requests.RequestException):
+    """The request budget for a host is exhausted and nothing is cached"""
+
+
+class SharedResponse:
+    """Fully-read HTTP response whose parsed JSON body is computed once"""
+
+    def __init__(self, status_code: int, headers: Dict[str, str], url: str, reason: str,
+                 content: bytes, encoding: Optional[str], from_cache: bool = False):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.url = url
+        self.reason = reason
+        self.content = content
+        self.encoding = encoding
+        # True when served from the rate-limit fallback store
+        self.from_cache = from_cache
+        self._json = None
+        self._json_parsed = False
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Sent to generateData workers; the lock can't be pickled
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_response(cls, response: requests.Response) -> 'SharedResponse':
+        return cls(response.status_code, response.headers, response.url, response.reason,
+                   response.content, response.encoding)
+
+    @classmethod
+    def from_cache_entry(cls, entry: Dict[str, Any]) -> 'SharedResponse':
+        return cls(entry['status_code'], entry['headers'], entry['url'], entry['reason'],
+                   base64.b64decode(entry['content']), entry['encoding'], from_cache=True)
+
+    def to_cache_entry(self) -> Dict[str, Any]:
+        return {
+            'status_code': self.status_code,
+            'headers': dict(self.headers),
+            'url': self.url,
+            'reason': self.reason,
+            'content': base64.b64encode(self.content).decode('ascii'),
+            'encoding': self.encoding
+        }
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def json(self) -> Any:
+        with self._lock:
+            if not self._json_parsed:
+                self._json = jsonlib.loads(self.content)
+                self._json_parsed = True
+        return self._json
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error: {self.reason} for url: {self.url}")
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        """Yield the body in chunks, like :meth:`requests.Response.iter_content`"""
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+
+class StreamedResponse:
+    """Upstream response whose body is read as it is consumed, and kept"""
+
+    def __init__(self, response: requests.Response, bucket: Optional[Hashable]):
+        self.response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = response.url
+        self.reason = response.reason
+        self.encoding = response.encoding
+        # Rate limit bucket, to store the fallback copy once the body is read
+        self.bucket = bucket
+        self.exhausted = False
+        self._chunks: List[bytes] = []
+        self._source: Optional[Iterator[bytes]] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def raise_for_status(self) -> None:
+        self.response.raise_for_status()
+
+    def _pull(self, chunk_size: int) -> bool:
+        """Read one more chunk from the upstream; False at the end of the body"""
+        if self.exhausted:
+            return False
+        if self._source is None:
+            self._source = self.response.iter_content(chunk_size=chunk_size)
+        for chunk in self._source:
+            self._chunks.append(chunk)
+            return True
+        self.exhausted = True
+        return False
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        """Yield the body in chunks from the start, reading the upstream as needed"""
+        index = 0
+        while index < len(self._chunks) or self._pull(chunk_size):
+            yield self._chunks[index]
+            index += 1
+
+    def drain(self, limit: int) -> bool:
+        """Read on until the end of the body or ``limit`` bytes; True at the end"""
+        read = 0
+        while read <= limit and self._pull(DRAIN_CHUNK_SIZE):
+            read += len(self._chunks[-1])
+        return self.exhausted
+
+    @property
+    def content(self) -> bytes:
+        """The whole body (reads whatever is left of it)"""
+        while self._pull(DRAIN_CHUNK_SIZE):
+            pass
+        return b''.join(self._chunks)
+
+    def json(self) -> Any:
+        return jsonlib.loads(self.content)
+
+    def to_shared(self) -> SharedResponse:
+        return SharedResponse(self.status_code, self.headers, self.url, self.reason,
+                              self.content, self.encoding)
+
+    def close(self) -> None:
+        self.response.close()
+
+
+class _Call(Future):
+    """A coalesced upstream call"""
+
+    def __init__(self):
+        super().__init__()
+        # Callers that joined while it was in flight
+        self.joined = 0
+
+
+class HttpClient:
+    """Pooled HTTP client with per-build singleflight request coalescing"""
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.mode = get_mode()
+        if self.mode == 'live':
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        else:
+            adapter = CassetteAdapter(self.mode, pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            logger.info(f"HTTP {self.mode} mode: cassettes in {adapter.cassette_dir}", emoji="📼")
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._transport: Optional[Callable[..., SharedResponse]] = None
+        # Replayed responses never reach the upstream, so they cost no budget
+        self.limiter = RateLimiter(rules={} if self.mode == 'replay' else None)
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+        self.limited_calls = 0
+
+    def reset(self) -> None:
+        """Forget all responses from the previous build"""
+        with self._lock:
+            self._calls = {}
+            self.upstream_calls = 0
+            self.coalesced_calls = 0
+            self.limited_calls = 0
+
+    def set_transport(self, transport: Optional[Callable[..., SharedResponse]]) -> None:
+        """
+        Hand :meth:`request` calls to ``transport`` instead of sending them
+
+        Args:
+            transport: Called as ``transport(method, url, params=..., headers=...,
+                json=..., data=..., timeout=...)``; None restores direct sending
+        """
+        self._transport = transport
+
+    @staticmethod
+    def _request_key(method: str, url: str, headers: Optional[Dict[str, Any]],
+                     body: Optional[bytes]) -> Tuple:
+        header_items = tuple(sorted(
+            (str(k).lower(), str(v)) for k, v in (headers or {}).items()
+        ))
+        return (method, url, header_items, body)
+
+    def _prepare(self, method: str, url: str, params: Optional[Dict[str, Any]],
+                 headers: Optional[Dict[str, Any]], json: Any,
+                 data: Any) -> Tuple[requests.PreparedRequest, Tuple]:
+        """Prepare a request and compute its coalescing key"""
+        prepared = self.session.prepare_request(requests.Request(
+            method, url, params=params, headers=headers, json=json, data=data
+        ))
+        body = prepared.body.encode('utf-8') if isinstance(prepared.body, str) else prepared.body
+        return prepared, self._request_key(method, prepared.url, headers, body)
+
+    def _join(self, key: Tuple) -> Tuple[_Call, bool]:
+        """Return the call for ``key`` and whether the caller owns (must make) it"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self.upstream_calls += 1
+                return call, True
+            if not call.done():
+                call.joined += 1
+            self.coalesced_calls += 1
+            return call, False
+
+    def request(self, method: str, url: str, params: Optional[Dict[str, Any]] = None,
+                headers: Optional[Dict[str, Any]] = None, json: Any = None,
+                data: Any = None, timeout: float = DEFAULT_TIMEOUT) -> SharedResponse:
+        """
+        Perform (or join) an HTTP request
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            params: Query string parameters
+            headers: Request headers
+            json: JSON request body
+            data: Raw request body (bytes, str or form dict)
+            timeout: Timeout in seconds for the upstream call
+
+        Returns:
+            SharedResponse: The (possibly shared) response
+        """
+        method = method.upper()
+        if self._transport is not None:
+            return self._transport(method, url, params=params, headers=headers,
+                                   json=json, data=data, timeout=timeout)
+        prepared, key = self._prepare(method, url, params, headers, json, data)
+
+        if method not in COALESCED_METHODS:
+            with self._lock:
+                self.upstream_calls += 1
+            return self._send(prepared, key, timeout)
+
+        call, owner = self._join(key)
+        if owner:
+            try:
+                response = self._send(prepared, key, timeout)
+            except BaseException as e:
+                self._forget(key, call)
+                call.set_exception(e)
+            else:
+                self._resolve(key, call, response)
+
+        return call.result()
+
+    def _forget(self, key: Tuple, call: _Call) -> None:
+        """Stop sharing a call; callers already waiting still get its outcome"""
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def _resolve(self, key: Tuple, call: _Call, response: SharedResponse) -> None:
+        """Hand a response to everyone sharing the call; failed ones aren't kept"""
+        if not response.ok:
+            self._forget(key, call)
+        call.set_result(response)
+
+    @staticmethod
+    def _fallback_name(key: Tuple) -> str:
+        method, url, _, body = key
+        digest = hashlib.sha256(repr((method, url, body)).encode('utf-8')).hexdigest()[:24]
+        return f"{FALLBACK_DIR}/{digest}"
+
+    def _serve_fallback(self, key: Tuple, url: str) -> SharedResponse:
+        entry = load_json(self._fallback_name(key), {})
+        host = urlsplit(url).hostname
+        if not entry:
+            raise RateLimitExceeded(f"Rate limit reached for {host} and no cached response")
+        logger.info(f"Rate limit reached for {host}, serving cached response", emoji="⏳")
+        return SharedResponse.from_cache_entry(entry)
+
+    def _send(self, prepared: requests.PreparedRequest, key: Tuple, timeout: float) -> SharedResponse:
+        """Send a request upstream, within the host's rate limit"""
+        bucket = self.limiter.bucket_key(prepared.url, prepared.headers)
+        if bucket and not self.limiter.acquire(bucket):
+            with self._lock:
+                self.upstream_calls -= 1
+                self.limited_calls += 1
+            return self._serve_fallback(key, prepared.url)
+
+        settings = self.session.merge_environment_settings(prepared.url, {}, None, None, None)
+        response = SharedResponse.from_response(self.session.send(prepared, timeout=timeout, **settings))
+
+        if bucket:
+            if response.status_code == 429:
+                self.limiter.exhaust(bucket)
+                try:
+                    return self._serve_fallback(key, prepared.url)
+                except RateLimitExceeded:
+                    return response
+            if response.ok:
+                save_json(self._fallback_name(key), response.to_cache_entry())
+        return response
+
+    def _open_stream(self, prepared: requests.PreparedRequest, key: Tuple,
+                     timeout: float) -> Any:
+        """Send a streaming request upstream, within the host's rate limit"""
+        bucket = self.limiter.bucket_key(prepared.url, prepared.headers)
+        if bucket and not self.limiter.acquire(bucket):
+            with self._lock:
+                self.upstream_calls -= 1
+                self.limited_calls += 1
+            return self._serve_fallback(key, prepared.url)
+
+        settings = self.session.merge_environment_settings(prepared.url, {}, True, None, None)
+        response = self.session.send(prepared, timeout=timeout, **settings)
+
+        if bucket and response.status_code == 429:
+            self.limiter.exhaust(bucket)
+            try:
+                cached = self._serve_fallback(key, prepared.url)
+            except RateLimitExceeded:
+                pass
+            else:
+                response.close()
+                return cached
+        return StreamedResponse(response, bucket)
+
+    def _finish_stream(self, streamed: StreamedResponse, key: Tuple, call: Optional[_Call]) -> None:
+        """Close a streamed response, sharing its body if it was (or must be) read to the end"""
+        try:
+            publish = streamed.exhausted
+            if call is not None and not publish:
+                # A short remainder is worth reading so later identical requests share it
+                try:
+                    publish = streamed.drain(SHARE_DRAIN_LIMIT)
+                except requests.RequestException:
+                    pass
+            if call is not None:
+                with self._lock:
+                    publish = publish or call.joined > 0
+                    if not publish and self._calls.get(key) is call:
+                        # Nobody waits for the rest of the body
+                        del self._calls[key]
+            if not publish:
+                return
+            try:
+                response = streamed.to_shared()
+            except BaseException as e:
+                if call is not None:
+                    self._forget(key, call)
+                    call.set_exception(e)
+                return
+            if call is not None:
+                self._resolve(key, call, response)
+            if streamed.bucket and response.ok:
+                save_json(self._fallback_name(key), response.to_cache_entry())
+        finally:
+            streamed.close()
+
+    @contextmanager
+    def stream(self, method: str, url: str, params: Optional[Dict[str, Any]] = None,
+               headers: Optional[Dict[str, Any]] = None, json: Any = None,
+               data: Any = None, timeout: float = DEFAULT_TIMEOUT) -> Iterator[Any]:
+        """
+        Perform a request whose body is read as it is consumed
+
+        GET/HEAD requests are coalesced with identical :meth:`request` and
+        :meth:`stream` calls: a caller joining one gets its buffered
+        :class:`SharedResponse`. When the ``with`` block exits before the
+        body was read to the end, at most ``SHARE_DRAIN_LIMIT`` more bytes
+        are read to share it; then the connection is released.
+
+        Yields:
+            StreamedResponse or SharedResponse: Both offer ``status_code``,
+            ``headers``, ``raise_for_status()``, ``iter_content()``,
+            ``content`` and ``json()``
+        """
+        method = method.upper()
+        if self._transport is not None:
+            yield self.request(method, url, params=params, headers=headers,
+                               json=json, data=data, timeout=timeout)
+            return
+        prepared, key = self._prepare(method, url, params, headers, json, data)
+
+        call = None
+        if method in COALESCED_METHODS:
+            call, owner = self._join(key)
+            if not owner:
+                yield call.result()
+                return
+        else:
+            with self._lock:
+                self.upstream_calls += 1
+
+        try:
+            response = self._open_stream(prepared, key, timeout)
+        except BaseException as e:
+            if call is not None:
+                self._forget(key, call)
+                call.set_exception(e)
+            raise
+
+        if isinstance(response, SharedResponse):
+            # Served from the rate-limit fallback store
+            if call is not None:
+                self._resolve(key, call, response)
+            yield response
+            return
+
+        try:
+            yield response
+        finally:
+            self._finish_stream(response, key, call)
+
+    def gather(self, *calls: Callable[[], Any], return_exceptions: bool = False) -> List[Any]:
+        """
+        Run independent calls concurrently and return their results in order
+
+        Example::
+
+            stats, status = http.gather(
+                lambda: http.get(stats_url, timeout=10).json(),
+                lambda: http.get(status_url, timeout=10).json(),
+            )
+
+        Calls run on a shared pool sized to the connection pool; they must
+        not call :meth:`gather` themselves.
+
+        Args:
+            calls: Zero-argument callables
+            return_exceptions: Return exceptions in place of results instead
+                of raising the first one
+
+        Returns:
+            list: One result per call
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=POOL_SIZE,
+                                                    thread_name_prefix='slate-gather')
+        futures = [self._executor.submit(call) for call in calls]
+
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    def get(self, url: str, **kwargs) -> SharedResponse:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> SharedResponse:
+        return self.request('POST', url, **kwargs)
+
+    def log_stats(self) -> None:
+        """Log how many upstream calls the current build made and saved"""
+        if self.upstream_calls or self.coalesced_calls or self.limited_calls:
+            message = f"HTTP: {self.upstream_calls} upstream requests, {self.coalesced_calls} coalesced"
+            if self.limited_calls:
+                message += f", {self.limited_calls} served from cache (rate limited)"
+            logger.info(message, emoji="🌐")
+
+
+# Shared client for the build process
+http = HttpClient()
+
+
+def reset() -> None:
+    """Start a new build: drop coalesced responses from the previous one"""
+    http.reset()
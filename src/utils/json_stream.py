@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Slate Dashboard Streaming JSON
+==============================
+
+Incremental parsing of the one array ``dataFetcher`` cares about. The
+response body is read chunk by chunk, the parser walks down a dotted path
+(``"response"``, ``"data.items"``) and then decodes and yields one array
+element at a time, so a consumer that stops after ``limit`` items never
+reads or materializes the rest of the document.
+
+Values skipped on the way down the path are decoded and discarded; this is
+meant for envelopes like ``{"status": ..., "response": [...]}``.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator
+
+WHITESPACE = ' \t\n\r'
+
+_decoder = json.JSONDecoder()
+
+_STRUCTURAL = re.compile(r'[\[\]{}"]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r'[\s,\]}:]')
+
+
+class JSONPathError(ValueError):
+    """The document doesn't have an array at the requested path"""
+
+
+class _ValueScanner:
+    """
+    Finds where one JSON value ends, a chunk at a time
+
+    Only string and bracket boundaries are tracked, so each character is
+    looked at once however many chunks the value spans; decoding is left
+    to ``json`` once the value is known to be complete.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.scalar = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+
+    def feed(self, text: str, pos: int = 0) -> bool:
+        """Scan ``text[pos:]``; True once the value is complete"""
+        if pos >= len(text):
+            return False
+        if not self.started:
+            self.started = True
+            self.scalar = text[pos] not in '[{"'
+        if self.scalar:
+            # Numbers and literals end at the next delimiter (or end of document)
+            return _SCALAR_END.search(text, pos) is not None
+
+        while True:
+            if self.escape:
+                if pos >= len(text):
+                    return False
+                pos += 1
+                self.escape = False
+            if self.in_string:
+                match = _STRING_SPECIAL.search(text, pos)
+                if not match:
+                    return False
+                pos = match.end()
+                if match.group() == '\\':
+                    self.escape = True
+                    continue
+                self.in_string = False
+                if self.depth == 0:
+                    return True
+            else:
+                match = _STRUCTURAL.search(text, pos)
+                if not match:
+                    return False
+                pos = match.end()
+                char = match.group()
+                if char == '"':
+                    self.in_string = True
+                elif char in '[{':
+                    self.depth += 1
+                else:
+                    self.depth -= 1
+                    if self.depth == 0:
+                        return True
+
+
+class _Reader:
+    """Text buffer over a byte-chunk iterator"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _read(self) -> str:
+        """Decode the next non-empty piece of the stream ('' once exhausted)"""
+        if self.eof:
+            return ''
+        for chunk in self._chunks:
+            text = self._utf8.decode(chunk)
+            if text:
+                return text
+        self.eof = True
+        return self._utf8.decode(b'', final=True)
+
+    def fill(self) -> bool:
+        """Append the next chunk to the buffer; False once the stream is exhausted"""
+        text = self._read()
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        return bool(text)
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at end of stream)"""
+        while True:
+            buffer = self.buffer
+            while self.pos < len(buffer) and buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(buffer):
+                return buffer[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise JSONPathError(f"Expected '{char}', found '{found or 'end of document'}'")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value"""
+        self.peek()
+        scanner = _ValueScanner()
+        if not scanner.feed(self.buffer, self.pos):
+            # Collect chunks until one completes the value, then join once
+            parts = [self.buffer[self.pos:]]
+            while True:
+                text = self._read()
+                if not text:
+                    break
+                parts.append(text)
+                if scanner.feed(text):
+                    break
+            self.buffer = ''.join(parts)
+            self.pos = 0
+        value, self.pos = _decoder.raw_decode(self.buffer, self.pos)
+        return value
+
+
+def iter_json_items(chunks: Iterable[bytes], path: str = '') -> Iterator[Any]:
+    """
+    Yield the elements of the array at ``path`` as they are parsed
+
+    Args:
+        chunks: Response body as an iterable of byte chunks
+        path: Dotted object path to the array; empty for a top-level array
+
+    Yields:
+        Decoded array elements, in document order
+
+    Raises:
+        JSONPathError: If there is no array at ``path`` (before anything is yielded)
+    """
+    reader = _Reader(chunks)
+
+    for part in (p for p in path.split('.') if p):
+        reader.expect('{')
+        while True:
+            if reader.peek() == '}':
+                raise JSONPathError(f"Key '{part}' not found")
+            key = reader.value()
+            reader.expect(':')
+            if key == part:
+                break
+            reader.value()
+            if reader.peek() == ',':
+                reader.pos += 1
+
+    reader.expect('[')
+    if reader.peek() == ']':
+        return
+
+    while True:
+        yield reader.value()
+        char = reader.peek()
+        if char == ',':
+            reader.pos += 1
+        elif char == ']':
+            return
+        else:
+            raise ValueError(f"Malformed JSON array near '{char or 'end of document'}'")
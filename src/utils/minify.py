@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Slate Dashboard Minifier
+========================
+
+Optional, pure-Python minification of a finished build:
+- HTML: drops comments, collapses whitespace between tags (removing it
+  entirely next to block-level tags) and minifies inline ``<style>`` and
+  ``<script>`` blocks; ``<pre>`` and ``<textarea>`` are left alone
+- CSS: strips comments (except ``/*! ... */``), collapses whitespace and
+  drops spaces around ``{ } ; , >`` and after ``:``
+- JS: conservative compaction only - comments, indentation and blank lines
+  are removed, but line breaks are kept so automatic semicolon insertion
+  behaves exactly as before. Strings, template literals and regex literals
+  are copied verbatim; a file the scanner can't follow is left unchanged
+
+CSS and JS results are cached by input hash under ``.slate-cache/minify/``,
+so unchanged files cost one hash per build; entries the latest build didn't
+use are deleted. HTML embeds the build timestamp and fresh widget data, so
+it is never cached.
+"""
+
+import hashlib
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .cache import get_cache_dir
+from .logging_config import get_logger
+from . import staging
+
+logger = get_logger(__name__)
+
+# Bump whenever a minifier's output changes, to invalidate the cache
+MINIFY_VERSION = 2
+CACHE_NAMESPACE = 'minify'
+
+
+# --- CSS -------------------------------------------------------------------
+
+_CSS_TOKENS = re.compile(
+    r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')'   # strings
+    r'|(/\*!.*?\*/)'                               # preserved comments
+    r'|(/\*.*?\*/)',                               # comments
+    re.DOTALL
+)
+_CSS_SPACE_AROUND = re.compile(r'\s*([{};,>])\s*')
+_CSS_SPACE_AFTER_COLON = re.compile(r':\s+')
+# "property :value" in a declaration block: a name right after "{" or ";"
+# whose value runs to ";" or "}" before any "{" (which would make it a
+# selector such as "a :hover")
+_CSS_SPACE_BEFORE_DECLARATION_COLON = re.compile(r'(?:^|(?<=[{;]))[-\w]+( ):(?=[^{};]*[;}])')
+
+
+def _compact_css(code: str) -> str:
+    code = re.sub(r'\s+', ' ', code)
+    code = _CSS_SPACE_AROUND.sub(r'\1', code)
+    code = _CSS_SPACE_AFTER_COLON.sub(':', code)
+    return code.replace(' !important', '!important')
+
+
+def minify_css(source: str) -> str:
+    """Minify a stylesheet"""
+    parts = []
+    code = ''
+    position = 0
+    for match in _CSS_TOKENS.finditer(source):
+        code += source[position:match.start()]
+        position = match.end()
+        string, preserved, _ = match.groups()
+        if string is None and preserved is None:
+            code += ' '
+            continue
+        parts.append(_compact_css(code))
+        parts.append(string or preserved)
+        code = ''
+    parts.append(_compact_css(code + source[position:]))
+    css = ''.join(parts)
+
+    # Strings and comments are masked so only code decides what is a declaration
+    masked = ''.join(part if index % 2 == 0 else '"' * len(part) for index, part in enumerate(parts))
+    spaces = [match.start(1) for match in _CSS_SPACE_BEFORE_DECLARATION_COLON.finditer(masked)]
+    for index in reversed(spaces):
+        css = css[:index] + css[index + 1:]
+    return css.replace(';}', '}').strip()
+
+
+# --- JS --------------------------------------------------------------------
+
+_WORD_CHAR = re.compile(r'[\w$\x80-\uffff]')
+# After these (or at the start), "/" begins a regex literal, not a division
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new',
+                   'delete', 'void', 'throw', 'yield', 'await', 'instanceof'}
+# A line break right after these (or right before "}") is never significant
+_NEWLINE_DROP_AFTER = set('{(;,[')
+
+
+def _skip_string(source: str, i: int) -> int:
+    """Index just past the quoted string starting at ``i``"""
+    quote = source[i]
+    i += 1
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == quote:
+            return i + 1
+        if char == '\n':
+            break
+        i += 1
+    raise ValueError(f"unterminated string at offset {i}")
+
+
+def _skip_template(source: str, i: int) -> int:
+    """Index just past the template literal starting at ``i`` (handles ``${}`` nesting)"""
+    i += 1
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+        elif char == '`':
+            return i + 1
+        elif source.startswith('${', i):
+            i = _skip_braces(source, i + 2)
+        else:
+            i += 1
+    raise ValueError("unterminated template literal")
+
+
+def _skip_braces(source: str, i: int) -> int:
+    """Index just past the ``}`` closing a ``${`` expression"""
+    depth = 1
+    while i < len(source):
+        char = source[i]
+        if char in '\'"':
+            i = _skip_string(source, i)
+        elif char == '`':
+            i = _skip_template(source, i)
+        elif char == '{':
+            depth += 1
+            i += 1
+        elif char == '}':
+            depth -= 1
+            i += 1
+            if depth == 0:
+                return i
+        else:
+            i += 1
+    raise ValueError("unterminated template expression")
+
+
+def _skip_regex(source: str, i: int) -> int:
+    """Index just past the regex literal (and flags) starting at ``i``"""
+    i += 1
+    in_class = False
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '\n':
+            break
+        if char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            i += 1
+            while i < len(source) and _WORD_CHAR.match(source[i]):
+                i += 1
+            return i
+        i += 1
+    raise ValueError("unterminated regex literal")
+
+
+def _regex_allowed(out: List[str]) -> bool:
+    """Whether a "/" following the output so far starts a regex literal"""
+    text = ''.join(out[-3:]).rstrip()
+    if not text:
+        return True
+    if text[-1] in _REGEX_PRECEDERS:
+        return True
+    word = re.search(r'[\w$]+$', ''.join(out[-8:]))
+    return bool(word) and word.group() in _REGEX_KEYWORDS
+
+
+def _needs_space(before: str, after: str) -> bool:
+    """Whether a run of spaces between two characters must be kept"""
+    if _WORD_CHAR.match(before) and _WORD_CHAR.match(after):
+        return True
+    if before in '+-' and after in '+-':
+        return True
+    if before == '/' or after == '/':
+        return True
+    return before.isdigit() and after == '.'
+
+
+def minify_js(source: str) -> str:
+    """
+    Conservatively compact a script
+
+    Raises:
+        ValueError: If a string, template, regex or comment is unterminated
+            (the scanner lost track, so the script must be kept as-is)
+    """
+    out: List[str] = []
+    i = 0
+    length = len(source)
+    while i < length:
+        char = source[i]
+
+        if char in ' \t\r\n\f\v':
+            start = i
+            while i < length and source[i] in ' \t\r\n\f\v':
+                i += 1
+            if not out or i >= length:
+                continue
+            previous = out[-1][-1]
+            if '\n' in source[start:i]:
+                if previous != '\n' and previous not in _NEWLINE_DROP_AFTER and source[i] != '}':
+                    out.append('\n')
+            elif previous != '\n' and _needs_space(previous, source[i]):
+                out.append(' ')
+            continue
+
+        if char == '/' and source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            if end < 0:
+                raise ValueError("unterminated comment")
+            if source.startswith('/*!', i):
+                out.append(source[i:end + 2])
+            elif out and '\n' in source[i:end]:
+                # Keep the line break a multi-line comment may stand in for
+                if out[-1][-1] not in _NEWLINE_DROP_AFTER and out[-1][-1] != '\n':
+                    out.append('\n')
+            elif out and out[-1][-1] != ' ' and i + 2 < length:
+                out.append(' ')
+            i = end + 2
+            continue
+
+        if char == '/' and source.startswith('//', i):
+            end = source.find('\n', i)
+            i = length if end < 0 else end
+            continue
+
+        if char in '\'"':
+            end = _skip_string(source, i)
+        elif char == '`':
+            end = _skip_template(source, i)
+        elif char == '/' and _regex_allowed(out):
+            end = _skip_regex(source, i)
+        else:
+            end = i + 1
+            while end < length and _WORD_CHAR.match(source[end]):
+                end += 1
+        out.append(source[i:end])
+        i = end
+
+    # A trailing space after a comment can be left over; line breaks stay
+    return re.sub(r' +\n', '\n', ''.join(out)).strip()
+
+
+# --- HTML ------------------------------------------------------------------
+
+_HTML_TOKENS = re.compile(
+    r'(?P<comment><!--(?!\[if).*?-->)'
+    r'|(?P<raw><(?P<raw_tag>script|style|pre|textarea)\b[^>]*>.*?</(?P=raw_tag)\s*>)'
+    r'|(?P<tag><[^>]+>)',
+    re.DOTALL | re.IGNORECASE
+)
+_TAG_NAME = re.compile(r'</?\s*([a-zA-Z][\w-]*)')
+_BLOCK_TAGS = {
+    'html', 'head', 'body', 'title', 'meta', 'link', 'script', 'style', 'base',
+    'div', 'section', 'header', 'footer', 'main', 'nav', 'article', 'aside',
+    'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'li', 'dl', 'dt', 'dd',
+    'table', 'thead', 'tbody', 'tfoot', 'tr', 'td', 'th', 'form', 'fieldset',
+    'select', 'option', 'optgroup', 'pre', 'hr', 'br', 'noscript', 'template',
+    'figure', 'figcaption', 'blockquote', 'address', 'details', 'summary', 'canvas',
+}
+_JS_TYPES = {'', 'text/javascript', 'application/javascript', 'module'}
+
+
+def _is_block(token: str) -> bool:
+    if token.startswith('<!'):
+        return True
+    match = _TAG_NAME.match(token)
+    return bool(match) and match.group(1).lower() in _BLOCK_TAGS
+
+
+def _minify_raw(block: str, tag: str) -> str:
+    """Minify the body of an inline ``<style>`` or ``<script>`` element"""
+    open_end = block.index('>') + 1
+    close_start = block.lower().rindex('</')
+    opening, body, closing = block[:open_end], block[open_end:close_start], block[close_start:]
+    if tag == 'style':
+        body = minify_css(body)
+    elif tag == 'script':
+        script_type = re.search(r'\btype\s*=\s*["\']?([^"\'\s>]*)', opening, re.IGNORECASE)
+        if (script_type.group(1).lower() if script_type else '') not in _JS_TYPES or not body.strip():
+            return block
+        try:
+            body = minify_js(body)
+        except ValueError as e:
+            logger.debug(f"Left inline script unminified: {e}")
+            return block
+    return opening + body + closing
+
+
+def minify_html(source: str) -> str:
+    """Minify an HTML document"""
+    tokens: List[Tuple[str, str]] = []   # (kind, text) with kind 'text' or 'tag'
+    position = 0
+    for match in _HTML_TOKENS.finditer(source):
+        tokens.append(('text', source[position:match.start()]))
+        position = match.end()
+        if match.group('comment'):
+            continue
+        if match.group('raw'):
+            tokens.append(('tag', _minify_raw(match.group('raw'), match.group('raw_tag').lower())))
+        else:
+            tokens.append(('tag', match.group('tag')))
+    tokens.append(('text', source[position:]))
+
+    # Merge text split by removed comments
+    merged: List[Tuple[str, str]] = []
+    for kind, text in tokens:
+        if kind == 'text' and merged and merged[-1][0] == 'text':
+            merged[-1] = ('text', merged[-1][1] + text)
+        else:
+            merged.append((kind, text))
+
+    out = []
+    for index, (kind, text) in enumerate(merged):
+        if kind == 'tag':
+            out.append(text)
+            continue
+        text = re.sub(r'\s+', ' ', text)
+        if index == 0 or _is_block(merged[index - 1][1]):
+            text = text.lstrip()
+        if index == len(merged) - 1 or _is_block(merged[index + 1][1]):
+            text = text.rstrip()
+        out.append(text)
+    return ''.join(out)
+
+
+# --- Build integration -----------------------------------------------------
+
+MINIFIERS: Dict[str, Callable[[str], str]] = {
+    '.html': minify_html,
+    '.css': minify_css,
+    '.js': minify_js,
+}
+# Unique to every build: caching it would only grow the cache
+UNCACHED_SUFFIXES = {'.html'}
+
+
+def _cache_file(source: str, suffix: str) -> Path:
+    digest = hashlib.sha256(f"{MINIFY_VERSION}{suffix}\0{source}".encode('utf-8')).hexdigest()[:32]
+    return get_cache_dir(CACHE_NAMESPACE) / f"{digest}{suffix}"
+
+
+def minify_cached(source: str, suffix: str) -> str:
+    """
+    Minify ``source`` with the minifier for ``suffix``, cached by input hash
+
+    Raises:
+        ValueError: If the minifier can't handle the input (see :func:`minify_js`)
+    """
+    if suffix in UNCACHED_SUFFIXES:
+        return MINIFIERS[suffix](source)
+    cache_file = _cache_file(source, suffix)
+    try:
+        return cache_file.read_text(encoding='utf-8')
+    except OSError:
+        pass
+    minified = MINIFIERS[suffix](source)
+    try:
+        staging.replace_file(cache_file, minified)
+    except OSError as e:
+        logger.debug(f"Could not cache minified output: {e}")
+    return minified
+
+
+def minify_tree(directory: Path, previous_dir: Optional[Path] = None) -> List[Tuple[str, int, int]]:
+    """
+    Minify every HTML, CSS and JS file of a build in place
+
+    Files are replaced (never rewritten in place) and hardlinked from the
+    previous release when the minified output is identical to it.
+
+    Args:
+        directory: Build directory
+        previous_dir: The previous release, if any
+
+    Returns:
+        list: ``(relative path, bytes before, bytes after)`` per file
+    """
+    reports = []
+    used = set()
+    for path in sorted(directory.rglob('*')):
+        if path.suffix not in MINIFIERS or not path.is_file() or '.min.' in path.name:
+            continue
+        relative = path.relative_to(directory)
+        source = path.read_bytes()
+        try:
+            text = source.decode('utf-8')
+            if path.suffix not in UNCACHED_SUFFIXES:
+                used.add(_cache_file(text, path.suffix).name)
+            minified = minify_cached(text, path.suffix).encode('utf-8')
+        except (UnicodeDecodeError, ValueError) as e:
+            logger.warning(f"Left {relative} unminified: {e}", emoji="⚠️")
+            minified = source
+        if minified != source:
+            previous = previous_dir / relative if previous_dir is not None else None
+            staging.stage_content(minified, path, previous)
+        reports.append((relative.as_posix(), len(source), len(minified)))
+
+    _prune_cache(used)
+    return reports
+
+
+def _prune_cache(used: set) -> None:
+    """Delete cached results that the build just minified didn't use"""
+    for cache_file in get_cache_dir(CACHE_NAMESPACE).iterdir():
+        if cache_file.name not in used and not cache_file.name.startswith('.'):
+            try:
+                cache_file.unlink()
+            except OSError:
+                pass
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Slate Dashboard Upstream Rate Limiter
+=====================================
+
+Token buckets keyed by upstream host and credential (API key, token or
+Authorization header), persisted in the Slate cache so the budget holds
+across build processes, generateData workers and rapid rebuilds from
+``scripts/auto-rebuild.py``.
+
+Rules are ``[calls, seconds]`` windows per host; a request must fit in
+every window of its host. Defaults cover the OpenWeatherMap free tier and
+can be replaced per host with ``SLATE_RATE_LIMITS``, e.g.::
+
+    SLATE_RATE_LIMITS='{"api.openweathermap.org": [[60, 60], [1000, 86400]]}'
+
+Hosts without rules are never limited.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from .cache import get_cache_dir, load_json, save_json
+from .logging_config import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: buckets are only consistent within a process
+    fcntl = None
+
+logger = get_logger(__name__)
+
+DEFAULT_RULES: Dict[str, List[List[float]]] = {
+    'api.openweathermap.org': [[60, 60], [1000, 86400]],
+}
+
+CREDENTIAL_PARAMS = ('appid', 'apikey', 'api_key', 'key', 'token', 'access_token')
+CREDENTIAL_HEADERS = ('authorization', 'x-api-key')
+
+STATE_NAMESPACE = 'rate-limits'
+
+
+def load_rules() -> Dict[str, List[List[float]]]:
+    """Return the default rules with ``SLATE_RATE_LIMITS`` overrides applied"""
+    rules = dict(DEFAULT_RULES)
+    override = os.getenv('SLATE_RATE_LIMITS')
+    if override:
+        try:
+            rules.update(json.loads(override))
+        except ValueError as e:
+            logger.warning(f"Ignoring invalid SLATE_RATE_LIMITS: {e}", emoji="⚠️")
+    return rules
+
+
+class RateLimiter:
+    """Persistent multi-window token buckets"""
+
+    def __init__(self, rules: Optional[Dict[str, List[List[float]]]] = None):
+        self.rules = load_rules() if rules is None else rules
+        self._lock = threading.Lock()
+
+    def bucket_key(self, url: str, headers: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Identify the bucket a request draws from
+
+        Returns:
+            str: Opaque key (the credential only enters it hashed), or None
+            if the host is not rate limited
+        """
+        parts = urlsplit(url)
+        host = (parts.hostname or '').lower()
+        if host not in self.rules:
+            return None
+
+        credential = ''
+        for name, value in parse_qsl(parts.query):
+            if name.lower() in CREDENTIAL_PARAMS:
+                credential = value
+                break
+        if not credential:
+            for name, value in (headers or {}).items():
+                if name.lower() in CREDENTIAL_HEADERS:
+                    credential = str(value)
+                    break
+
+        digest = hashlib.sha256(credential.encode('utf-8')).hexdigest()[:16]
+        return f"{host}:{digest}"
+
+    @contextmanager
+    def _state(self) -> Iterator[Dict[str, Any]]:
+        """Read-modify-write the bucket state under a cross-process lock"""
+        with self._lock:
+            lock_path = get_cache_dir() / f"{STATE_NAMESPACE}.lock"
+            with open(lock_path, 'a') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    state = load_json(STATE_NAMESPACE, {})
+                    yield state
+                    save_json(STATE_NAMESPACE, state)
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _levels(self, key: str, buckets: Dict[str, Any], now: float) -> Dict[str, float]:
+        host = key.split(':', 1)[0]
+        levels = {}
+        for calls, seconds in sorted(self.rules[host], key=lambda rule: rule[1]):
+            window = f"{calls:g}/{seconds:g}"
+            bucket = buckets.get(window, {'tokens': calls, 'at': now})
+            elapsed = max(0.0, now - bucket['at'])
+            levels[window] = min(calls, bucket['tokens'] + elapsed * calls / seconds)
+        return levels
+
+    def acquire(self, key: str) -> bool:
+        """
+        Take one token from every window of a bucket
+
+        Returns:
+            bool: False if any window is exhausted (nothing is taken then)
+        """
+        now = time.time()
+        with self._state() as state:
+            buckets = state.setdefault(key, {})
+            levels = self._levels(key, buckets, now)
+            allowed = all(tokens >= 1 for tokens in levels.values())
+            for window, tokens in levels.items():
+                buckets[window] = {'tokens': tokens - 1 if allowed else tokens, 'at': now}
+        return allowed
+
+    def exhaust(self, key: str) -> None:
+        """Empty the shortest window after the upstream answered 429"""
+        now = time.time()
+        with self._state() as state:
+            buckets = state.setdefault(key, {})
+            levels = self._levels(key, buckets, now)
+            for index, (window, tokens) in enumerate(levels.items()):
+                buckets[window] = {'tokens': 0 if index == 0 else tokens, 'at': now}
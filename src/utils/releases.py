@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Slate Dashboard Releases
+========================
+
+Every build is written to its own directory under ``releases/`` and
+published by atomically replacing the ``dist`` symlink, so ``serve.py``
+always sees a complete build and there is no window without ``dist``:
+
+    releases/.building-<id>/   build in progress (never served)
+    releases/<id>/             finished build
+    dist -> releases/<id>      the published build
+
+The newest ``SLATE_KEEP_RELEASES`` releases (default 5) are kept for
+instant rollback; older ones are renamed out of the way and deleted on a
+background thread.
+
+Where symlinks can't be created (e.g. Windows without developer mode),
+:func:`publish_release` returns False and the caller moves the release
+into ``dist`` instead.
+"""
+
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_KEEP = int(os.getenv('SLATE_KEEP_RELEASES', '5'))
+STAGING_PREFIX = '.building-'
+TRASH_PREFIX = '.trash-'
+
+_symlinks_supported: Optional[bool] = None
+
+
+def symlinks_supported(directory: Path) -> bool:
+    """Check once per process whether symlinks can be created in ``directory``"""
+    global _symlinks_supported
+    if _symlinks_supported is None:
+        probe = directory / f".symlink-probe-{os.getpid()}"
+        try:
+            os.symlink('.', probe)
+            os.unlink(probe)
+            _symlinks_supported = True
+        except (OSError, NotImplementedError, AttributeError):
+            _symlinks_supported = False
+    return _symlinks_supported
+
+
+def _new_build_id(releases_dir: Path, now: Optional[float] = None) -> str:
+    """Sortable, unique release name: ``YYYYmmdd-HHMMSS-mmm``"""
+    now = time.time() if now is None else now
+    build_id = time.strftime('%Y%m%d-%H%M%S', time.localtime(now)) + f"-{int(now * 1000) % 1000:03d}"
+    suffix = 0
+    candidate = build_id
+    while (releases_dir / candidate).exists() or (releases_dir / f"{STAGING_PREFIX}{candidate}").exists():
+        suffix += 1
+        candidate = f"{build_id}-{suffix}"
+    return candidate
+
+
+def begin_release(releases_dir: Path) -> Path:
+    """
+    Create the staging directory for a new build
+
+    Returns:
+        Path: ``releases/.building-<id>``; pass it to :func:`finish_release`
+    """
+    releases_dir.mkdir(parents=True, exist_ok=True)
+    staging_dir = releases_dir / f"{STAGING_PREFIX}{_new_build_id(releases_dir)}"
+    staging_dir.mkdir()
+    return staging_dir
+
+
+def finish_release(staging_dir: Path) -> Path:
+    """Turn a completed staging directory into a release and return its path"""
+    release_dir = staging_dir.with_name(staging_dir.name[len(STAGING_PREFIX):])
+    os.rename(staging_dir, release_dir)
+    return release_dir
+
+
+def abort_release(staging_dir: Path) -> None:
+    """Discard a failed build"""
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def list_releases(releases_dir: Path) -> List[Path]:
+    """Finished releases, oldest first"""
+    if not releases_dir.exists():
+        return []
+    return sorted(
+        (path for path in releases_dir.resolve().iterdir() if path.is_dir() and not path.name.startswith('.')),
+        key=lambda path: path.name
+    )
+
+
+def current_release(dist_dir: Path) -> Optional[Path]:
+    """The release ``dist`` points at, or None if ``dist`` is not a symlink"""
+    if not dist_dir.is_symlink():
+        return None
+    return (dist_dir.parent / os.readlink(dist_dir)).resolve()
+
+
+def _point_dist_at(dist_dir: Path, release_dir: Path) -> None:
+    """Atomically (re)point the ``dist`` symlink at a release"""
+    target = os.path.relpath(release_dir, dist_dir.parent)
+    temp_link = dist_dir.with_name(f".{dist_dir.name}-{os.getpid()}-{threading.get_ident()}.link")
+    if temp_link.is_symlink():
+        temp_link.unlink()
+    os.symlink(target, temp_link, target_is_directory=True)
+    try:
+        os.replace(temp_link, dist_dir)
+    except OSError:
+        temp_link.unlink()
+        raise
+
+
+def publish_release(release_dir: Path, dist_dir: Path, keep: int = DEFAULT_KEEP) -> bool:
+    """
+    Serve a finished release as ``dist``
+
+    Args:
+        release_dir: Directory returned by :func:`finish_release`
+        dist_dir: Path of the published ``dist`` link
+        keep: Number of releases to keep for rollback
+
+    Returns:
+        bool: False if symlinks are unavailable and nothing was published
+    """
+    releases_dir = release_dir.parent
+    if not symlinks_supported(releases_dir):
+        return False
+
+    if dist_dir.exists() and not dist_dir.is_symlink():
+        # One-time migration: keep the old directory build as a release
+        built_at = dist_dir.stat().st_mtime
+        legacy_dir = releases_dir / f"{_new_build_id(releases_dir, built_at)}-legacy"
+        os.rename(dist_dir, legacy_dir)
+        logger.info("Moved existing dist/ into releases", release=legacy_dir.name, emoji="📦")
+
+    _point_dist_at(dist_dir, release_dir)
+    collect_garbage(releases_dir, dist_dir, keep)
+    return True
+
+
+def rollback(dist_dir: Path, releases_dir: Path, steps: int = 1) -> Optional[Path]:
+    """
+    Point ``dist`` at an older release
+
+    Args:
+        dist_dir: Path of the published ``dist`` link
+        releases_dir: Releases directory
+        steps: How many releases to go back from the current one
+
+    Returns:
+        Path: The release now served, or None if there is nothing to roll back to
+
+    Raises:
+        ValueError: If ``steps`` is less than 1
+    """
+    if steps < 1:
+        raise ValueError(f"Can't roll back {steps} releases")
+    releases = list_releases(releases_dir)
+    current = current_release(dist_dir)
+    if current not in releases:
+        return None
+    index = releases.index(current) - steps
+    if index < 0:
+        return None
+    _point_dist_at(dist_dir, releases[index])
+    return releases[index]
+
+
+def collect_garbage(releases_dir: Path, dist_dir: Path, keep: int = DEFAULT_KEEP) -> threading.Thread:
+    """
+    Delete all but the newest ``keep`` releases on a background thread
+
+    The served release is never deleted. Victims are renamed to hidden
+    trash directories first, so a partially deleted release is never
+    listed. The thread is not a daemon: a one-shot build waits for it at
+    exit instead of leaving half-deleted trees behind.
+    """
+    current = current_release(dist_dir)
+    releases = list_releases(releases_dir)
+    victims = [path for path in releases[:max(len(releases) - keep, 0)] if path != current]
+
+    trash = []
+    for path in victims:
+        trash_path = releases_dir / f"{TRASH_PREFIX}{path.name}"
+        try:
+            os.rename(path, trash_path)
+            trash.append(trash_path)
+        except OSError as e:
+            logger.warning(f"Could not retire release {path.name}: {e}", emoji="⚠️")
+    # Leftovers from an interrupted collection
+    trash.extend(p for p in releases_dir.glob(f"{TRASH_PREFIX}*") if p not in trash)
+    # Staging directories of builds that died more than an hour ago
+    trash.extend(p for p in releases_dir.glob(f"{STAGING_PREFIX}*") if time.time() - p.stat().st_mtime > 3600)
+
+    def remove():
+        for path in trash:
+            shutil.rmtree(path, ignore_errors=True)
+        if trash:
+            logger.debug(f"Removed {len(trash)} old releases")
+
+    thread = threading.Thread(target=remove, name='slate-release-gc')
+    thread.start()
+    return thread
+
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Slate Dashboard RSS Engine
+==========================
+
+Feed aggregation used by the ``rss`` widget:
+- Feeds are fetched concurrently
+- Each feed's ETag/Last-Modified is remembered and sent back as a
+  conditional request; a 304 reuses the cached entries without parsing
+- Parsed entries are cached per feed on disk; :func:`prune_feeds` drops
+  feeds no widget is configured with anymore
+- The newest-N list is produced with a heap-based k-way merge of the
+  per-feed (already sorted) entry lists, deduplicated by GUID
+"""
+
+import heapq
+import html
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .cache import JSONCache, load_json, locked_namespace, save_json
+from .http_client import http
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Matches the schema's max ``limit`` - no feed can contribute more than this
+FEED_ENTRY_CAP = 50
+SNIPPET_LENGTH = 150
+MAX_WORKERS = 8
+FEED_CACHE_NAMESPACE = 'rss-feeds'
+
+_TAG_RE = re.compile(r'<[^<]+?>')
+
+_feed_cache: Optional[JSONCache] = None
+
+
+def _get_feed_cache() -> JSONCache:
+    global _feed_cache
+    if _feed_cache is None:
+        _feed_cache = JSONCache(FEED_CACHE_NAMESPACE)
+    return _feed_cache
+
+
+def _entry_timestamp(entry) -> Optional[float]:
+    """Return the entry's publication time as a UTC epoch timestamp"""
+    parsed = getattr(entry, 'published_parsed', None) or getattr(entry, 'updated_parsed', None)
+    if not parsed:
+        return None
+    return datetime(*parsed[:6], tzinfo=timezone.utc).timestamp()
+
+
+def _parse_entries(content: bytes) -> Dict[str, Any]:
+    """Parse a feed body into cacheable entries, newest first"""
+    import feedparser
+
+    feed = feedparser.parse(content)
+    entries = []
+    for entry in feed.entries:
+        summary = getattr(entry, 'summary', '')
+        if summary:
+            summary = _TAG_RE.sub('', html.unescape(summary))
+            if len(summary) > SNIPPET_LENGTH:
+                summary = summary[:SNIPPET_LENGTH] + '...'
+        link = getattr(entry, 'link', '#')
+        title = html.unescape(getattr(entry, 'title', 'Untitled'))
+        entries.append({
+            'guid': getattr(entry, 'id', None) or link or title,
+            'title': title,
+            'url': link,
+            'summary': summary,
+            'published': _entry_timestamp(entry)
+        })
+
+    entries.sort(key=lambda e: e['published'] or 0, reverse=True)
+    return {
+        'title': getattr(feed.feed, 'title', 'Unknown Feed'),
+        'entries': entries[:FEED_ENTRY_CAP]
+    }
+
+
+def _fetch_feed(url: str, state: Dict[str, Any], timeout: int) -> Dict[str, Any]:
+    """
+    Fetch one feed, honouring its cached validators
+
+    Returns:
+        dict: New feed state; unchanged (but re-stamped) on 304 or error
+    """
+    headers = {}
+    if state.get('etag'):
+        headers['If-None-Match'] = state['etag']
+    if state.get('modified'):
+        headers['If-Modified-Since'] = state['modified']
+
+    try:
+        response = http.get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304:
+            if 'entries' in state:
+                return {**state, 'checked': time.time()}
+            # Validators without entries to reuse (e.g. a cleared cache): ask for the body
+            response = http.get(url, timeout=timeout)
+        response.raise_for_status()
+        parsed = _parse_entries(response.content)
+    except Exception as e:
+        logger.warning(f"Error fetching feed {url}: {e}", emoji="⚠️")
+        return state
+
+    return {
+        'etag': response.headers.get('ETag'),
+        'modified': response.headers.get('Last-Modified'),
+        'checked': time.time(),
+        **parsed
+    }
+
+
+def refresh_feeds(urls: List[str], timeout: int = 10) -> Dict[str, Dict[str, Any]]:
+    """
+    Refresh a set of feeds concurrently and persist their state
+
+    Args:
+        urls: Feed URLs
+        timeout: Per-request timeout in seconds
+
+    Returns:
+        dict: Feed URL to feed state (``title`` and ``entries``)
+    """
+    cache = _get_feed_cache()
+    unique_urls = list(dict.fromkeys(u for u in urls if u))
+    if not unique_urls:
+        return {}
+
+    workers = min(MAX_WORKERS, len(unique_urls))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            url: executor.submit(_fetch_feed, url, cache.get(url, {}), timeout)
+            for url in unique_urls
+        }
+        states = {url: future.result() for url, future in futures.items()}
+
+    for url, state in states.items():
+        if state:
+            cache.set(url, state)
+    cache.flush()
+    return states
+
+
+def prune_feeds(urls: Iterable[str]) -> int:
+    """
+    Drop cached feeds whose URL isn't in ``urls``
+
+    Called once per build with the feeds of every rss widget, since each
+    widget only knows its own.
+
+    Args:
+        urls: Feed URLs still configured
+
+    Returns:
+        int: Number of feeds dropped
+    """
+    global _feed_cache
+    configured = set(urls)
+    with locked_namespace(FEED_CACHE_NAMESPACE):
+        data = load_json(FEED_CACHE_NAMESPACE, {})
+        kept = {url: state for url, state in data.items() if url in configured}
+        if len(kept) < len(data):
+            save_json(FEED_CACHE_NAMESPACE, kept)
+    # Reload on next use rather than merge into a stale view
+    _feed_cache = None
+    return len(data) - len(kept)
+
+
+def _tag_entries(entries: List[Dict[str, Any]], feed_name: str,
+                 feed_category: str) -> Iterator[Dict[str, Any]]:
+    """Lazily attach feed metadata to cached entries during the merge"""
+    for entry in entries:
+        yield {**entry, 'feed_name': feed_name, 'feed_category': feed_category}
+
+
+def newest_entries(feed_entries: List[Iterable[Dict[str, Any]]], limit: int) -> List[Dict[str, Any]]:
+    """
+    Merge per-feed entry lists (each sorted newest first) into the global
+    newest ``limit`` entries, skipping duplicate GUIDs
+
+    Args:
+        feed_entries: One sorted entry list per feed
+        limit: Number of entries to return
+
+    Returns:
+        list: Up to ``limit`` entries, newest first
+    """
+    merged = heapq.merge(*feed_entries, key=lambda e: e['published'] or 0, reverse=True)
+    seen = set()
+    result = []
+    for entry in merged:
+        if entry['guid'] in seen:
+            continue
+        seen.add(entry['guid'])
+        result.append(entry)
+        if len(result) >= limit:
+            break
+    return result
+
+
+def aggregate_feeds(feeds_config: List[Dict[str, Any]], limit: int = 10,
+                    show_snippets: bool = True, show_dates: bool = True,
+                    timeout: int = 10) -> List[Dict[str, Any]]:
+    """
+    Build the rss widget's item list from its ``feeds`` configuration
+
+    Args:
+        feeds_config: List of ``{url, name, category}`` dictionaries
+        limit: Maximum number of items across all feeds
+        show_snippets: Include entry descriptions
+        show_dates: Include formatted publication dates
+        timeout: Per-request timeout in seconds
+
+    Returns:
+        list: Template-ready items, newest first
+    """
+    states = refresh_feeds([f.get('url', '') for f in feeds_config], timeout=timeout)
+
+    feed_entries = []
+    for feed_config in feeds_config:
+        state = states.get(feed_config.get('url', ''))
+        if not state or not state.get('entries'):
+            continue
+        feed_name = feed_config.get('name') or state.get('title', 'Unknown Feed')
+        feed_category = feed_config.get('category', '')
+        feed_entries.append(_tag_entries(state['entries'], feed_name, feed_category))
+
+    items = []
+    for entry in newest_entries(feed_entries, limit):
+        pub_date = None
+        if entry['published'] is not None:
+            pub_date = datetime.fromtimestamp(entry['published'], tz=timezone.utc)
+        items.append({
+            'title': entry['title'],
+            'url': entry['url'],
+            'description': entry['summary'] if show_snippets else '',
+            'date': pub_date.strftime('%m/%d %H:%M') if show_dates and pub_date else '',
+            'feed_name': entry['feed_name'],
+            'feed_category': entry['feed_category'],
+            'pub_date': pub_date
+        })
+    return items
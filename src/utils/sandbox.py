@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+Slate Dashboard generateData Sandbox
+====================================
+
+Runs widget ``generateData`` blocks in a small pool of reusable worker
+processes instead of the build process:
+- Each run has a wall-clock timeout; a worker that overruns is killed and
+  replaced, so a hung socket can't stall the build
+- Each run has an address-space cap (``RLIMIT_AS``) where the platform
+  supports it
+- The last good result of every widget is persisted and served when a run
+  times out, crashes or raises (or reports an error in its result)
+- ``http`` requests made in a worker are sent through the build process's
+  client over the worker's pipe, so identical requests from widgets on
+  different workers and from ``dataFetcher`` still share one upstream call
+
+Workers are started lazily and stay alive for the life of the process, so
+a long-running watcher (``scripts/auto-rebuild.py``) only pays the spawn
+cost once.
+
+Set ``SLATE_SANDBOX_WORKERS=0`` to execute in-process (e.g. for debugging).
+"""
+
+import atexit
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from .cache import JSONCache, WidgetCache
+from .geocode import resolve_location
+from .http_client import POOL_SIZE as HTTP_POOL_SIZE, http
+from .logging_config import get_logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = get_logger(__name__)
+
+POOL_SIZE = int(os.getenv('SLATE_SANDBOX_WORKERS', '2'))
+DEFAULT_TIMEOUT = float(os.getenv('SLATE_GENERATE_TIMEOUT', '30'))
+# Address space, not resident memory: threads and malloc arenas reserve
+# virtual memory, so the cap is deliberately generous
+DEFAULT_MEMORY_MB = int(os.getenv('SLATE_SANDBOX_MEMORY_MB', '2048'))
+# Tags for values JSON can't hold in persisted last good results
+DATETIME_TAG = '__datetime__'
+DATE_TAG = '__date__'
+
+
+class SandboxError(Exception):
+    """A generateData run failed, timed out or killed its worker"""
+
+
+def _code_scope(code: str) -> str:
+    """Short, stable identifier of a generateData block"""
+    return hashlib.sha256(code.encode('utf-8')).hexdigest()[:12]
+
+
+def build_data_namespace(config: Dict[str, Any], scope: str = 'default') -> Dict[str, Any]:
+    """
+    Build the namespace a generateData block executes in
+
+    Args:
+        config: Widget configuration
+        scope: Identifies the widget for its ``cache`` and ``logger``
+    """
+    return {
+        'config': config,
+        'geocode': resolve_location,
+        'http': http,
+        'gather': http.gather,
+        'cache': WidgetCache(f"widget-{scope}"),
+        'logger': get_logger(f"widgets.{config.get('widget_type') or scope}"),
+    }
+
+
+def run_code(code: str, config: Dict[str, Any]) -> Any:
+    """Execute a generateData block and return its ``result``"""
+    # A single namespace keeps injected helpers visible inside
+    # functions, lambdas and comprehensions defined by the widget
+    namespace = build_data_namespace(config, _code_scope(code))
+    widget_cache = namespace['cache']
+    try:
+        exec(code, namespace)
+    finally:
+        widget_cache.flush()
+    return namespace.get('result', {})
+
+
+def _set_memory_limit(memory_mb: Optional[int], default: Tuple[int, int]) -> None:
+    """Cap the address space at ``memory_mb`` (or restore ``default``)"""
+    if resource is None:
+        return
+    soft, hard = default
+    if memory_mb:
+        soft = memory_mb * 1024 * 1024
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+class _ParentChannel:
+    """
+    Worker end of the pipe
+
+    A reader thread owns ``recv``: jobs are queued for the worker loop and
+    HTTP replies resolve the request waiting for them, so requests made
+    concurrently (``gather``) are in flight together.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.jobs: "queue.Queue[Optional[Tuple]]" = queue.Queue()
+        self._pending: Dict[int, Future] = {}
+        self._ids = itertools.count()
+        self._send_lock = threading.Lock()
+        threading.Thread(target=self._read, name='slate-sandbox-reader', daemon=True).start()
+
+    def _read(self) -> None:
+        while True:
+            try:
+                message = self.conn.recv()
+            except (EOFError, OSError):
+                self.jobs.put(None)
+                for future in list(self._pending.values()):
+                    future.set_exception(SandboxError("build process went away"))
+                return
+            if message[0] == 'http':
+                _, call_id, ok, payload = message
+                future = self._pending.pop(call_id)
+                if ok:
+                    future.set_result(payload)
+                else:
+                    future.set_exception(payload)
+            else:
+                self.jobs.put(message[1])
+
+    def send(self, message: Tuple) -> None:
+        with self._send_lock:
+            self.conn.send(message)
+
+    def request(self, method: str, url: str, **kwargs) -> Any:
+        """HTTP transport: perform the request in the build process"""
+        call_id = next(self._ids)
+        future: Future = Future()
+        self._pending[call_id] = future
+        try:
+            self.send(('http', call_id, method, url, kwargs))
+        except Exception:
+            self._pending.pop(call_id, None)
+            raise
+        return future.result()
+
+
+def _worker_main(conn) -> None:
+    """
+    Worker loop
+
+    Receives ``('job', (code, config, memory_mb))`` and replies
+    ``('done', ok, result_or_error, retiring)``; in between it may send
+    ``('http', call_id, method, url, kwargs)`` requests.
+    """
+    channel = _ParentChannel(conn)
+    http.set_transport(channel.request)
+    default_limit = resource.getrlimit(resource.RLIMIT_AS) if resource else None
+    while True:
+        try:
+            job = channel.jobs.get()
+        except KeyboardInterrupt:
+            return
+        if job is None:
+            return
+        code, config, memory_mb = job
+
+        try:
+            _set_memory_limit(memory_mb, default_limit)
+            reply = (True, run_code(code, config), False)
+        except MemoryError:
+            # The heap may be fragmented past recovery; report and retire
+            reply = (False, f"memory limit of {memory_mb} MB exceeded", True)
+        except BaseException as e:
+            reply = (False, f"{type(e).__name__}: {e}", False)
+        finally:
+            _set_memory_limit(None, default_limit)
+
+        try:
+            channel.send(('done',) + reply)
+        except Exception as e:
+            channel.send(('done', False, f"result is not picklable: {e}", False))
+        if reply[2]:
+            return
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,),
+                                       name='slate-generate', daemon=True)
+        self.process.start()
+        child_conn.close()
+        self._send_lock = threading.Lock()
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def send(self, message: Tuple) -> None:
+        with self._send_lock:
+            self.conn.send(message)
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+def _picklable_error(error: BaseException) -> BaseException:
+    """An equivalent of ``error`` that survives being sent to a worker with its message"""
+    try:
+        if str(pickle.loads(pickle.dumps(error))) == str(error):
+            return error
+    except Exception:
+        pass
+    # e.g. requests exceptions wrapping urllib3 errors lose their message
+    try:
+        return type(error)(str(error))
+    except Exception:
+        return requests.RequestException(f"{type(error).__name__}: {error}")
+
+
+class SandboxPool:
+    """Pool of warm worker processes for generateData blocks"""
+
+    def __init__(self, size: int = POOL_SIZE):
+        self.size = size
+        # Fresh interpreters: no inherited sockets, locks or build state
+        self._context = multiprocessing.get_context('spawn')
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        # Performs the workers' HTTP requests with the build's client
+        self._http_executor = ThreadPoolExecutor(max_workers=HTTP_POOL_SIZE,
+                                                 thread_name_prefix='slate-sandbox-http')
+
+    def _acquire(self) -> _Worker:
+        with self._lock:
+            if self._idle.empty() and len(self._workers) < self.size:
+                worker = _Worker(self._context)
+                self._workers.append(worker)
+                return worker
+        return self._idle.get()
+
+    def _release(self, worker: _Worker) -> None:
+        if worker.alive():
+            self._idle.put(worker)
+            return
+        # Replace a worker that was killed or retired itself
+        worker.conn.close()
+        with self._lock:
+            self._workers.remove(worker)
+            replacement = _Worker(self._context)
+            self._workers.append(replacement)
+        self._idle.put(replacement)
+
+    def _proxy_http(self, worker: _Worker, call_id: int, method: str, url: str,
+                    kwargs: Dict[str, Any]) -> None:
+        """Perform a worker's HTTP request and send the response back"""
+        try:
+            reply = ('http', call_id, True, http.request(method, url, **kwargs))
+        except Exception as e:
+            reply = ('http', call_id, False, _picklable_error(e))
+        try:
+            worker.send(reply)
+        except (OSError, ValueError):
+            pass  # The worker was killed (timeout) meanwhile
+
+    def run(self, code: str, config: Dict[str, Any], timeout: float = DEFAULT_TIMEOUT,
+            memory_mb: Optional[int] = DEFAULT_MEMORY_MB) -> Any:
+        """
+        Execute a generateData block in a worker
+
+        Args:
+            code: Python source of the block
+            config: Widget configuration (must be picklable)
+            timeout: Wall-clock limit in seconds
+            memory_mb: Address-space cap in MB (None for no cap)
+
+        Returns:
+            The block's ``result``
+
+        Raises:
+            SandboxError: On timeout, worker crash or an exception in the block
+        """
+        worker = self._acquire()
+        deadline = time.monotonic() + timeout
+        try:
+            worker.send(('job', (code, config, memory_mb)))
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not worker.conn.poll(remaining):
+                    worker.kill()
+                    raise SandboxError(f"timed out after {timeout:g}s")
+                message = worker.conn.recv()
+                if message[0] == 'http':
+                    self._http_executor.submit(self._proxy_http, worker, *message[1:])
+                    continue
+                _, ok, payload, retiring = message
+                break
+            if retiring:
+                worker.process.join(timeout=5)
+        except (EOFError, OSError, BrokenPipeError):
+            worker.kill()
+            raise SandboxError("worker process died") from None
+        finally:
+            self._release(worker)
+
+        if not ok:
+            raise SandboxError(payload)
+        return payload
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for worker in self._workers:
+                worker.kill()
+            self._workers = []
+            self._idle = queue.Queue()
+        self._http_executor.shutdown(wait=False)
+
+
+_pool: Optional[SandboxPool] = None
+_last_good: Optional[JSONCache] = None
+
+
+def get_pool() -> SandboxPool:
+    global _pool
+    if _pool is None:
+        _pool = SandboxPool()
+        atexit.register(_pool.shutdown)
+    return _pool
+
+
+def _get_last_good() -> JSONCache:
+    global _last_good
+    if _last_good is None:
+        _last_good = JSONCache('generate-data')
+    return _last_good
+
+
+def _result_key(code: str, config: Dict[str, Any]) -> str:
+    identity = json.dumps([code, config], sort_keys=True, default=str)
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()[:24]
+
+
+def _reports_error(value: Any) -> bool:
+    return isinstance(value, dict) and (bool(value.get('error')) or value.get('status') == 'error')
+
+
+def _is_good(result: Any) -> bool:
+    """
+    Whether a result is worth keeping as the last good one
+
+    Widgets report failures as ``error``/``status: 'error'`` either at the
+    top level or in the dict they return under their own key (e.g.
+    ``{'pihole': {'status': 'error', ...}}``).
+    """
+    if not isinstance(result, dict):
+        return True
+    if _reports_error(result):
+        return False
+    return not any(_reports_error(value) for value in result.values())
+
+
+def _encode_result(value: Any) -> Any:
+    """
+    JSON-safe copy of a result for the last good store
+
+    Datetimes and dates (e.g. RSS ``pub_date``) are tagged so
+    :func:`_decode_result` restores them; other unknown objects are stored
+    as their ``str()``.
+    """
+    if isinstance(value, datetime):
+        return {DATETIME_TAG: value.isoformat()}
+    if isinstance(value, date):
+        return {DATE_TAG: value.isoformat()}
+    if isinstance(value, dict):
+        return {str(k): _encode_result(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode_result(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _decode_result(value: Any) -> Any:
+    """Inverse of :func:`_encode_result`"""
+    if isinstance(value, dict):
+        if len(value) == 1 and DATETIME_TAG in value:
+            return datetime.fromisoformat(value[DATETIME_TAG])
+        if len(value) == 1 and DATE_TAG in value:
+            return date.fromisoformat(value[DATE_TAG])
+        return {k: _decode_result(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode_result(v) for v in value]
+    return value
+
+
+def _remember(key: str, result: Any) -> None:
+    if not _is_good(result):
+        return
+    encoded = _encode_result(result)
+    cache = _get_last_good()
+    if cache.get(key) != encoded:
+        cache.set(key, encoded)
+        cache.flush()
+
+
+def execute_sandboxed(code: str, config: Dict[str, Any], timeout: Optional[float] = None,
+                      memory_mb: Optional[int] = None) -> Tuple[Any, bool]:
+    """
+    Run a generateData block with limits, falling back to its last good result
+
+    Args:
+        code: Python source of the block
+        config: Widget configuration
+        timeout: Wall-clock limit in seconds (default ``SLATE_GENERATE_TIMEOUT``)
+        memory_mb: Address-space cap in MB (default ``SLATE_SANDBOX_MEMORY_MB``)
+
+    Returns:
+        tuple: ``(result, fresh)``; ``fresh`` is False when the cached result was used
+
+    Raises:
+        SandboxError: If the run failed and there is no cached result
+    """
+    key = _result_key(code, config)
+
+    try:
+        if POOL_SIZE <= 0:
+            result = run_code(code, config)
+        else:
+            result = get_pool().run(code, config, timeout or DEFAULT_TIMEOUT,
+                                    memory_mb or DEFAULT_MEMORY_MB)
+    except Exception as e:
+        cached = _get_last_good().get(key)
+        if cached is None:
+            raise SandboxError(str(e)) from None
+        logger.warning(f"generateData failed ({str(e).splitlines()[0]}), using last good result", emoji="⚠️")
+        return _decode_result(cached), False
+
+    _remember(key, result)
+    return result, True
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Slate Dashboard Service Worker
+==============================
+
+Generates ``sw.js`` for a build: a service worker that precaches the
+build's files, keyed by their SHA-256, so repeat loads render from the
+local cache and the dashboard keeps displaying while the host is down.
+
+- Assets are served cache-first, looked up by path (the ``?v=`` cache
+  busting query is ignored; the content hash is the version)
+- ``index.html`` is served stale-while-revalidate: the cached page is
+  returned at once while the browser checks for a new ``sw.js``. Live
+  reload therefore waits for the new worker to take over before reloading
+- Every build changes ``sw.js``. The new worker downloads only files whose
+  hash changed, verifies them and takes over in one step, so pages and
+  assets of different builds are never mixed in the cache
+- A disabled build writes a worker that removes itself and its cache
+"""
+
+import json
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import List, Tuple
+
+from .staging import file_digest, replace_file
+
+SERVICE_WORKER_FILE = 'sw.js'
+CACHE_NAME = 'slate-precache'
+
+# Files in a build that pages never request: legacy standalone theme
+# stylesheets, the CSS bundled into css/dashboard.css and the theme preview
+PRECACHE_EXCLUDE = (
+    SERVICE_WORKER_FILE,
+    'preview.html',
+    'css/theme-*.css',
+    'css/base.css',
+    'css/base-effects.css',
+)
+
+_WORKER_TEMPLATE = """/**
+ * Slate Dashboard Service Worker
+ * Generated by the build - do not edit
+ */
+
+const CACHE_NAME = __CACHE_NAME__;
+const INDEX = 'index.html';
+
+// [path, sha256] of every precached file
+const PRECACHE = __PRECACHE__;
+
+const scope = new URL(self.registration.scope);
+const revisions = new Map(PRECACHE);
+
+function cacheKey(path) {
+  const url = new URL(path, scope);
+  url.searchParams.set('__revision', revisions.get(path));
+  return url.href;
+}
+
+async function sha256(buffer) {
+  const digest = await crypto.subtle.digest('SHA-256', buffer);
+  return Array.from(new Uint8Array(digest), byte => byte.toString(16).padStart(2, '0')).join('');
+}
+
+async function precache(cache, path) {
+  const key = cacheKey(path);
+  if (await cache.match(key)) return;
+
+  const response = await fetch(new URL(path, scope), { cache: 'reload' });
+  if (!response.ok || response.redirected) {
+    throw new Error(`Precaching ${path} failed: HTTP ${response.status}`);
+  }
+  if (await sha256(await response.clone().arrayBuffer()) !== revisions.get(path)) {
+    // A newer build was published meanwhile; its worker will take over
+    throw new Error(`${path} changed since this service worker was built`);
+  }
+  await cache.put(key, response);
+}
+
+self.addEventListener('install', event => {
+  event.waitUntil((async () => {
+    const cache = await caches.open(CACHE_NAME);
+    await Promise.all(PRECACHE.map(([path]) => precache(cache, path)));
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener('activate', event => {
+  event.waitUntil((async () => {
+    // Drop the files of previous builds
+    const cache = await caches.open(CACHE_NAME);
+    const current = new Set(PRECACHE.map(([path]) => cacheKey(path)));
+    const stale = (await cache.keys()).filter(request => !current.has(request.url));
+    await Promise.all(stale.map(request => cache.delete(request)));
+    await self.clients.claim();
+  })());
+});
+
+async function serveAsset(request, path) {
+  const cached = await caches.match(cacheKey(path), { cacheName: CACHE_NAME });
+  return cached || fetch(request);
+}
+
+async function serveIndex(event) {
+  // Revalidate: a changed page comes with a new worker, which precaches
+  // it together with its assets
+  event.waitUntil(self.registration.update());
+  const cached = await caches.match(cacheKey(INDEX), { cacheName: CACHE_NAME });
+  return cached || fetch(event.request);
+}
+
+self.addEventListener('fetch', event => {
+  const request = event.request;
+  const url = new URL(request.url);
+  if (request.method !== 'GET' || url.origin !== scope.origin || !url.pathname.startsWith(scope.pathname)) {
+    return;
+  }
+  const path = url.pathname.slice(scope.pathname.length);
+
+  if (request.mode === 'navigate') {
+    if (path === '' || path === INDEX) event.respondWith(serveIndex(event));
+    return;
+  }
+  // Other requests for the page (e.g. live reload) always go to the server
+  if (path !== INDEX && revisions.has(path)) {
+    event.respondWith(serveAsset(request, path));
+  }
+});
+"""
+
+_RETIRE_TEMPLATE = """/**
+ * Slate Dashboard Service Worker (disabled)
+ * Removes a previously installed worker and its cache
+ */
+
+self.addEventListener('install', () => self.skipWaiting());
+
+self.addEventListener('activate', event => {
+  event.waitUntil((async () => {
+    await caches.delete(__CACHE_NAME__);
+    await self.registration.unregister();
+  })());
+});
+"""
+
+
+def build_precache_manifest(build_dir: Path) -> List[Tuple[str, str]]:
+    """
+    List the files of a build to precache with their content hashes
+
+    Args:
+        build_dir: Finished build directory
+
+    Returns:
+        list: ``(relative path, sha256 hex)`` tuples, sorted by path
+    """
+    manifest = []
+    for path in sorted(build_dir.rglob('*')):
+        relative = path.relative_to(build_dir).as_posix()
+        if not path.is_file() or path.name.startswith('.'):
+            continue
+        if any(fnmatch(relative, pattern) for pattern in PRECACHE_EXCLUDE):
+            continue
+        manifest.append((relative, file_digest(path)))
+    return manifest
+
+
+def write_service_worker(build_dir: Path, enabled: bool = True) -> List[Tuple[str, str]]:
+    """
+    Write ``sw.js`` into a finished build
+
+    Must run after every other file of the build is final, since the
+    precache manifest pins their content hashes.
+
+    Args:
+        build_dir: Finished build directory
+        enabled: Write the precaching worker; if False, write a worker
+            that unregisters any installed one
+
+    Returns:
+        list: The precache manifest (empty when disabled)
+    """
+    if not enabled:
+        replace_file(build_dir / SERVICE_WORKER_FILE,
+                     _RETIRE_TEMPLATE.replace('__CACHE_NAME__', json.dumps(CACHE_NAME)))
+        return []
+
+    manifest = build_precache_manifest(build_dir)
+    precache = '[\n' + ',\n'.join(f'  {json.dumps(list(entry))}' for entry in manifest) + '\n]'
+    worker = (_WORKER_TEMPLATE
+              .replace('__CACHE_NAME__', json.dumps(CACHE_NAME))
+              .replace('__PRECACHE__', precache))
+    replace_file(build_dir / SERVICE_WORKER_FILE, worker)
+    return manifest
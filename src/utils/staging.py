@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Slate Dashboard Asset Staging
+=============================
+
+Content-addressed copying of static assets into a release directory.
+A file whose content matches the same path in the previous release is
+hardlinked from there instead of copied, so staging cost scales with what
+changed rather than with total asset size. File digests are cached by
+path, size, mtime and inode (in memory and in ``.slate-cache``), so
+unchanged files are not re-read either.
+
+Releases share inodes, so files in a release must never be rewritten in
+place: every write here, and every generated file (:func:`replace_file`),
+goes to a temporary file that is renamed over the destination.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from .cache import load_json, save_json
+
+DIGEST_NAMESPACE = 'asset-digests'
+
+_digests: Optional[Dict[str, List]] = None
+_touched: Dict[str, List] = {}
+_lock = threading.Lock()
+
+
+def _signature(stat: os.stat_result) -> List[int]:
+    return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+
+def file_digest(path: Path) -> str:
+    """
+    SHA-256 of a file, read only when its size, mtime or inode changed
+
+    Args:
+        path: File to hash
+
+    Returns:
+        str: Hex digest
+    """
+    global _digests
+    key = str(path.absolute())
+    signature = _signature(path.stat())
+    with _lock:
+        if _digests is None:
+            _digests = load_json(DIGEST_NAMESPACE, {})
+        entry = _digests.get(key)
+        if entry and entry[:3] == signature:
+            _touched[key] = entry
+            return entry[3]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    entry = signature + [digest.hexdigest()]
+    with _lock:
+        _digests[key] = entry
+        _touched[key] = entry
+    return entry[3]
+
+
+def _record_digest(path: Path, digest: str) -> None:
+    """Cache the digest of a file just written with known content"""
+    entry = _signature(path.stat()) + [digest]
+    with _lock:
+        _digests[str(path.absolute())] = entry
+        _touched[str(path.absolute())] = entry
+
+
+def flush_digests() -> None:
+    """Persist the digests used since the last flush (older entries are dropped)"""
+    global _digests
+    with _lock:
+        if not _touched:
+            return
+        save_json(DIGEST_NAMESPACE, _touched)
+        _digests = dict(_touched)
+        _touched.clear()
+
+
+def _temp_path(dest: Path) -> Path:
+    return dest.with_name(f".{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def replace_file(dest: Path, content: Union[str, bytes]) -> None:
+    """
+    Write a generated file by renaming a temporary file over ``dest``
+
+    Never truncates ``dest``, which may be a hardlink shared with an older
+    release.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content.encode('utf-8') if isinstance(content, str) else content)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, dest)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def stage_file(source: Path, dest: Path, previous: Optional[Path] = None) -> str:
+    """
+    Place ``source`` at ``dest``, reusing identical files
+
+    Args:
+        source: File to stage
+        dest: Destination path
+        previous: Same path in the previous release, if any
+
+    Returns:
+        str: ``'unchanged'`` (dest already identical), ``'linked'`` (hardlinked
+        from ``previous``) or ``'copied'``
+    """
+    digest = file_digest(source)
+    if dest.exists() and file_digest(dest) == digest:
+        return 'unchanged'
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = _temp_path(dest)
+    if previous is not None and previous.is_file() and file_digest(previous) == digest:
+        try:
+            os.link(previous, temp_path)
+            os.replace(temp_path, dest)
+            _record_digest(dest, digest)
+            return 'linked'
+        except OSError:
+            # Cross-device or no hardlink support: fall back to a copy
+            if temp_path.exists():
+                temp_path.unlink()
+
+    try:
+        shutil.copy2(source, temp_path)
+        os.replace(temp_path, dest)
+    except Exception:
+        if temp_path.exists():
+            temp_path.unlink()
+        raise
+    _record_digest(dest, digest)
+    return 'copied'
+
+
+def stage_content(content: bytes, dest: Path, previous: Optional[Path] = None) -> str:
+    """
+    Place generated ``content`` at ``dest``, reusing an identical previous file
+
+    Args:
+        content: File content
+        dest: Destination path
+        previous: Same path in the previous release, if any
+
+    Returns:
+        str: ``'linked'`` (hardlinked from ``previous``) or ``'written'``
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    if previous is not None and previous.is_file() and file_digest(previous) == digest:
+        temp_path = _temp_path(dest)
+        try:
+            os.link(previous, temp_path)
+            os.replace(temp_path, dest)
+            _record_digest(dest, digest)
+            return 'linked'
+        except OSError:
+            if temp_path.exists():
+                temp_path.unlink()
+
+    replace_file(dest, content)
+    _record_digest(dest, digest)
+    return 'written'
+
+
+def stage_tree(source_dir: Path, dest_dir: Path, previous_dir: Optional[Path] = None) -> Counter:
+    """
+    Stage every file under ``source_dir`` into ``dest_dir``
+
+    Args:
+        source_dir: Directory to stage
+        dest_dir: Destination directory
+        previous_dir: Matching directory of the previous release, if any
+
+    Returns:
+        Counter: Number of files per :func:`stage_file` outcome
+    """
+    outcomes: Counter = Counter()
+    for source in sorted(source_dir.rglob('*')):
+        if not source.is_file():
+            continue
+        relative = source.relative_to(source_dir)
+        previous = previous_dir / relative if previous_dir is not None else None
+        outcomes[stage_file(source, dest_dir / relative, previous)] += 1
+    return outcomes
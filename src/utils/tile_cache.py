@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Slate Dashboard Radar Tile Cache
+================================
+
+Size-capped, on-disk LRU cache for OpenWeatherMap map tiles. The build
+prefetches the tiles a radar widget displays and points the widget at the
+local copies; ``serve.py`` serves them from the same directory, so every
+display in the house shares one upstream fetch per tile per update interval.
+
+Recency is tracked through the file access time, which the cache and
+``serve.py`` set explicitly whenever a tile is used. The modification time
+is when the tile was fetched, and doubles as its version.
+"""
+
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .cache import get_cache_dir
+from .http_client import http
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_TILE_BASE_URL = "https://tile.openweathermap.org"
+TILE_URL_TEMPLATE = "{base_url}/map/{layer}/{z}/{x}/{y}.png?appid={api_key}"
+TILE_URL_PREFIX = "tiles"
+DEFAULT_MAX_AGE = 600
+DEFAULT_MAX_BYTES = int(os.getenv('SLATE_TILE_CACHE_MB', '64')) * 1024 * 1024
+
+_TILE_PATH_RE = re.compile(r'^/?tiles/([a-z_]+)/(\d+)/(\d+)/(\d+)\.png$')
+
+
+def get_tile_dir() -> Path:
+    """Return the tile cache directory"""
+    return get_cache_dir('tiles')
+
+
+def tile_path(layer: str, z: int, x: int, y: int) -> Path:
+    """Return the cache path of a tile"""
+    return get_tile_dir() / layer / str(z) / str(x) / f"{y}.png"
+
+
+def resolve_tile_request(url_path: str) -> Optional[Path]:
+    """
+    Map a ``/tiles/<layer>/<z>/<x>/<y>.png`` request path to a cached file
+
+    Args:
+        url_path: Request path without query string
+
+    Returns:
+        Path of the cached tile, or None if the path is not a tile path
+    """
+    match = _TILE_PATH_RE.match(url_path)
+    if not match:
+        return None
+    layer, z, x, y = match.groups()
+    return tile_path(layer, int(z), int(x), int(y))
+
+
+def touch_tile(path: Path) -> None:
+    """Mark a tile as recently used without changing its version"""
+    try:
+        stat = path.stat()
+        os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+    except OSError:
+        pass
+
+
+def _local_url(layer: str, z: int, x: int, y: int, path: Path) -> str:
+    version = int(path.stat().st_mtime)
+    return f"{TILE_URL_PREFIX}/{layer}/{z}/{x}/{y}.png?v={version}"
+
+
+def _fetch_tile(layer: str, z: int, x: int, y: int, api_key: str,
+                max_age: int, timeout: int, base_url: str) -> Optional[str]:
+    """Fetch a tile unless a fresh copy is cached; return its local URL"""
+    path = tile_path(layer, z, x, y)
+    if path.exists() and time.time() - path.stat().st_mtime < max_age:
+        touch_tile(path)
+        return _local_url(layer, z, x, y, path)
+
+    url = TILE_URL_TEMPLATE.format(base_url=base_url, layer=layer, z=z, x=x, y=y, api_key=api_key)
+    try:
+        response = http.get(url, timeout=timeout)
+        response.raise_for_status()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(response.content)
+        os.replace(temp_path, path)
+    except Exception as e:
+        if not path.exists():
+            logger.warning(f"Tile fetch failed for {layer}/{z}/{x}/{y}: {e}", emoji="⚠️")
+            return None
+        # Serve the stale tile rather than nothing
+        logger.warning(f"Tile refresh failed, using cached {layer}/{z}/{x}/{y}: {e}", emoji="⚠️")
+
+    return _local_url(layer, z, x, y, path)
+
+
+def prefetch_tiles(tiles: List[Tuple[str, int, int, int]], api_key: str,
+                   max_age: int = DEFAULT_MAX_AGE, timeout: int = 10,
+                   max_bytes: int = DEFAULT_MAX_BYTES,
+                   base_url: Optional[str] = None) -> List[Optional[str]]:
+    """
+    Make sure a set of tiles is cached and fresh
+
+    Args:
+        tiles: ``(layer, z, x, y)`` tuples
+        api_key: OpenWeatherMap API key
+        max_age: Seconds a cached tile stays fresh
+        timeout: Per-request timeout in seconds
+        max_bytes: Cache size cap enforced after fetching
+        base_url: Tile server root URL (default ``DEFAULT_TILE_BASE_URL``)
+
+    Returns:
+        list: Local tile URL per requested tile (None if unavailable)
+    """
+    if not tiles:
+        return []
+
+    base_url = (base_url or DEFAULT_TILE_BASE_URL).rstrip('/')
+    with ThreadPoolExecutor(max_workers=min(8, len(tiles))) as executor:
+        futures = [
+            executor.submit(_fetch_tile, layer, z, x, y, api_key, max_age, timeout, base_url)
+            for layer, z, x, y in tiles
+        ]
+        urls = [future.result() for future in futures]
+
+    evict_tiles(max_bytes)
+    return urls
+
+
+def evict_tiles(max_bytes: int = DEFAULT_MAX_BYTES) -> int:
+    """
+    Remove least recently used tiles until the cache fits in ``max_bytes``
+
+    Returns:
+        int: Number of tiles removed
+    """
+    entries = []
+    total = 0
+    for root, _, files in os.walk(get_tile_dir()):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_atime_ns, stat.st_size, path))
+            total += stat.st_size
+
+    if total <= max_bytes:
+        return 0
+
+    removed = 0
+    for _, size, path in sorted(entries):
+        try:
+            os.unlink(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+        if total <= max_bytes:
+            break
+
+    logger.info(f"Evicted {removed} radar tiles from cache", emoji="🧹")
+    return removed
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Slate Dashboard Obsidian Vault Index
+====================================
+
+Local-filesystem mode for the ``obsidian`` widget. The vault is walked with
+``os.scandir`` and "N most recently modified notes" is a ``heapq.nlargest``
+streamed over the walk, so no full listing is built or sorted.
+
+Nothing is persisted between builds: editing a note in place doesn't touch
+its directory's mtime, so finding changed notes takes a stat per note
+either way, and a stored index would only add a write of every entry.
+"""
+
+import heapq
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+from urllib.parse import quote
+
+# Obsidian's own configuration and trash folders never contain notes to show
+SKIPPED_DIRS = {'.obsidian', '.trash', '.git'}
+NOTE_SUFFIX = '.md'
+
+
+def _scan_notes(root: str) -> Iterator[Tuple[str, float]]:
+    """Yield ``(relative_path, mtime)`` for every note below ``root``"""
+    stack = [root]
+    prefix_length = len(root) + 1
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name in SKIPPED_DIRS:
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.name.endswith(NOTE_SUFFIX):
+                            yield entry.path[prefix_length:], entry.stat().st_mtime
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def recent_notes(vault_path: str, limit: int = 5) -> List[Dict[str, Any]]:
+    """
+    Return the most recently modified notes of a local vault
+
+    Args:
+        vault_path: Path to the vault root
+        limit: Number of notes to return
+
+    Returns:
+        list: Template-ready note items, newest first
+    """
+    root = os.path.abspath(os.path.expanduser(vault_path))
+    vault_name = Path(root).name
+
+    items = []
+    for rel_path, mtime in heapq.nlargest(limit, _scan_notes(root), key=lambda item: item[1]):
+        note_path = rel_path[:-len(NOTE_SUFFIX)].replace(os.sep, '/')
+        items.append({
+            'title': note_path.replace('/', ' → '),
+            'url': f"obsidian://open?vault={quote(vault_name)}&file={quote(note_path)}",
+            'modified': datetime.fromtimestamp(mtime).isoformat(),
+            'type': 'note'
+        })
+    return items
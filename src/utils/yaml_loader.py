@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Slate Dashboard YAML Loader
+===========================
+
+The one YAML entry point for the renderers, the theme tools and the
+validators:
+- Parses with libyaml's ``CSafeLoader`` when PyYAML was built with it,
+  falling back to the pure-Python ``SafeLoader``
+- Caches parsed documents in memory, one entry per file replaced when its
+  content hash changes, so a file read by several tools in one process (or
+  by every rebuild of the watcher) is parsed once. There is deliberately
+  no disk layer: libyaml parses these small files about as fast as a cache
+  could be read, and unpickling from a writable cache directory would let
+  anyone who can write it run code
+- Returns read-only documents (:class:`FrozenDict` / :class:`FrozenList`)
+  because cached documents are shared by every caller
+
+Frozen documents are still ``dict``/``list`` instances, so JSON, Jinja2
+and ``isinstance`` checks work unchanged. ``copy()``, ``copy.copy`` and
+``copy.deepcopy`` return ordinary mutable containers; :func:`thaw` does a
+deep conversion.
+"""
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, Tuple, Union
+
+import yaml
+
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Resolved path -> (content hash, document)
+_documents: Dict[str, Tuple[str, Any]] = {}
+_lock = threading.Lock()
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is read-only; use .copy() or thaw() for a mutable copy")
+
+
+class FrozenDict(dict):
+    """Read-only ``dict`` returned for cached YAML mappings"""
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+    __ior__ = _read_only
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self)
+
+    def __copy__(self) -> Dict[str, Any]:
+        return dict(self)
+
+    def __deepcopy__(self, memo) -> Dict[str, Any]:
+        return thaw(self)
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+class FrozenList(list):
+    """Read-only ``list`` returned for cached YAML sequences"""
+
+    __setitem__ = __delitem__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+    __iadd__ = __imul__ = _read_only
+
+    def copy(self) -> list:
+        return list(self)
+
+    def __copy__(self) -> list:
+        return list(self)
+
+    def __deepcopy__(self, memo) -> list:
+        return thaw(self)
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+
+def freeze(value: Any) -> Any:
+    """Recursively convert dicts and lists to their read-only variants"""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Recursively convert a (possibly frozen) document to plain dicts and lists"""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return value
+
+
+def parse_yaml(text: Union[str, bytes]) -> Any:
+    """Parse a YAML document with the fastest available safe loader (uncached, mutable)"""
+    return yaml.load(text, Loader=YamlLoader)
+
+
+def _content_key(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def load_yaml(file_path: Union[str, Path]) -> Any:
+    """
+    Load a YAML file through the content-hash cache
+
+    Args:
+        file_path: Path to the YAML file
+
+    Returns:
+        The parsed document, read-only (None for an empty file)
+
+    Raises:
+        OSError: If the file can't be read
+        yaml.YAMLError: If the file is not valid YAML
+    """
+    with open(file_path, 'rb') as f:
+        content = f.read()
+
+    path = str(Path(file_path).resolve())
+    key = _content_key(content)
+    with _lock:
+        cached = _documents.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    document = freeze(parse_yaml(content))
+    with _lock:
+        _documents[path] = (key, document)
+    return document